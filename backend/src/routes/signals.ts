@@ -62,4 +62,28 @@ router.post('/report-outcome', verifyBotSource, async (req: Request, res: Respon
     }
 });
 
+// POST /api/v1/signals/report-outcome/bulk
+// Batched form used by the executor's OutcomeReporter.
+// Body: { outcomes: [{ id, signal_id, execution?, pnl?, status? }, ...] } (at most MAX_BULK_OUTCOMES)
+// Reply: { status, results: [{ id, status: 'success' } | { id, status: 'rejected', reason }] } in request order
+const MAX_BULK_OUTCOMES = 200;
+router.post('/report-outcome/bulk', verifyBotSource, async (req: Request, res: Response) => {
+    const outcomes = req.body?.outcomes;
+    if (!Array.isArray(outcomes) || outcomes.length > MAX_BULK_OUTCOMES) {
+        return res.status(400).json({ status: "error", message: `outcomes must be an array of <= ${MAX_BULK_OUTCOMES}` });
+    }
+
+    const { TrainingStore } = require('../core/training-store');
+    const results: any[] = [];
+    for (const o of outcomes) {
+        if (!o || !o.signal_id) {
+            results.push({ id: o?.id, status: "rejected", reason: "signal_id required" });
+            continue;
+        }
+        await TrainingStore.logOutcome(o.signal_id, { execution: o.execution, pnl: o.pnl, status: o.status });
+        results.push({ id: o.id, status: "success" });
+    }
+    res.json({ status: "success", results });
+});
+
 export default router;
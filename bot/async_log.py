@@ -0,0 +1,193 @@
+import json
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+LOG_QUEUE_SIZE = 10000 # Records buffered for the writer thread before new ones are dropped
+LOG_MAX_BYTES = 50 * 1024 * 1024 # Rotate the JSON-lines file at this size
+LOG_BACKUPS = 5 # Rotated files kept (<path>.1 ... .5)
+WRITE_BATCH = 256 # Records written per flush by the writer thread
+
+# LogRecord attributes that are not `extra=` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, exc, the static fields and any extra= fields."""
+    def __init__(self, static=None):
+        super().__init__()
+        self.static = static or {}
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            **self.static,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without ever waiting: when the writer
+    thread has fallen behind and the queue is full, the record is dropped
+    and counted, and a summary of what was lost is logged once there is room.
+    Formatting is left to the writer thread (the bots' messages are
+    f-strings already, so there is nothing to snapshot beyond the text).
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = Counter() # level name -> records dropped
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped[record.levelname] += 1
+                self._unreported += 1
+            return
+        if self._unreported:
+            with self._lock:
+                lost, self._unreported = self._unreported, 0
+            notice = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                       f"LOG: {lost} records dropped, writer fell behind ({dict(self.dropped)} total)",
+                                       None, None)
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                with self._lock:
+                    self._unreported += lost
+
+class _Batched:
+    """Handler mixin: emit() leaves the write buffered, the writer thread calls sync() once per batch."""
+    def flush(self):
+        pass
+
+    def sync(self):
+        super().flush()
+
+class _BatchedFile(_Batched, RotatingFileHandler):
+    pass
+
+class _BatchedStream(_Batched, logging.StreamHandler):
+    pass
+
+class _Writer:
+    """
+    The background thread behind the queue. Everything already queued goes
+    out under one flush, so a slow disk costs a flush per batch rather than
+    per record. Handlers' own levels are respected.
+    """
+    _sentinel = None
+
+    def __init__(self, log_queue, *handlers):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="aegis-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write out everything queued and end the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel) # Wait for room: a full queue must still be told to stop
+        self._thread.join()
+        self._thread = None
+
+    def handle(self, record):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _run(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is not self._sentinel:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.sync()
+            for _ in batch:
+                q.task_done()
+            if batch[-1] is self._sentinel:
+                return
+
+class AsyncLogging:
+    """
+    Root logging through a queue: callers only enqueue, and one background
+    thread formats and writes a rotating JSON-lines file (plus the console,
+    in the usual text format). Installed by setup_logging(); stop() drains
+    the queue, and runs at exit.
+    """
+    def __init__(self, path, text_format, static=None, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS,
+                 queue_size=LOG_QUEUE_SIZE, console=True, level=logging.INFO):
+        self.path = path
+        file_handler = _BatchedFile(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter(static))
+        handlers = [file_handler]
+        if console:
+            stream = _BatchedStream()
+            stream.setFormatter(logging.Formatter(text_format))
+            handlers.append(stream)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.writer = _Writer(self.queue, *handlers)
+        self.level = level
+        self._stopped = False
+
+    def start(self):
+        logging.basicConfig(level=self.level, handlers=[self.handler], force=True)
+        self.writer.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Write out everything queued, then stop the writer thread. Idempotent."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.writer.stop()
+        for handler in self.writer.handlers:
+            handler.close()
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "capacity": self.queue.maxsize,
+                "dropped": sum(self.handler.dropped.values()), "dropped_by_level": dict(self.handler.dropped)}
+
+    def format(self):
+        s = self.stats()
+        return f"{s['queued']}/{s['capacity']} queued | {s['dropped']} dropped"
+
+def setup_logging(path, text_format='%(asctime)s - %(levelname)s - %(message)s', static=None, **kwargs):
+    """
+    Replace the root handlers (including parser.py's import-time basicConfig)
+    with the async pipeline writing JSON lines to `path`. Returns the running
+    AsyncLogging.
+    """
+    return AsyncLogging(path, text_format, static=static, **kwargs).start()
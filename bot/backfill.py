@@ -0,0 +1,345 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from parser import parse_signals
+from bulk_parse import message_text
+from forwarder import SignalForwarder, SignalBatcher
+from pipeline import IngestPipeline, Stage
+
+# CONFIG
+BASE_DIR = "/opt/aegis-saas/telegram"
+SESSION_PATH = "aegis_session" # Not the live session: its sqlite file is locked while live runs
+API_ID = 33096444
+API_HASH = "a15b675d594842d128711e8391c1b6a1"
+TARGET_CHANNEL = "Options_Banknifty_Share_Market"
+API_ENDPOINT = "http://91.98.226.5:4100/api/v1/signals/ingest"
+BULK_ENDPOINT = f"{API_ENDPOINT}/bulk"
+BOT_SECRET = "AEGIS_BOT_SECRET_V1"
+
+TRAINING_DIR = os.environ.get("AEGIS_TRAINING_DIR", "/data/training") # Where training_store.py reads from
+
+BATCH_SIZE = 500 # Messages per fetch/parse/forward unit (Telegram pages 100 per request)
+STAGE_DEPTH = 4 # Batches buffered between stages
+RETRY_BASE = 1.0 # Seconds before re-sending a failed forward, doubled per attempt
+RETRY_MAX = 60.0
+
+logger = logging.getLogger(__name__)
+
+class Checkpoint:
+    """
+    Last fully forwarded message id of a backfill source, persisted
+    atomically, plus how far the dataset sink's file had got at that point.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.last_id = 0
+        self.forwarded = 0
+        self.sink_bytes = None
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            self.last_id = state.get("last_id", 0)
+            self.forwarded = state.get("forwarded", 0)
+            self.sink_bytes = state.get("sink_bytes")
+
+    def advance(self, last_id, forwarded, sink_bytes=None):
+        self.last_id = last_id
+        self.forwarded += forwarded
+        self.sink_bytes = sink_bytes
+        self._save()
+
+    def reset(self):
+        self.last_id = self.forwarded = 0
+        self.sink_bytes = None
+        self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"last_id": self.last_id, "forwarded": self.forwarded, "sink_bytes": self.sink_bytes,
+                       "updated_at": time.time()}, f)
+        os.replace(tmp, self.path)
+
+def _record(chat_id, msg_id, date, text):
+    return {"chat_id": chat_id, "id": msg_id, "date": date, "text": text}
+
+def export_chat_id(export):
+    """Telethon-style (marked) chat id of a Telegram Desktop export, so ids match telegram_live's."""
+    chat_id, kind = export.get("id"), export.get("type", "")
+    if chat_id is None:
+        return None
+    if kind.endswith("channel") or kind.endswith("supergroup"):
+        return -1000000000000 - chat_id
+    return -chat_id if kind.endswith("group") else chat_id
+
+async def telegram_batches(client, channel, min_id, batch_size, limit=None):
+    """Oldest-first pages of channel history after min_id."""
+    batch = []
+    async for message in client.iter_messages(channel, reverse=True, min_id=min_id, limit=limit):
+        batch.append(_record(message.chat_id, message.id, message.date.astimezone(timezone.utc).isoformat(),
+                             message.text or ""))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def export_batches(path, min_id, batch_size, limit=None, chat_id=None):
+    """
+    Same pages from an offline export: a Telegram Desktop result.json
+    ({"id", "type", "messages": [...]}) or a JSONL archive with one message
+    per line (carrying "chat_id"). `chat_id` fills in where the export has none.
+    """
+    def records():
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                default, messages = chat_id, (json.loads(line) for line in f if line.strip())
+            else:
+                export = json.load(f)
+                default, messages = export_chat_id(export) or chat_id, export.get("messages", [])
+            for m in messages:
+                if m.get("type", "message") == "message" and m.get("id", 0) > min_id:
+                    source = m.get("chat_id", default)
+                    if source is None:
+                        raise ValueError(f"{path}: message #{m['id']} has no chat id, pass --chat-id")
+                    yield _record(source, m["id"], m.get("date"), message_text(m))
+
+    batch, count = [], 0
+    for record in records():
+        batch.append(record)
+        count += 1
+        if len(batch) >= batch_size or count == limit:
+            yield batch
+            batch = []
+            await asyncio.sleep(0) # Let parse/forward run while we read
+        if count == limit:
+            return
+    if batch:
+        yield batch
+
+class DatasetSink:
+    """
+    Training-only destination: appends records in the backend TrainingStore's
+    ingest layout to TRAINING_DIR/training_dataset_backfill_<source>.jsonl,
+    which training_store.py ingests like the daily files. Nothing reaches the
+    signals API, so nothing reaches /feed or the executor. Parser rejections
+    are kept as REJECTED samples; parsed signals never went through the
+    Aegis validator, so they are UNVALIDATED.
+    """
+    def __init__(self, directory, source):
+        os.makedirs(directory, exist_ok=True)
+        name = os.path.splitext(source.lstrip("@"))[0]
+        self.path = os.path.join(directory, f"training_dataset_backfill_{name}.jsonl")
+
+    def resume(self, position):
+        """Cut off whatever a crashed run wrote after its last checkpoint."""
+        if position is not None and os.path.exists(self.path) and os.path.getsize(self.path) > position:
+            logger.warning(f"BACKFILL: truncating {self.path} to the last checkpoint ({position} bytes)")
+            os.truncate(self.path, position)
+
+    def _line(self, item):
+        record, signal = item["record"], item["signal"]
+        rejected = signal.get("status") == "REJECTED"
+        return json.dumps({
+            "id": f"TRN-{item['id']}",
+            "signal_id": f"{'REJ' if rejected else 'SIG'}-{item['id']}",
+            "raw_message": record["text"],
+            "parsed_payload": None if rejected else item["payload"],
+            "parse_confidence": 0 if rejected else signal.get("confidence", 0),
+            "aegis_validation_result": ({"status": "REJECTED", "reason": signal.get("reason")} if rejected
+                                        else {"status": "UNVALIDATED", "reason": "backfill"}),
+            "latency_ms": 0,
+            "created_at": record["date"],
+        }, ensure_ascii=False) + "\n"
+
+    async def deliver(self, items):
+        """Returns (signals written, rejections written, file position to checkpoint)."""
+        data = "".join(self._line(item) for item in items).encode()
+        def write():
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                return f.tell()
+        position = await asyncio.to_thread(write)
+        rejected = sum(item["signal"].get("status") == "REJECTED" for item in items)
+        return len(items) - rejected, rejected, position
+
+    async def close(self):
+        pass
+
+class ApiSink:
+    """
+    The signals API's bulk ingest, for backends that record training data on
+    ingest. Payloads carry metadata.training_only: /ingest/bulk stores them
+    without publishing them to /feed, and the executor refuses them.
+    """
+    def __init__(self, endpoint):
+        self.forwarder = SignalForwarder(endpoint, BOT_SECRET, timeout=10)
+        self.batcher = SignalBatcher(self.forwarder, f"{endpoint}/bulk", max_batch=50, max_delay=0.05)
+        self.retries = 0
+
+    def resume(self, position):
+        pass
+
+    async def _send(self, payload):
+        # Retries until the backend gives a definitive answer; a stuck backend
+        # stalls the pipeline (and so the fetch) instead of losing history
+        attempt = 0
+        while True:
+            try:
+                res = await self.batcher.submit(payload)
+                if res.status_code < 500:
+                    return res.status_code == 200
+                error = f"HTTP {res.status_code}"
+            except Exception as e:
+                error = repr(e)
+            attempt += 1
+            self.retries += 1
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (attempt - 1))
+            logger.warning(f"BACKFILL: retry {attempt} for {payload['id']} in {delay:.0f}s ({error})")
+            await asyncio.sleep(delay)
+
+    async def deliver(self, items):
+        payloads = [item["payload"] for item in items if item["signal"].get("status") != "REJECTED"]
+        results = await asyncio.gather(*(self._send(p) for p in payloads))
+        return sum(results), len(results) - sum(results), None
+
+    async def close(self):
+        await self.batcher.flush()
+        await self.forwarder.close()
+
+class Backfill:
+    """
+    Replays channel history into the training dataset in three overlapped
+    stages: fetch (the caller's page iterator) -> parse (a worker thread,
+    optionally a process pool) -> deliver (a DatasetSink, or an ApiSink).
+    Batches are delivered strictly in order and the checkpoint moves after
+    each one, so an interrupted run resumes from the last completed batch.
+    A batch that fails to parse or deliver stops the run there (the stages
+    halt on error), so the checkpoint never moves past it.
+
+    Ids are TLG-{chat_id}-{msg_id}, as telegram_live builds them, so history
+    and live traffic for the same post line up.
+    """
+    def __init__(self, sink, checkpoint, parse_workers=1):
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.parse_workers = parse_workers
+        self._pool = None # One process pool per run(), so workers and their parse caches stay warm
+        self.stats = {"messages": 0, "signals": 0, "forwarded": 0, "rejected": 0, "retries": 0}
+        self._started = time.monotonic()
+        sink.resume(checkpoint.sink_bytes)
+
+    async def parse_batch(self, batch):
+        texts = [r["text"] for r in batch]
+        parse = lambda: list(parse_signals(texts, workers=self.parse_workers, pool=self._pool))
+        signals = await asyncio.to_thread(parse)
+        items = []
+        for record, signal in zip(batch, signals):
+            if not signal:
+                continue
+            item_id = f"TLG-{record['chat_id']}-{record['id']}"
+            items.append({"id": item_id, "record": record, "signal": signal, "payload": {
+                **signal,
+                "id": item_id,
+                "source": "TELEGRAM_EXTERNAL",
+                "timestamp_ist": record["date"] or signal.get("timestamp_ist"),
+                "metadata": {
+                    "original_text": record["text"],
+                    "is_replay": True,
+                    "is_backfill": True,
+                    "training_only": True,
+                    "ingested_at": datetime.now(timezone.utc).isoformat()
+                }
+            }})
+        self.stats["messages"] += len(batch)
+        self.stats["signals"] += sum(item["signal"].get("status") != "REJECTED" for item in items)
+        return {"last_id": batch[-1]["id"], "items": items}
+
+    async def forward_batch(self, job):
+        accepted, rejected, position = await self.sink.deliver(job["items"])
+        self.stats["forwarded"] += accepted
+        self.stats["rejected"] += rejected
+        self.stats["retries"] = getattr(self.sink, "retries", 0)
+        self.checkpoint.advance(job["last_id"], accepted + rejected, position)
+        elapsed = time.monotonic() - self._started
+        logger.info(f"BACKFILL: up to #{job['last_id']} | {self.stats['messages']} msgs, "
+                    f"{self.stats['signals']} signals ({self.stats['messages'] / elapsed:.0f} msgs/s)")
+
+    async def run(self, batches):
+        pipeline = IngestPipeline(
+            Stage("parse", self.parse_batch, workers=1, maxsize=STAGE_DEPTH, halt_on_error=True),
+            Stage("forward", self.forward_batch, workers=1, maxsize=STAGE_DEPTH, halt_on_error=True),
+        )
+        if self.parse_workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        pipeline.start()
+        try:
+            async for batch in batches:
+                if pipeline.failure is not None:
+                    break
+                await pipeline.submit(batch)
+            await pipeline.join()
+            if pipeline.failure is not None:
+                stage, error = pipeline.failure
+                logger.error(f"BACKFILL: stopped, a batch failed in {stage}; resume from checkpoint "
+                             f"#{self.checkpoint.last_id}")
+                raise error
+        finally:
+            await pipeline.stop(drain=False)
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        return self.stats
+
+async def main(args):
+    source = os.path.basename(args.export) if args.export else args.channel
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(BASE_DIR, f"backfill_{source}.json"))
+    if args.reset:
+        checkpoint.reset()
+    logger.info(f"📜 Backfilling {source} after message #{checkpoint.last_id}...")
+
+    sink = ApiSink(args.endpoint) if args.sink == "api" else DatasetSink(args.dataset_dir, source)
+    backfill = Backfill(sink, checkpoint, parse_workers=args.parse_workers)
+    client = None
+    try:
+        if args.export:
+            batches = export_batches(args.export, checkpoint.last_id, args.batch_size, args.limit, args.chat_id)
+        else:
+            from telethon import TelegramClient
+            client = TelegramClient(SESSION_PATH, API_ID, API_HASH)
+            await client.start()
+            batches = telegram_batches(client, args.channel, checkpoint.last_id, args.batch_size, args.limit)
+        stats = await backfill.run(batches)
+    finally:
+        await sink.close()
+        if client is not None:
+            await client.disconnect()
+    logger.info(f"✅ BACKFILL DONE: {stats} | checkpoint #{checkpoint.last_id}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Resumable backfill of channel history into the training dataset")
+    ap.add_argument("--channel", default=TARGET_CHANNEL)
+    ap.add_argument("--export", help="offline source: Telegram Desktop result.json or a JSONL archive")
+    ap.add_argument("--chat-id", type=int, help="chat id for exports that don't carry one (Telethon's marked id)")
+    ap.add_argument("--sink", choices=("dataset", "api"), default="dataset",
+                    help="dataset: training JSONL only (default); api: bulk ingest, tagged training_only")
+    ap.add_argument("--dataset-dir", default=TRAINING_DIR)
+    ap.add_argument("--endpoint", default=API_ENDPOINT, help="ingest URL for --sink api (bulk is <endpoint>/bulk)")
+    ap.add_argument("--checkpoint", help="checkpoint file (default: per source in BASE_DIR)")
+    ap.add_argument("--reset", action="store_true", help="ignore the checkpoint and start from the beginning")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--parse-workers", type=int, default=1)
+    ap.add_argument("--limit", type=int, help="stop after this many messages")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - [BACKFILL] - %(levelname)s - %(message)s',
+                        stream=sys.stdout, force=True) # parser.py configures logging on import
+    asyncio.run(main(args))
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import tempfile
+from collections import Counter
+
+import channels
+from channels import ChannelConfig, ShardRouter, ChannelMetrics
+from latency import new_trace
+from parser import parse_signal
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "signals.jsonl")
+PER_CHANNEL = 200 # Messages each channel posts in the flood run
+PACED_RATE = 10 # Messages/sec per channel in the paced run
+PACED_SECONDS = 3
+DEDUP_WINDOW = 300
+CONTENT_WINDOW = 86400
+HEAVY_PARSE = 0.0003 # Seconds of extra CPU per message for the "heavy" profile
+
+def heavy_parse(text):
+    """A profile with real per-message work (a stricter, multi-pass parser), to show where shards pay off."""
+    until = time.perf_counter() + HEAVY_PARSE
+    while time.perf_counter() < until:
+        pass
+    return parse_signal(text)
+
+# Module level, so shard processes (forked or spawned) know the profile too
+channels.PROFILES["heavy"] = heavy_parse
+
+def load_corpus():
+    with open(CORPUS, "r") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+def messages(texts, channels, per_channel):
+    """Round-robin over channels, the way posts interleave on one connection. Each text is unique."""
+    for n in range(per_channel):
+        for i, c in enumerate(channels):
+            yield c, f"{texts[(n + 7 * i) % len(texts)]} #{n}"
+
+async def submit(router, metrics, config, text, outcomes):
+    sent = time.perf_counter()
+    result = await router.submit({"text": text, "profile": config.profile, "scope": config.dedup_scope,
+                                  "trace": new_trace()})
+    metrics.record_lag(config.channel, time.perf_counter() - sent)
+    metrics.count(config.channel, result["outcome"])
+    outcomes[config.channel][result["outcome"]] += 1
+
+async def run_case(texts, channel_count, shards, workdir, paced=False, profile="default", per_channel=PER_CHANNEL):
+    configs = [ChannelConfig(f"channel_{i:02d}", profile=profile) for i in range(channel_count)]
+    snapshot_dir = tempfile.mkdtemp(dir=workdir)
+    router = ShardRouter(shards, snapshot_dir, DEDUP_WINDOW, CONTENT_WINDOW)
+    router.start()
+    metrics = ChannelMetrics()
+    outcomes = {c.channel: Counter() for c in configs}
+
+    start = time.perf_counter()
+    if paced:
+        tasks = []
+        interval = 1.0 / PACED_RATE
+        for tick in range(PACED_RATE * PACED_SECONDS):
+            # Every channel posts once per tick: a burst of channel_count messages
+            for c, text in messages(texts, configs, 1):
+                tasks.append(asyncio.create_task(submit(router, metrics, c, f"{text}-{tick}", outcomes)))
+            await asyncio.sleep(max(0.0, start + (tick + 1) * interval - time.perf_counter()))
+        await asyncio.gather(*tasks)
+    else:
+        await asyncio.gather(*(submit(router, metrics, c, text, outcomes)
+                               for c, text in messages(texts, configs, per_channel)))
+    elapsed = time.perf_counter() - start
+    await router.close()
+
+    total = sum(sum(c.values()) for c in outcomes.values())
+    p50 = max(h.quantile(0.5) for h in metrics.lag.values())
+    p99 = max(h.quantile(0.99) for h in metrics.lag.values())
+    label = "inline" if shards == 0 else f"{shards} shard{'s' if shards > 1 else ''}"
+    print(f"{channel_count:3d} channels | {profile:<7} | {label:<8} | {total:6d} msgs in {elapsed * 1000:7.1f}ms "
+          f"= {total / elapsed:8.0f} msgs/s | worst channel lag p50 {p50 * 1000:7.2f}ms p99 {p99 * 1000:7.2f}ms")
+    return outcomes
+
+async def run_benchmark(workdir):
+    texts = load_corpus()
+    # Shards can only add throughput with spare cores; on one core they still take parse work off the loop
+    print(f"=== Channel Shard Benchmark: {len(texts)} corpus texts, {PER_CHANNEL} msgs per channel, "
+          f"{len(os.sched_getaffinity(0))} CPUs ===\n")
+    ok = True
+    for channel_count in (6, 24, 48):
+        baseline = None
+        for shards in (0, 1, 2, 4):
+            outcomes = await run_case(texts, channel_count, shards, workdir)
+            # Scopes are per channel, so sharding must not change a single outcome
+            if baseline is None:
+                baseline = outcomes
+            elif outcomes != baseline:
+                print(f"{'':>16}<-- outcomes differ from inline")
+                ok = False
+        print()
+
+    print(f"--- heavy profile: +{HEAVY_PARSE * 1e6:.0f}us CPU per message ---")
+    heavy = None
+    for shards in (0, 1, 2, 4):
+        outcomes = await run_case(texts, 48, shards, workdir, profile="heavy", per_channel=PER_CHANNEL // 4)
+        if heavy is None:
+            heavy = outcomes
+        elif outcomes != heavy:
+            print(f"{'':>16}<-- outcomes differ from inline")
+            ok = False
+    print()
+
+    print(f"--- paced: every channel posting {PACED_RATE} msgs/s for {PACED_SECONDS}s ---")
+    for shards in (0, 4):
+        await run_case(texts, 48, shards, workdir, paced=True)
+
+    accepted = sum(c["accepted"] for c in baseline.values())
+    print(f"\noutcomes (48 channels): accepted {accepted}, "
+          f"{dict(sum(baseline.values(), Counter()))}")
+    return ok and accepted > 0
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="aegis-channels-bench-")
+    try:
+        ok = asyncio.run(run_benchmark(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
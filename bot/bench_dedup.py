@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+from dedup import DedupIndex, content_key, signal_key
+
+WINDOW = 300 # Same as DEDUP_WINDOW in telegram_live.py
+
+def legacy_dedup(cache, key, now):
+    # The old dict keyed on "Symbol_Side" with a full sweep past 100 entries
+    if key in cache and now - cache[key] < WINDOW:
+        return True
+    cache[key] = now
+    if len(cache) > 100:
+        expired = [k for k, v in cache.items() if now - v > WINDOW]
+        for k in expired: del cache[k]
+    return False
+
+def run_size(count, directory):
+    keys = [content_key(f"NIFTY {22000 + i % 500} CE buy {i}") ^ i for i in range(count)]
+    base = time.time()
+    # Spread arrivals over twice the window so roughly half the keys are live at the end
+    step = 2 * WINDOW / count
+
+    def fill():
+        index = DedupIndex(snapshot_path=os.path.join(directory, f"dedup-{count}.snapshot"))
+        for i, key in enumerate(keys):
+            now = base + i * step
+            if not index.seen(key, now):
+                index.add(key, WINDOW, now)
+            if i % 1000 == 0:
+                index.expire(now)
+        return index
+
+    start = time.perf_counter()
+    index = fill()
+    add_ns = (time.perf_counter() - start) / count * 1e9
+    # Separate pass: tracemalloc slows every allocation down
+    tracemalloc.start()
+    traced = fill()
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del traced
+
+    end = base + count * step
+    start = time.perf_counter()
+    hits = sum(1 for key in keys if index.seen(key, end))
+    seen_ns = (time.perf_counter() - start) / count * 1e9
+
+    start = time.perf_counter()
+    blob = index.dump(end)
+    index.save(blob)
+    save_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    restored = DedupIndex(snapshot_path=index.snapshot_path)
+    restored_count = restored.load(end)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{count:>9} keys | add+check {add_ns:6.0f}ns  seen {seen_ns:5.0f}ns | live {len(index):>8} "
+          f"({hits} hit) {memory_mb:7.1f}MB | snapshot {len(blob) / 1e6:6.1f}MB "
+          f"save {save_ms:7.1f}ms  load {load_ms:7.1f}ms ({restored_count})")
+    return restored_count == hits
+
+def run_legacy(count):
+    cache, base = {}, time.time()
+    keys = [f"NIFTY {22000 + i % 500} CE_BUY" for i in range(count)]
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        legacy_dedup(cache, key, base + i * 0.1)
+    print(f"legacy dict, {count} signals over 500 symbols: {(time.perf_counter() - start) / count * 1e9:.0f}ns/check")
+
+def run_benchmark(sizes):
+    directory = tempfile.mkdtemp(prefix="aegis-dedup-")
+    print(f"=== Dedup Index Benchmark ({WINDOW}s window) ===\n")
+    try:
+        run_legacy(50000)
+        start = time.perf_counter()
+        for i in range(100000):
+            content_key("NIFTY 22000 CE buy above 150 sl 130 target 170/190")
+            signal_key("NIFTY 22000 CE", "BUY")
+        print(f"key hashing: {(time.perf_counter() - start) / 100000 * 1e9:.0f}ns per message (content + symbol/side)\n")
+        return all([run_size(count, directory) for count in sizes])
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10000, 100000, 1000000, 3000000]
+    sys.exit(0 if run_benchmark(sizes) else 1)
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import types
+import shutil
+import asyncio
+import logging
+import tempfile
+import statistics
+import requests
+from dataclasses import dataclass
+
+KERNEL_LATENCY = 0.05 # Blocking kernel.submit_signal (risk checks + broker round-trip)
+ALERT_LATENCY = 0.2 # Blocking Telegram alert
+TICK = 0.005 # Loop-lag probe interval
+
+# --- Stand-ins for the Aegis core, installed before controlled_executor imports it ---
+class VaultEngine:
+    pass
+
+class KiteAdapter:
+    def __init__(self, vault):
+        self.orders = 0
+
+    def login(self):
+        return True
+
+    def place_order(self, **kwargs):
+        self.orders += 1
+        return {"status": "SUCCESS", "order_id": f"BENCH-{self.orders}"}
+
+@dataclass
+class SignalProposal:
+    symbol: str
+    mode: str
+    confidence: float
+    metadata: dict
+
+class ExecutionKernel:
+    def __init__(self, vault, alert_manager, kite, expectancy_engine=None, pnl_governor=None):
+        self.kite = kite
+
+    def submit_signal(self, proposal, tech_metrics=None):
+        time.sleep(KERNEL_LATENCY)
+        self.kite.place_order(symbol=proposal.symbol, side=proposal.mode)
+        return True, "BENCH_APPROVED"
+
+    def confirm_execution_ready(self, source=None):
+        pass
+
+    def halt(self):
+        pass
+
+class AlertManager:
+    def __init__(self, vault):
+        pass
+
+    def send_telegram_alert(self, text):
+        time.sleep(ALERT_LATENCY)
+
+class LakshmiPnLGovernor:
+    pass
+
+class ExpectancyEngine:
+    pass
+
+@dataclass
+class ExpectancyStats:
+    trades: int = 0
+
+def install_stand_ins():
+    stand_ins = {
+        "core.vault_engine": {"VaultEngine": VaultEngine},
+        "broker.kite_adapter": {"KiteAdapter": KiteAdapter},
+        "execution.execution_kernel": {"ExecutionKernel": ExecutionKernel, "SignalProposal": SignalProposal},
+        "risk.lakshmi_pnl_governor": {"LakshmiPnLGovernor": LakshmiPnLGovernor},
+        "core.expectancy_engine": {"ExpectancyEngine": ExpectancyEngine, "ExpectancyStats": ExpectancyStats},
+        "notification.alert_manager": {"AlertManager": AlertManager},
+    }
+    for name, attrs in stand_ins.items():
+        for package in (name.split(".")[0], name):
+            sys.modules.setdefault(package, types.ModuleType(package))
+        for attr, value in attrs.items():
+            setattr(sys.modules[name], attr, value)
+
+class BenchFeed:
+    def mark_seen(self, signal_id):
+        pass
+
+def sample_signals(count, symbols):
+    return [{
+        "signal_id": f"SIG-{i}",
+        "symbol": f"NIFTY {22000 + 50 * (i % symbols)} CE",
+        "side": "BUY",
+        "entry_price": 150.0,
+        "stop_loss": 145.0,
+        "targets": [170.0, 190.0],
+        "confidence": 90,
+        "metadata": {"is_replay": True}
+    } for i in range(count)]
+
+async def probe_loop_lag(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+def process_inline(executor, signal):
+    # The pre-off-loop shape: every blocking call made straight from the loop
+    auth_ok, reason = executor.kernel.submit_signal(
+        SignalProposal(signal["symbol"], signal["side"], 0.9, {}), tech_metrics={})
+    try:
+        requests.post(executor.reporter.url, json={"signal_id": signal["signal_id"], "status": "EXECUTED_PAPER"},
+                      timeout=2)
+    except requests.RequestException:
+        pass
+    executor.alert_manager.send_telegram_alert(f"{signal['symbol']} executed")
+
+async def run_case(name, handle, count):
+    lags, stop = [], asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    start = time.perf_counter()
+    await handle()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    lags_ms = sorted(l * 1000 for l in lags) or [0.0]
+    print(f"{name:<28} {count / elapsed:7.1f} signals/sec | loop lag p50 {statistics.median(lags_ms):7.2f}ms  "
+          f"max {lags_ms[-1]:8.2f}ms")
+
+async def run_benchmark(count=40, symbols=8):
+    import controlled_executor as ce
+    logging.disable(logging.CRITICAL) # Per-signal INFO lines would dominate the timings
+    # Lift the strict production limits: this measures throughput, not policy
+    ce.MAX_TRADES_PER_DAY = ce.MAX_TRADES_PER_INSTRUMENT = 10 ** 9
+    ce.MAX_DAILY_RISK_INR = float("inf")
+    executor = ce.ControlledExecutor()
+    executor.reporter.start()
+    signals = sample_signals(count, symbols)
+    print(f"=== Executor Benchmark: {count} signals over {symbols} instruments, kernel {KERNEL_LATENCY * 1000:.0f}ms, "
+          f"alert {ALERT_LATENCY * 1000:.0f}ms ===\n")
+
+    async def inline():
+        for signal in signals:
+            process_inline(executor, signal)
+
+    await run_case("inline (blocking loop)", inline, count)
+    await run_case("off-loop, kernel serialized", lambda: executor.process_batch(signals, BenchFeed()), count)
+    executor._kernel_slots = asyncio.Semaphore(ce.MAX_CONCURRENT_SIGNALS)
+    await run_case(f"off-loop, kernel x{ce.MAX_CONCURRENT_SIGNALS}", lambda: executor.process_batch(signals, BenchFeed()), count)
+    print(f"\ncalls: {executor.calls.stats()}")
+    await executor.calls.close()
+    await executor.reporter.close(timeout=1)
+    print(f"outcomes: {executor.reporter.stats}")
+    executor.panic.stop()
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    workdir = tempfile.mkdtemp(prefix="aegis-exec-bench-")
+    os.environ["AEGIS_CORE_PATH"] = workdir
+    os.environ["AEGIS_TELEGRAM_DIR"] = workdir
+    install_stand_ins()
+    try:
+        asyncio.run(run_benchmark(count))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,118 @@
+import sys
+import time
+import math
+import random
+import asyncio
+import logging
+import statistics
+
+from fanout import AccountBook, FanOutEngine
+
+BROKERS = ("kite", "angel", "fyers")
+RATES = {"kite": 200, "angel": 250, "fyers": 150} # Orders/sec the mock brokers allow
+ORDER_LATENCY = 0.04 # Mean broker round-trip (seconds), lognormal
+REJECT_RATE = 0.01
+
+class MockBroker:
+    """Async order endpoint: lognormal latency, a few rejections, and a log of send times."""
+    def __init__(self, name, seed):
+        self.name = name
+        self.rng = random.Random(seed)
+        self.sent = []
+
+    async def place_order(self, user_id, **order):
+        self.sent.append(time.monotonic())
+        await asyncio.sleep(self.rng.lognormvariate(math.log(ORDER_LATENCY), 0.4))
+        if self.rng.random() < REJECT_RATE:
+            return {"status": "REJECTED", "reason": "RMS: margin exceeds"}
+        return {"status": "SUCCESS", "order_id": f"{self.name}-{len(self.sent)}"}
+
+class BlockingMockBroker(MockBroker):
+    """The same broker behind a blocking SDK call."""
+    def place_order(self, user_id, **order):
+        self.sent.append(time.monotonic())
+        time.sleep(self.rng.lognormvariate(math.log(ORDER_LATENCY), 0.4))
+        return {"status": "SUCCESS", "order_id": f"{self.name}-{len(self.sent)}"}
+
+def sample_accounts(count, seed=11):
+    rng = random.Random(seed)
+    return [{
+        "user_id": f"user_{i:05d}",
+        "broker": BROKERS[i % len(BROKERS)],
+        "max_risk_per_trade": rng.choice([250, 500, 1000, 2500, 5000]),
+        "max_capital": rng.choice([10000, 25000, 50000, 100000]),
+        "max_lots": rng.choice([1, 2, 5]),
+        "max_trades_per_day": rng.choice([1, 3]),
+        "auto_trading_enabled": rng.random() > 0.05,
+    } for i in range(count)]
+
+def size_loop(accounts, entry, sl, lot_size):
+    """Per-account Python arithmetic, the shape AccountBook.size() replaces."""
+    risk_per_lot = abs(entry - sl) * lot_size
+    out = []
+    for a in accounts:
+        lots = min(a["max_risk_per_trade"] // risk_per_lot, a["max_capital"] // (entry * lot_size), a["max_lots"])
+        out.append(int(lots) if a["auto_trading_enabled"] else 0)
+    return out
+
+def max_per_second(times):
+    """Most sends that fell in any 1-second window."""
+    best, start = 0, 0
+    for end in range(len(times)):
+        while times[end] - times[start] >= 1.0:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+def summarize(name, report, brokers):
+    latencies = sorted(r["latency_ms"] for r in report["results"] if "latency_ms" in r)
+    print(f"{name}: wall clock {report['wall_clock_ms']:8.1f}ms | sizing {report['sizing_ms']:.3f}ms | "
+          f"{report['statuses']} | skipped {report['skipped']}")
+    if latencies:
+        print(f"{'':>10}order latency p50 {statistics.median(latencies):.1f}ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f}ms")
+    ok = True
+    for broker in brokers.values():
+        peak = max_per_second(sorted(broker.sent))
+        within = peak <= RATES[broker.name]
+        ok &= within
+        print(f"{'':>10}{broker.name:<6} {len(broker.sent):4d} orders, peak {peak}/s (limit {RATES[broker.name]}/s)"
+              f"{'' if within else '  <-- OVER LIMIT'}")
+    return ok
+
+async def run_case(name, accounts, broker_cls, entry=150.0, sl=145.0, lot_size=75):
+    brokers = {b: broker_cls(b, seed) for seed, b in enumerate(BROKERS)}
+    engine = FanOutEngine(AccountBook(accounts), {b: m.place_order for b, m in brokers.items()},
+                          rates=RATES, concurrency=64)
+    report = await engine.execute("SIG-BENCH", "NIFTY 22000 CE", "BUY", entry, sl, lot_size)
+    await engine.close()
+    ok = summarize(name, report, brokers)
+    placed = sum(r["status"] == "PLACED" for r in report["results"])
+    return ok and placed > 0
+
+async def run_benchmark(count=1000):
+    accounts = sample_accounts(count)
+    book = AccountBook(accounts)
+    print(f"=== Fan-out Benchmark: {count} accounts over {len(BROKERS)} mock brokers, "
+          f"~{ORDER_LATENCY * 1000:.0f}ms orders, limits {RATES} ===\n")
+
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        size_loop(accounts, 150.0, 145.0, 75)
+    loop_ms = (time.perf_counter() - start) / rounds * 1000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        book.size(150.0, 145.0, 75)
+    vector_ms = (time.perf_counter() - start) / rounds * 1000
+    print(f"sizing: python loop {loop_ms:.3f}ms | vectorized {vector_ms:.3f}ms ({loop_ms / vector_ms:.1f}x)")
+    print(f"sequential orders would take ~{count * ORDER_LATENCY:.0f}s\n")
+
+    ok = await run_case("async   ", accounts, MockBroker)
+    ok &= await run_case("blocking", accounts, BlockingMockBroker)
+    return ok
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sys.exit(0 if asyncio.run(run_benchmark(count)) else 1)
@@ -0,0 +1,90 @@
+import sys
+import time
+import random
+import logging
+
+from parser import parse_signal, parse_strict, configure_parse_cache
+from formats import FormatRegistry
+from bench_parser import load_corpus, _comparable
+
+# What the channels post between signals
+CHATTER = [
+    "Good morning traders, market opens in 15 minutes",
+    "Join our premium group for more calls 👉 t.me/joinchat/xyz",
+    "Nifty looking strong today, wait for the dip",
+    "Book profits, trail your stoploss",
+    "SL hit, next trade soon",
+    "Target 1 done 🎯🎯 congrats everyone",
+    "Market closed for today. See you tomorrow",
+    "Nice price action on BANKNIFTY, stay patient",
+    "What a move!!! 🚀🚀🚀",
+    "Holiday tomorrow, no trades",
+    "Avoid trading before the RBI policy announcement",
+    "Once again a perfect call 💯",
+    "Expiry day: be careful with premium decay",
+    "Recharge your account before 9:15",
+    "Thank you for the feedback 🙏",
+]
+STRICT = [
+    "RELIANCE buy 2500 sl 2450 tgt 2550/2600",
+    "TCS sell 3900 sl 3950 tgt 3850/3800",
+    "HDFCBANK buy 1650 sl 1620 tgt 1680",
+    "INFY BUY 1500 SL 1470 TGT 1530/1560/1600",
+]
+CHATTER_SHARE = 0.7 # Most channel traffic is not a signal
+
+def sample_messages(count, seed=5):
+    rng = random.Random(seed)
+    signals = load_corpus() + STRICT
+    return [rng.choice(CHATTER) if rng.random() < CHATTER_SHARE else rng.choice(signals) for _ in range(count)]
+
+def run_all(text):
+    """Every message through every parser: the first PARSED result, else the first rejection."""
+    rejection = None
+    for parse in (parse_signal, parse_strict):
+        result = parse(text)
+        if result and result.get("status") != "REJECTED":
+            return result
+        rejection = rejection or result
+    return rejection
+
+def measure(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for msg in messages:
+            fn(msg)
+    return len(messages) * rounds / (time.perf_counter() - start)
+
+def run_benchmark(count=2000, rounds=20):
+    configure_parse_cache(0) # Parser cost, not cache hits
+    messages = sample_messages(count)
+    registry = FormatRegistry()
+    registry.register("heuristic", parse_signal, keywords=[("ce", "pe")])
+    registry.register("strict", parse_strict, keywords=[("buy", "sell"), "sl", "tgt"])
+    print(f"=== Format Registry Benchmark: {count} msgs, {CHATTER_SHARE:.0%} chatter, "
+          f"formats {list(registry.formats)} ===\n")
+
+    mismatches = 0
+    for msg in dict.fromkeys(messages):
+        if _comparable(run_all(msg)) != _comparable(registry.parse(msg)):
+            mismatches += 1
+            print(f"❌ MISMATCH: {msg[:60]!r}")
+    print(f"Parity with running every parser: {len(set(messages)) - mismatches}/{len(set(messages))} identical\n")
+
+    all_rate = measure(run_all, messages, rounds)
+    heuristic_rate = measure(parse_signal, messages, rounds)
+    registry_rate = measure(registry.parse, messages, rounds)
+    print(f"every parser  : {all_rate:>10,.0f} msgs/sec")
+    print(f"heuristic only: {heuristic_rate:>10,.0f} msgs/sec (previous live path, one format)")
+    print(f"registry      : {registry_rate:>10,.0f} msgs/sec ({registry_rate / all_rate:.2f}x every parser)\n")
+
+    s = registry.stats()
+    print(f"prefilter: {s['chatter']}/{s['messages']} dropped as chatter, {s['prefilter_us']:.2f}us per message")
+    for name, f in s["formats"].items():
+        print(f"{name:<10} {f['calls']:7d} calls ({f['calls'] / s['messages']:.1%} of msgs) | "
+              f"hit rate {f['hit_rate']:.1%} | rejected {f['rejected']} | {f['us_per_call']:.2f}us per call")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    sys.exit(0 if run_benchmark() else 1)
@@ -0,0 +1,89 @@
+import sys
+import time
+import asyncio
+import statistics
+import requests
+from forwarder import SignalForwarder, SignalBatcher
+from stub_backend import StubBackend, BOT_SECRET
+
+TICK = 0.005 # Loop-lag probe interval
+
+def sample_payload(i):
+    return {
+        "id": f"TLG-{i}",
+        "instrument": "NFO",
+        "symbol": "NIFTY 22000 CE",
+        "side": "BUY",
+        "entry_price": 150.0,
+        "stop_loss": 130.0,
+        "targets": [170.0, 190.0],
+        "confidence": 90,
+        "source": "TELEGRAM_EXTERNAL",
+        "metadata": {"original_text": "NIFTY 22000 CE buy 150 sl 130 tgt 170/190"}
+    }
+
+async def probe_loop_lag(lags, stop):
+    # Any time a tick fires late, the loop was blocked by someone else
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+async def send_one_by_one(send, payloads):
+    # How replays used to forward: await each signal before the next
+    results = []
+    for payload in payloads:
+        try:
+            results.append(await send(payload))
+        except Exception as e:
+            results.append(e)
+    return results
+
+async def run_case(send, count, sequential=False):
+    lags, stop = [], asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+    await asyncio.sleep(TICK * 2)
+
+    payloads = [sample_payload(i) for i in range(count)]
+    start = time.perf_counter()
+    if sequential:
+        results = await send_one_by_one(send, payloads)
+    else:
+        results = await asyncio.gather(*(send(p) for p in payloads), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    ok = sum(1 for r in results if not isinstance(r, Exception) and r.status_code == 200)
+    return elapsed, ok, lags
+
+def report(name, count, elapsed, ok, lags):
+    lags_ms = sorted(l * 1000 for l in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(f"{name:<22} {ok}/{count} ok | {count / elapsed:>8.1f} signals/sec | "
+          f"loop lag p50 {statistics.median(lags_ms):7.2f}ms  p99 {p99:7.2f}ms  max {lags_ms[-1]:7.2f}ms")
+
+async def run_benchmark(count=200, latency=0.02, port=4199):
+    url = StubBackend(latency).start_in_thread(port=port) + "/api/v1/signals/ingest"
+    headers = {"x-api-key": BOT_SECRET, "x-source": "TELEGRAM", "Content-Type": "application/json"}
+    print(f"=== Forwarding Benchmark: {count} signals, stub latency {latency * 1000:.0f}ms ===\n")
+
+    async def blocking_send(payload):
+        # The previous forward_signal: requests.post straight inside the coroutine
+        return requests.post(url, json=payload, headers=headers, timeout=10)
+
+    report("requests.post (old)", count, *await run_case(blocking_send, count))
+
+    forwarder = SignalForwarder(url, BOT_SECRET, timeout=10, max_concurrency=16)
+    batcher = SignalBatcher(forwarder, url + "/bulk", max_batch=50, max_delay=0.05)
+    try:
+        report("SignalForwarder", count, *await run_case(forwarder.send, count))
+        report("sequential replay", count, *await run_case(forwarder.send, count, sequential=True))
+        report("SignalBatcher (bulk)", count, *await run_case(batcher.submit, count))
+    finally:
+        await forwarder.close()
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    asyncio.run(run_benchmark(count, latency))
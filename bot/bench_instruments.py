@@ -0,0 +1,144 @@
+import os
+import sys
+import csv
+import time
+import random
+import shutil
+import logging
+import tempfile
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from instruments import InstrumentIndex, build_index
+
+# (name, exchange, lot size, first strike, last strike, step) - index options
+INDICES = [
+    ("NIFTY", "NFO", 75, 18000, 30000, 50),
+    ("BANKNIFTY", "NFO", 30, 40000, 65000, 100),
+    ("FINNIFTY", "NFO", 65, 18000, 30000, 50),
+    ("MIDCPNIFTY", "NFO", 120, 8000, 16000, 25),
+    ("SENSEX", "BFO", 20, 65000, 95000, 100),
+]
+STOCKS = 180 # Stock option underlyings, ~40 strikes each
+EXPIRIES = 8 # Weekly expiries per underlying, nearest first
+
+def write_dump(path, today):
+    """Synthetic Kite instrument dump with the real column layout."""
+    columns = ["instrument_token", "exchange_token", "tradingsymbol", "name", "last_price", "expiry",
+               "strike", "tick_size", "lot_size", "instrument_type", "segment", "exchange"]
+    underlyings = list(INDICES) + [(f"STOCK{i:03d}", "NFO", 250 + 25 * (i % 20), 100 + 10 * i, 100 + 10 * i + 390, 10)
+                                   for i in range(STOCKS)]
+    rows = 0
+    token = 10000000
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(columns)
+        for name, exchange, lot, first, last, step in underlyings:
+            for week in range(-1, EXPIRIES): # One expired week, which must be ignored
+                expiry = today + timedelta(days=3 + 7 * week)
+                code = expiry.strftime("%y%b").upper()
+                token += 1
+                out.writerow([token, token >> 8, f"{name}{code}FUT", name, 0, expiry.isoformat(), 0, 0.05, lot,
+                              "FUT", f"{exchange}-FUT", exchange])
+                for strike in range(first, last + 1, step):
+                    for kind in ("CE", "PE"):
+                        token += 1
+                        out.writerow([token, token >> 8, f"{name}{code}{strike}{kind}", name, 0, expiry.isoformat(),
+                                      strike, 0.05, lot, kind, f"{exchange}-OPT", exchange])
+                        rows += 1
+    return rows
+
+def load_csv(path, today):
+    """The no-index alternative: every process parses the dump into a dict."""
+    best = {}
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["instrument_type"] in ("CE", "PE") and row["expiry"] >= today:
+                key = (row["name"], int(float(row["strike"])), row["instrument_type"])
+                if key not in best or row["expiry"] < best[key]["expiry"]:
+                    best[key] = row
+    return best
+
+def sample_symbols(count, seed=7):
+    rng = random.Random(seed)
+    symbols = []
+    for _ in range(count):
+        name, _exchange, _lot, first, last, step = rng.choice(INDICES)
+        strike = rng.randrange(first, last + 1, step)
+        symbols.append(f"{name} {strike} {rng.choice(('CE', 'PE'))}")
+    return symbols
+
+def time_per_call(fn, args, rounds=3):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for a in args:
+            fn(a)
+        best = min(best, (time.perf_counter() - start) / len(args))
+    return best
+
+def open_and_resolve(index_path, symbols):
+    start = time.perf_counter()
+    index = InstrumentIndex(index_path)
+    opened = time.perf_counter() - start
+    resolved = sum(index.resolve(s) is not None for s in symbols)
+    return opened, resolved
+
+def run_benchmark(workdir, lookups=100000, processes=4):
+    today = date.today()
+    dump = os.path.join(workdir, "instruments.csv")
+    index_path = os.path.join(workdir, "instruments.idx")
+    rows = write_dump(dump, today)
+    print(f"=== Instrument Index Benchmark: {rows} option rows, {os.path.getsize(dump) / 1e6:.1f}MB dump ===\n")
+
+    start = time.perf_counter()
+    table = load_csv(dump, today.isoformat())
+    csv_load = time.perf_counter() - start
+    start = time.perf_counter()
+    entries = build_index(dump, index_path)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    index = InstrumentIndex(index_path)
+    open_time = time.perf_counter() - start
+    print(f"parse CSV into a dict (per process): {csv_load * 1000:8.1f}ms")
+    print(f"build index (once a day):            {build * 1000:8.1f}ms  ({entries} entries, "
+          f"{os.path.getsize(index_path) / 1e6:.1f}MB)")
+    print(f"map index (per process):             {open_time * 1000:8.3f}ms\n")
+
+    symbols = sample_symbols(lookups)
+    distinct = list(dict.fromkeys(symbols))
+    mismatches = 0
+    for symbol in distinct:
+        name, strike, kind = symbol.split()
+        found, expected = index.resolve(symbol), table.get((name, int(strike), kind))
+        if (found and found.tradingsymbol) != (expected and expected["tradingsymbol"]):
+            mismatches += 1
+
+    cold = []
+    for symbol in distinct:
+        name, strike, kind = symbol.split()
+        index._cache.clear()
+        start = time.perf_counter()
+        index.option(name, strike, kind)
+        cold.append(time.perf_counter() - start)
+    warm = time_per_call(index.resolve, symbols)
+    print(f"mmap probe (first lookup of a key):  {sorted(cold)[len(cold) // 2] * 1e9:8.0f}ns p50")
+    print(f"resolve() memoized:                  {warm * 1e9:8.0f}ns")
+    print(f"underlying('NIFTY') lot size:        {index.underlying('NIFTY').lot_size}")
+    print(f"mismatches vs CSV dict:              {mismatches} of {len(distinct)}\n")
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(open_and_resolve, [index_path] * processes, [distinct] * processes))
+    for i, (opened, resolved) in enumerate(results):
+        print(f"process {i}: mapped in {opened * 1000:.3f}ms, resolved {resolved}/{len(distinct)}")
+
+    return mismatches == 0 and all(resolved == len(distinct) for _, resolved in results)
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="aegis-instruments-bench-")
+    try:
+        ok = run_benchmark(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
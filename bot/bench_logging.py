@@ -0,0 +1,132 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import logging
+import tempfile
+import statistics
+
+from async_log import AsyncLogging
+
+SIGNALS = 2000 # Signals logged per case, INGESTION REPORT style (7 lines each)
+SLOW_FLUSH = 0.0005 # Seconds per flush on the "slow disk"
+ROTATE_BYTES = 256 * 1024 # Small, so the run rotates several times
+PACED_SIGNALS = 400 # Signals in the paced run...
+PACED_RATE = 200 # ...at this many signals/sec, a busy session
+
+class SlowFile:
+    """File object whose flush() takes SLOW_FLUSH: a congested disk or network volume."""
+    def __init__(self, f, delay):
+        self._f = f
+        self._delay = delay
+
+    def flush(self):
+        self._f.flush()
+        time.sleep(self._delay)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+def slow_down(handler, delay):
+    if delay:
+        opener = handler._open
+        handler._open = lambda: SlowFile(opener(), delay)
+        handler.stream = SlowFile(handler.stream, delay)
+
+def log_signals(logger, count, rate=None):
+    """What forward_signal() logs per signal; returns the caller-side cost of each call (seconds)."""
+    costs = []
+    began = time.perf_counter()
+    for i in range(count):
+        if rate:
+            time.sleep(max(0.0, began + i / rate - time.perf_counter()))
+        lines = [
+            "--- INGESTION REPORT ---",
+            f"RAW: SENSEX 83400 CE Buy it (285-295) Target 310 320 330 350 Stoploss 220 #{i}...",
+            "PARSED: SENSEX 83400 CE BUY @ 290.0",
+            "CONFIDENCE: 90%",
+            "DECISION: ACCEPTED",
+            f"TRACE: {i:016x}",
+            "------------------------",
+        ]
+        for line in lines:
+            start = time.perf_counter()
+            logger.info(line)
+            costs.append(time.perf_counter() - start)
+    return costs
+
+def summarize(name, costs, wall, extra=""):
+    costs.sort()
+    print(f"{name:<22} p50 {statistics.median(costs) * 1e6:8.1f}us  p99 {costs[int(len(costs) * 0.99)] * 1e6:8.1f}us  "
+          f"max {costs[-1] * 1e3:7.2f}ms | {len(costs) / wall:9,.0f} lines/s on the caller{extra}")
+
+def run_sync(workdir, delay, rate=None):
+    logger = logging.getLogger(f"bench.sync.{delay}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(os.path.join(workdir, f"sync-{delay}.log"))
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    slow_down(handler, delay)
+    logger.addHandler(handler)
+    start = time.perf_counter()
+    costs = log_signals(logger, PACED_SIGNALS if rate else SIGNALS, rate)
+    wall = time.perf_counter() - start
+    handler.close()
+    summarize(f"sync FileHandler", costs, wall)
+
+def run_async(workdir, delay, queue_size, rate=None):
+    path = os.path.join(workdir, f"async-{delay}-{queue_size}-{rate}.jsonl")
+    logger = logging.getLogger(f"bench.async.{delay}.{queue_size}.{rate}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    pipe = AsyncLogging(path, "%(message)s", static={"app": "bench"}, max_bytes=ROTATE_BYTES, backups=1000,
+                        queue_size=queue_size, console=False)
+    slow_down(pipe.writer.handlers[0], delay)
+    logger.addHandler(pipe.handler)
+    pipe.writer.start()
+    start = time.perf_counter()
+    costs = log_signals(logger, PACED_SIGNALS if rate else SIGNALS, rate)
+    wall = time.perf_counter() - start
+    drain_start = time.perf_counter()
+    pipe.stop()
+    drain = time.perf_counter() - drain_start
+
+    written, notices = 0, 0
+    for name in glob.glob(path + "*"):
+        with open(name, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line) # Every line must be valid JSON
+                if record["msg"].startswith("LOG: "):
+                    notices += 1
+                else:
+                    written += 1
+    dropped = pipe.stats()["dropped"]
+    summarize(f"async (queue {queue_size})", costs, wall,
+              f" | drained in {drain * 1000:.0f}ms, {len(glob.glob(path + '*'))} files, {dropped} dropped")
+    # Paced logging must lose nothing; a flood may drop, but only what it counted
+    return written + dropped == len(costs) and not (rate and dropped)
+
+def run_benchmark(workdir):
+    print(f"=== Logging Overhead Benchmark: INGESTION REPORT lines (7 per signal) ===")
+    ok = True
+    for label, delay in (("local disk", 0), (f"slow disk ({SLOW_FLUSH * 1000:.1f}ms per flush)", SLOW_FLUSH)):
+        print(f"\n--- {label}, flood of {SIGNALS} signals ---")
+        run_sync(workdir, delay)
+        ok &= run_async(workdir, delay, 10000)
+        ok &= run_async(workdir, delay, 1000)
+    print(f"\n--- slow disk, {PACED_SIGNALS} signals at {PACED_RATE}/s ---")
+    run_sync(workdir, SLOW_FLUSH, PACED_RATE)
+    ok &= run_async(workdir, SLOW_FLUSH, 1000, PACED_RATE)
+    print("\nEvery record written (valid JSON, across rotations) or counted as dropped, none dropped when paced: "
+          + ("yes" if ok else "NO"))
+    return ok
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="aegis-logging-bench-")
+    try:
+        ok = run_benchmark(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
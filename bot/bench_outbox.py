@@ -0,0 +1,77 @@
+import sys
+import time
+import shutil
+import tempfile
+from outbox import Outbox
+from bench_forwarder import sample_payload
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+def run_benchmark(count=50000):
+    directory = tempfile.mkdtemp(prefix="aegis-outbox-")
+    print(f"=== Outbox Benchmark: {count} signals in {directory} ===\n")
+    try:
+        outbox = Outbox(directory, segment_bytes=4 * 1024 * 1024)
+        payloads = [sample_payload(i) for i in range(count)]
+
+        put_us, ack_us = [], []
+        for payload in payloads:
+            start = time.perf_counter()
+            outbox.put(payload)
+            put_us.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        outbox.sync()
+        sync_ms = (time.perf_counter() - start) * 1000
+
+        # Leave every 10th signal unacked, as if the backend was down for it
+        for i, payload in enumerate(payloads):
+            if i % 10:
+                start = time.perf_counter()
+                outbox.ack(payload["id"])
+                ack_us.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        outbox.compact()
+        compact_ms = (time.perf_counter() - start) * 1000
+        outbox.close()
+
+        start = time.perf_counter()
+        recovered = Outbox(directory)
+        recover_ms = (time.perf_counter() - start) * 1000
+        expected = len(payloads[::10])
+
+        for name, values in (("put", sorted(put_us)), ("ack", sorted(ack_us))):
+            print(f"{name:<4} p50 {percentile(values, 0.5):6.1f}us  p99 {percentile(values, 0.99):6.1f}us  "
+                  f"max {values[-1]:8.1f}us  ({len(values)} ops)")
+        print(f"sync {sync_ms:.2f}ms, compact {compact_ms:.2f}ms (off the hot path, in drain passes)")
+        print(f"restart recovered {len(recovered)}/{expected} unacked in {recover_ms:.1f}ms")
+        recovered.close()
+        return len(recovered) == expected and torn_write_survives()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def torn_write_survives():
+    """A crash mid-put leaves half a record; a put after the restart must still be recovered."""
+    directory = tempfile.mkdtemp(prefix="aegis-outbox-torn-")
+    try:
+        outbox = Outbox(directory)
+        outbox.put(sample_payload(0))
+        outbox.close()
+        path = outbox._path(outbox._seq)
+        with open(path, "ab") as f:
+            f.write(b'{"op":"put","id":"torn","payl') # Crash mid-write
+        outbox = Outbox(directory)
+        outbox.put(sample_payload(2))
+        outbox.close()
+        recovered = Outbox(directory)
+        ids = [p["id"] for p in recovered.pending()]
+        recovered.close()
+        expected = [sample_payload(0)["id"], sample_payload(2)["id"]]
+        print(f"restart after a torn write: recovered {ids} ({'ok' if ids == expected else 'expected ' + str(expected)})")
+        return ids == expected
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    sys.exit(0 if run_benchmark(count) else 1)
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from panic_watch import PanicWatcher, PanicHalt
+
+class FakeKernel:
+    def __init__(self):
+        self.halted_at = None
+        self.halted = threading.Event()
+
+    def halt(self):
+        self.halted_at = time.perf_counter()
+        self.halted.set()
+
+def measure(rounds, use_inotify):
+    """Time from creating PANIC to kernel.halt(), plus an order attempt after the halt."""
+    latencies, refused = [], 0
+    for _ in range(rounds):
+        directory = tempfile.mkdtemp(prefix="aegis-panic-")
+        try:
+            kernel = FakeKernel()
+            watcher = PanicWatcher(os.path.join(directory, "PANIC"), kernel.halt, use_inotify=use_inotify).start()
+            place_order = watcher.guard(lambda **kw: {"status": "SUCCESS"})
+            time.sleep(0.01)
+
+            created = time.perf_counter()
+            open(watcher.path, "w").close()
+            if not kernel.halted.wait(5):
+                raise RuntimeError(f"{watcher.mode}: no halt within 5s")
+            latencies.append((kernel.halted_at - created) * 1000)
+            try:
+                place_order(symbol="NIFTY 22000 CE")
+            except PanicHalt:
+                refused += 1
+            mode = watcher.mode
+            watcher.stop()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return mode, sorted(latencies), refused
+
+def run_benchmark(rounds=50):
+    print(f"=== PANIC Kill-Switch: file creation -> kernel.halt(), {rounds} rounds ===\n")
+    print("old check_panic: up to 5000ms (once per poll iteration)")
+    ok = True
+    for use_inotify in (True, False):
+        mode, values, refused = measure(rounds, use_inotify)
+        p50 = values[len(values) // 2]
+        print(f"{mode:<8} p50 {p50:7.3f}ms  max {values[-1]:7.3f}ms  orders refused after halt {refused}/{rounds}")
+        ok = ok and refused == rounds
+    return ok
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    logging.disable(logging.CRITICAL) # One "PANIC DETECTED" per round is noise here
+    sys.exit(0 if run_benchmark(rounds) else 1)
@@ -0,0 +1,146 @@
+import os
+import re
+import sys
+import json
+import time
+from datetime import datetime
+import parser
+from parser import parse_signal, configure_parse_cache
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "signals.jsonl")
+
+def legacy_parse_signal(text: str):
+    """
+    Reference copy of the original multi-pass parser, kept for parity and speed comparison.
+    """
+    if not text:
+        return None
+    text_clean = re.sub(r'[^\w\s\.\-\/\@\(\)]', ' ', text)
+    symbol_match = re.search(r'(NIFTY|BANKNIFTY|SENSEX|FINNIFTY|MIDCPNIFTY)\s*(\d*)\s*(CE|PE)', text_clean, re.IGNORECASE)
+    if not symbol_match:
+        symbol_match = re.search(r'(\d{5})\s*(CE|PE)', text_clean, re.IGNORECASE)
+    if not symbol_match:
+        return None
+    symbol = symbol_match.group(0).strip().upper()
+    side = "BUY"
+    if re.search(r'sell|put', text_clean, re.IGNORECASE):
+        side = "SELL"
+    elif re.search(r'buy|call', text_clean, re.IGNORECASE):
+        side = "BUY"
+    entry = None
+    range_match = re.search(r'\((\d+)\s*\-\s*(\d+)\)', text_clean)
+    if range_match:
+        entry = (float(range_match.group(1)) + float(range_match.group(2))) / 2
+    else:
+        entry_match = re.search(r'(?:buy|at|\@|upto|price|entry)\s*(\d+(?:\.\d+)?)', text_clean, re.IGNORECASE)
+        if entry_match:
+            entry = float(entry_match.group(1))
+        else:
+            numbers = re.findall(r'(\d+(?:\.\d+)?)', text_clean[symbol_match.end():])
+            if numbers:
+                entry = float(numbers[0])
+    if not entry:
+        return None
+    targets = []
+    target_section = re.split(r'target|tgt', text_clean, flags=re.IGNORECASE)
+    if len(target_section) > 1:
+        target_text = re.split(r'stop|sl|sl hit', target_section[1], flags=re.IGNORECASE)[0]
+        targets = [float(t) for t in re.findall(r'(\d+(?:\.\d+)?)', target_text)]
+    if side == "BUY":
+        targets = [t for t in targets if t > entry]
+    else:
+        targets = [t for t in targets if t < entry]
+    sl = None
+    sl_match = re.search(r'(?:sl|stoploss|stop|loss)\s*(\d+(?:\.\d+)?)', text_clean, re.IGNORECASE)
+    if sl_match:
+        sl = float(sl_match.group(1))
+    if not targets:
+        return {"status": "REJECTED", "reason": "No valid targets found"}
+    if sl is None:
+        return {"status": "REJECTED", "reason": "No stoploss found"}
+    if side == "BUY":
+        if sl >= entry:
+            return {"status": "REJECTED", "reason": f"SL ({sl}) >= Entry ({entry}) for BUY"}
+        if entry >= targets[0]:
+            return {"status": "REJECTED", "reason": f"Entry ({entry}) >= T1 ({targets[0]}) for BUY"}
+    else:
+        if sl <= entry:
+            return {"status": "REJECTED", "reason": f"SL ({sl}) <= Entry ({entry}) for SELL"}
+        if entry <= targets[0]:
+            return {"status": "REJECTED", "reason": f"Entry ({entry}) <= T1 ({targets[0]}) for SELL"}
+    return {
+        "instrument": "NFO",
+        "symbol": symbol,
+        "side": side,
+        "entry_price": entry,
+        "stop_loss": sl,
+        "targets": targets,
+        "confidence": 90,
+        "timestamp_ist": datetime.now().isoformat(),
+        "status": "PARSED"
+    }
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+def _comparable(result):
+    # timestamp_ist is wall-clock and the contract comes from the instrument index
+    # (when one is built); everything else must match exactly
+    if result is None:
+        return None
+    return {k: v for k, v in result.items() if k not in ("timestamp_ist", "contract", "instrument")}
+
+def check_parity(messages):
+    mismatches = 0
+    for msg in messages:
+        old, new = _comparable(legacy_parse_signal(msg)), _comparable(parse_signal(msg))
+        if old != new:
+            mismatches += 1
+            print(f"❌ MISMATCH: {msg[:60]!r}\n   legacy: {old}\n   engine: {new}")
+    return mismatches
+
+def measure(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for msg in messages:
+            fn(msg)
+    elapsed = time.perf_counter() - start
+    return (len(messages) * rounds) / elapsed
+
+def run_benchmark(rounds=500):
+    messages = load_corpus()
+    print(f"=== Aegis Parser Microbenchmark ({len(messages)} msgs x {rounds} rounds) ===\n")
+
+    mismatches = check_parity(messages)
+    print(f"Parity: {len(messages) - mismatches}/{len(messages)} identical results\n")
+
+    # Cached results must equal fresh parses, including for reposts that differ only in case/emoji
+    variants = [m for msg in messages for m in (msg, msg.upper(), f"🔥 {msg} ✅")]
+    configure_parse_cache(0)
+    fresh = [_comparable(parse_signal(m)) for m in variants]
+    warm = configure_parse_cache()
+    for m in variants:
+        parse_signal(m)
+    cache_mismatches = 0
+    for m, expected in zip(variants, fresh):
+        if _comparable(parse_signal(m)) != expected:
+            cache_mismatches += 1
+            print(f"❌ CACHE MISMATCH: {m[:60]!r}")
+    print(f"Cache parity: {len(variants) - cache_mismatches}/{len(variants)} identical results "
+          f"({warm.format()})\n")
+
+    legacy_rate = measure(legacy_parse_signal, messages, rounds)
+    configure_parse_cache(0)
+    engine_rate = measure(parse_signal, messages, rounds)
+    configure_parse_cache()
+    cached_rate = measure(parse_signal, messages, rounds)
+    print(f"legacy : {legacy_rate:>12,.0f} msgs/sec")
+    print(f"engine : {engine_rate:>12,.0f} msgs/sec (no cache)")
+    print(f"cached : {cached_rate:>12,.0f} msgs/sec (reposts, {parser.parse_cache.format()})")
+    print(f"speedup: {engine_rate / legacy_rate:.2f}x, {cached_rate / legacy_rate:.2f}x cached")
+    return mismatches + cache_mismatches
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    sys.exit(1 if run_benchmark(rounds) else 0)
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+from datetime import datetime
+import numpy as np
+
+from training_store import TrainingDataset, IST, source_files
+from outcome_resolver import PriceFiles, resolve_pending, session_close, SIGNAL_COLUMNS
+
+SIGNALS = 100000 # PENDING signals to settle, all on one trading day
+SYMBOLS = [f"{index} {strike} {kind}" for index, base in (("NIFTY", 24000), ("BANKNIFTY", 51000), ("SENSEX", 83000))
+           for strike in range(base - 500, base + 501, 100) for kind in ("CE", "PE")]
+TICK_EVERY = 1.0 # Seconds between ticks: a full session is 22,500 ticks per symbol
+REFERENCE_SAMPLE = 2000 # Signals re-checked one by one with a plain Python loop
+EXECUTED_SHARE = 0.3 # Signals the executor already acted on: an EXECUTED_PAPER update, still to be settled
+DAY = datetime(2026, 9, 15, tzinfo=IST)
+
+def write_prices(rng, directory):
+    """A random-walk tick file per symbol for the whole session."""
+    os.makedirs(os.path.join(directory, DAY.strftime("%Y-%m-%d")))
+    open_ts = DAY.replace(hour=9, minute=15).timestamp()
+    ts = open_ts + np.arange(0, 6.25 * 3600, TICK_EVERY)
+    for symbol in SYMBOLS:
+        price = rng.uniform(80, 400) * np.exp(np.cumsum(rng.normal(0, 0.0015, len(ts))))
+        path = os.path.join(directory, DAY.strftime("%Y-%m-%d"), f"{symbol.replace(' ', '_')}.csv")
+        np.savetxt(path, np.column_stack([ts, price]), delimiter=",", fmt=["%.3f", "%.2f"], header="ts,price",
+                   comments="")
+    return len(ts)
+
+def make_signals(rng, prices):
+    """Signals at random times during the session, priced off the tick at that moment."""
+    symbol = np.array(SYMBOLS)[rng.integers(0, len(SYMBOLS), SIGNALS)]
+    created = DAY.replace(hour=9, minute=15).timestamp() + rng.uniform(0, 6.25 * 3600, SIGNALS)
+    side = np.where(rng.random(SIGNALS) < 0.85, "BUY", "SELL")
+    entry = np.empty(SIGNALS)
+    for name in SYMBOLS:
+        series = prices.get(DAY.strftime("%Y-%m-%d"), name)
+        rows = np.flatnonzero(symbol == name)
+        entry[rows] = series.high.levels[0][np.minimum(np.searchsorted(series.ts, created[rows]), len(series) - 1)]
+    direction = np.where(side == "BUY", 1.0, -1.0)
+    step = entry * rng.uniform(0.01, 0.05, SIGNALS)
+    n_targets = rng.integers(1, 4, SIGNALS)
+    targets = [np.where(n_targets > k, entry + direction * step * (k + 1), np.nan) for k in range(3)]
+    return {
+        "signal_id": np.array([f"SIG-{i:07d}" for i in range(SIGNALS)]),
+        "created_at": created, "symbol": symbol, "side": side,
+        "validation_result": np.where(rng.random(SIGNALS) < 0.7, "ACCEPTED", "REJECTED"),
+        "outcome_status": np.full(SIGNALS, "PENDING"),
+        "entry_price": entry, "stop_loss": entry - direction * step * rng.uniform(0.8, 2.0, SIGNALS),
+        "t1": targets[0], "t2": targets[1], "t3": targets[2], "n_targets": n_targets,
+    }
+
+def reference(signal, series, horizon):
+    """One signal, one tick at a time: what the resolver must agree with."""
+    buy = signal["side"] == "BUY"
+    high, low = series.high.levels[0], -series.low.levels[0]
+    reached = lambda i, level: level == level and (high[i] >= level if buy else low[i] <= level)
+    stop = lambda i: signal["stop_loss"] == signal["stop_loss"] and (
+        low[i] <= signal["stop_loss"] if buy else high[i] >= signal["stop_loss"])
+    status, hit = "", ""
+    for i in range(np.searchsorted(series.ts, signal["created_at"]), len(series)):
+        if series.ts[i] > horizon:
+            break
+        if stop(i):
+            if not status:
+                status, hit = "LOSS", "SL"
+            break
+        for name, level in (("T3", signal["t3"]), ("T2", signal["t2"]), ("T1", signal["t1"])):
+            if reached(i, level):
+                status = "WIN"
+                if not hit or hit < name:
+                    hit = name
+                break
+    if not status:
+        status = "EXPIRED" if series.ts[-1] >= horizon or horizon <= time.time() else "PENDING"
+    return status, hit
+
+def run_benchmark(workdir):
+    rng = np.random.default_rng(25)
+    price_dir = os.path.join(workdir, "prices")
+    ticks = write_prices(rng, price_dir)
+    print(f"=== Outcome Resolver Benchmark: {SIGNALS} PENDING signals, {len(SYMBOLS)} symbols x {ticks} ticks ===\n")
+
+    prices = PriceFiles(price_dir)
+    start = time.perf_counter()
+    for symbol in SYMBOLS:
+        prices.get(DAY.strftime("%Y-%m-%d"), symbol)
+    load = time.perf_counter() - start
+    print(f"load + index {len(SYMBOLS) * ticks:,} ticks: {load:.2f}s")
+
+    store = TrainingDataset(os.path.join(workdir, "columnar"))
+    signals = make_signals(rng, prices)
+    store.append("signals", signals)
+    dataset_dir = os.path.join(workdir, "dataset")
+    os.makedirs(dataset_dir)
+    executed = signals["signal_id"][rng.random(SIGNALS) < EXECUTED_SHARE]
+    with open(os.path.join(dataset_dir, f"training_dataset_{DAY.strftime('%Y-%m-%d')}.jsonl"), "w") as f:
+        for sid in executed:
+            f.write(json.dumps({"event": "OUTCOME_UPDATE", "signal_id": sid, "status": "EXECUTED_PAPER",
+                                "timestamp": DAY.replace(hour=9, minute=15).isoformat()}) + "\n")
+    store.ingest(source_files(dataset_dir))
+    counts = resolve_pending(store, prices, dataset_dir=dataset_dir)
+    print(f"resolve: {counts['signals']} signals in {counts['seconds']:.2f}s "
+          f"({counts['signals'] / counts['seconds']:,.0f} signals/s) | {counts['WIN']} WIN, {counts['LOSS']} LOSS, "
+          f"{counts['EXPIRED']} EXPIRED, {counts['open']} open, {counts['unpriced']} unpriced")
+
+    settled = {}
+    for batch in store.scan(SIGNAL_COLUMNS + ["outcome", "outcome_hit", "time_to_outcome_s"]):
+        for i in range(len(batch["signal_id"])):
+            settled[batch["signal_id"][i]] = {name: batch[name][i] for name in batch if name != "date"}
+    sample = np.random.default_rng(7).choice(sorted(settled), REFERENCE_SAMPLE, replace=False)
+    mismatches = 0
+    start = time.perf_counter()
+    for sid in sample:
+        row = settled[sid]
+        series = prices.get(DAY.strftime("%Y-%m-%d"), str(row["symbol"]))
+        expected = reference(row, series, session_close(row["created_at"]))
+        if expected != (row["outcome"], row["outcome_hit"]):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ MISMATCH {sid}: loop {expected}, resolver {(row['outcome'], row['outcome_hit'])}")
+    loop = (time.perf_counter() - start) / REFERENCE_SAMPLE
+    print(f"per-signal Python loop: {1 / loop:,.0f} signals/s -> ~{loop * SIGNALS:.0f}s for all "
+          f"({loop * SIGNALS / counts['seconds']:.0f}x slower)")
+    print(f"parity on {REFERENCE_SAMPLE} sampled signals: {REFERENCE_SAMPLE - mismatches}/{REFERENCE_SAMPLE} identical")
+
+    hits = {name: 0 for name in ("T1", "T2", "T3", "SL")}
+    times = []
+    for row in settled.values():
+        if row["outcome_hit"]:
+            hits[row["outcome_hit"]] += 1
+            times.append(row["time_to_outcome_s"])
+    print(f"hits {hits} | median time to outcome {np.median(times) / 60:.1f} min")
+
+    executed_open = sum(settled[sid]["outcome"] not in ("WIN", "LOSS", "EXPIRED") for sid in executed)
+    print(f"EXECUTED_PAPER signals: {len(executed) - executed_open}/{len(executed)} settled")
+    written = sum(1 for path in source_files(dataset_dir) if "resolved" in path for _ in open(path))
+    fresh = TrainingDataset(os.path.join(workdir, "rebuilt"))
+    fresh.append("signals", signals)
+    fresh.ingest(source_files(dataset_dir))
+    rebuilt = fresh.count(outcome=["WIN", "LOSS", "EXPIRED"])
+    print(f"OUTCOME_UPDATE lines written: {written} | store rebuilt from the JSONL: {rebuilt} settled")
+
+    again = resolve_pending(store, prices, dataset_dir=dataset_dir)
+    print(f"second run: {again['signals']} still pending, "
+          f"{again['WIN'] + again['LOSS'] + again['EXPIRED']} newly settled")
+    settled_count = counts["WIN"] + counts["LOSS"] + counts["EXPIRED"]
+    ok = (mismatches == 0 and again["WIN"] + again["LOSS"] + again["EXPIRED"] == 0 and executed_open == 0
+          and written == rebuilt == settled_count)
+    print("\nResolver matches the tick-by-tick loop, settles executed signals, writes the JSONL, "
+          "re-runs settle nothing twice: " + ("yes" if ok else "NO"))
+    return ok
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="aegis-resolver-bench-")
+    try:
+        ok = run_benchmark(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import fcntl
+import shutil
+import asyncio
+import logging
+import tempfile
+import importlib.abc
+import importlib.util
+
+import bench_executor as be
+
+# Modelled Aegis core costs; the stand-ins sleep for these
+IMPORT_LATENCY = 0.15 # Per core module (6 of them)
+VAULT_LATENCY = 0.3 # VaultEngine() decrypting credentials
+LOGIN_LATENCY = 1.5 # Full Kite login (request token + session exchange)
+PROFILE_LATENCY = 0.05 # One profile() call validating a cached token
+
+class SlowVault(be.VaultEngine):
+    def __init__(self):
+        time.sleep(VAULT_LATENCY)
+
+class KiteClient:
+    """What KiteAdapter wraps: the bits BrokerSession uses to cache a token."""
+    def __init__(self):
+        self.access_token = None
+
+    def set_access_token(self, token):
+        self.access_token = token
+
+    def profile(self):
+        time.sleep(PROFILE_LATENCY)
+        if not self.access_token:
+            raise RuntimeError("no session")
+        return {"user_id": "BENCH"}
+
+class SlowKiteAdapter(be.KiteAdapter):
+    def __init__(self, vault):
+        super().__init__(vault)
+        self.kite = KiteClient()
+
+    def login(self):
+        time.sleep(LOGIN_LATENCY)
+        self.kite.access_token = f"token-{time.time()}"
+        return True
+
+STAND_INS = {
+    "core.vault_engine": {"VaultEngine": SlowVault},
+    "broker.kite_adapter": {"KiteAdapter": SlowKiteAdapter},
+    "execution.execution_kernel": {"ExecutionKernel": be.ExecutionKernel, "SignalProposal": be.SignalProposal},
+    "risk.lakshmi_pnl_governor": {"LakshmiPnLGovernor": be.LakshmiPnLGovernor},
+    "core.expectancy_engine": {"ExpectancyEngine": be.ExpectancyEngine, "ExpectancyStats": be.ExpectancyStats},
+    "notification.alert_manager": {"AlertManager": be.AlertManager},
+}
+PACKAGES = {name.split(".")[0] for name in STAND_INS}
+
+class SlowCoreFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serves the stand-ins as real imports that cost IMPORT_LATENCY each."""
+    def find_spec(self, name, path, target=None):
+        if name in STAND_INS or name in PACKAGES:
+            return importlib.util.spec_from_loader(name, self, is_package=name in PACKAGES)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        if module.__name__ in STAND_INS:
+            time.sleep(IMPORT_LATENCY)
+            for attr, value in STAND_INS[module.__name__].items():
+                setattr(module, attr, value)
+
+def forget_core(ce):
+    """Make the next load_core() a cold import again."""
+    for name in list(sys.modules):
+        if name in STAND_INS or name in PACKAGES:
+            del sys.modules[name]
+    ce._core = None
+
+def report(name, executor, accepting, decided, extra=""):
+    phases = " ".join(f"{phase} {secs * 1000:.0f}ms" for phase, secs in executor.startup.items())
+    print(f"{name:<30} accepting {accepting * 1000:7.0f}ms | first decision {decided * 1000:7.0f}ms | "
+          f"{phases}{extra}")
+
+async def first_decision(executor, signal):
+    await executor.process_signal(signal)
+
+async def close(executor):
+    await executor.calls.close()
+    await executor.reporter.close(timeout=0.1)
+    executor.panic.stop()
+
+async def run_benchmark():
+    start = time.perf_counter()
+    import controlled_executor as ce
+    bridge_import = time.perf_counter() - start
+    logging.disable(logging.CRITICAL)
+    ce.MAX_TRADES_PER_DAY = ce.MAX_TRADES_PER_INSTRUMENT = 10 ** 9
+    ce.MAX_DAILY_RISK_INR = float("inf")
+    signals = iter(be.sample_signals(16, 16))
+
+    print(f"=== Startup Benchmark: core import {IMPORT_LATENCY * len(STAND_INS) * 1000:.0f}ms, "
+          f"vault {VAULT_LATENCY * 1000:.0f}ms, login {LOGIN_LATENCY * 1000:.0f}ms, "
+          f"token check {PROFILE_LATENCY * 1000:.0f}ms, kernel {be.KERNEL_LATENCY * 1000:.0f}ms ===")
+    print(f"bridge module import (aiohttp, ledger, ...): {bridge_import * 1000:.0f}ms\n")
+
+    # 1. The old shape: everything built and logged in before the first poll
+    forget_core(ce)
+    start = time.perf_counter()
+    executor = ce.ControlledExecutor()
+    executor.warm_up()
+    accepting = time.perf_counter() - start
+    await first_decision(executor, next(signals))
+    report("eager cold start", executor, accepting, time.perf_counter() - start)
+    await close(executor)
+    os.remove(ce.BROKER_SESSION_FILE) # Its login cached a token; the next case must not see it
+
+    # 2. Lazy: the feed is consumed while the core warms up on the call pool
+    forget_core(ce)
+    start = time.perf_counter()
+    executor = ce.ControlledExecutor()
+    executor._ensure_warm()
+    accepting = time.perf_counter() - start
+    await first_decision(executor, next(signals))
+    report("lazy cold start, fresh login", executor, accepting, time.perf_counter() - start)
+    await close(executor)
+
+    # 3. Lazy restart later the same day: case 2 cached the broker token
+    forget_core(ce)
+    start = time.perf_counter()
+    executor = ce.ControlledExecutor()
+    executor._ensure_warm()
+    accepting = time.perf_counter() - start
+    await first_decision(executor, next(signals))
+    report("lazy restart, cached session", executor, accepting, time.perf_counter() - start,
+           f" (session from {executor.session.source})")
+    await close(executor)
+
+    # 4. Warm standby: fully started behind an active executor's leader lock
+    forget_core(ce)
+    active_fd = os.open(ce.LEADER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(active_fd, fcntl.LOCK_SH)
+    executor = ce.ControlledExecutor()
+    await executor._ready()
+    takeover = asyncio.create_task(executor._acquire_leadership(standby=True))
+    await asyncio.sleep(0.5)
+    start = time.perf_counter()
+    os.close(active_fd) # The active executor dies
+    await takeover
+    accepting = time.perf_counter() - start
+    await first_decision(executor, next(signals))
+    report("warm standby takeover", executor, accepting, time.perf_counter() - start)
+    await close(executor)
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix="aegis-startup-bench-")
+    os.environ["AEGIS_CORE_PATH"] = workdir
+    os.environ["AEGIS_TELEGRAM_DIR"] = workdir
+    sys.meta_path.insert(0, SlowCoreFinder())
+    try:
+        asyncio.run(run_benchmark())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
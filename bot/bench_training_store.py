@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+from training_store import TrainingDataset, IST, _epoch
+
+DAYS = 30 # Daily training_dataset_*.jsonl files
+RECORDS_PER_DAY = 4000 # Ingest records per day
+CHANNELS = [f"channel_{i:02d}" for i in range(12)]
+SYMBOLS = [f"{index} {strike} {kind}" for index, base in (("NIFTY", 24000), ("BANKNIFTY", 51000), ("SENSEX", 83000))
+           for strike in range(base - 500, base + 501, 100) for kind in ("CE", "PE")]
+OUTCOMES = ["TARGET1_HIT", "TARGET2_HIT", "TARGET3_HIT", "SL_HIT", "EXPIRED"]
+OUTCOME_SHARE = 0.6 # Accepted signals that later get an OUTCOME_UPDATE
+ROUNDS = 3 # Filtered queries are timed over this many runs
+
+def make_record(rng, day, i):
+    """An ingest line as the backend's TrainingStore writes it."""
+    channel = rng.choice(CHANNELS)
+    symbol = rng.choice(SYMBOLS)
+    entry = round(rng.uniform(80, 400), 1)
+    accepted = rng.random() < 0.7
+    created = day + timedelta(seconds=rng.randint(9 * 3600 + 900, 15 * 3600 + 1800))
+    payload = {
+        "symbol": symbol, "side": "BUY", "entry_price": entry, "stop_loss": round(entry * 0.8, 1),
+        "targets": [round(entry * (1 + 0.05 * k), 1) for k in range(1, rng.randint(2, 4) + 1)],
+        "confidence": round(rng.uniform(0.5, 1.0), 2),
+        "timestamp_ist": created.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": "TELEGRAM",
+        "metadata": {"channel": channel, "original_text": f"{symbol} Buy {entry}"},
+    }
+    if accepted:
+        validation = {"status": "ACCEPTED", "score_breakdown": {"parsing": 0.9, "logic": 0.8,
+                                                                "latency": round(rng.random(), 2), "history": 0.7}}
+    else:
+        validation = {"status": "REJECTED", "reason": rng.choice(["Low Confidence", "Stale signal", "Duplicate"])}
+    prefix = "SIG" if accepted else "REJ"
+    return {
+        "id": f"ID-{day:%Y%m%d}-{i}", "signal_id": f"{prefix}-{day:%Y%m%d}-{i:06d}",
+        "raw_message": f"{symbol} Buy it ({entry - 5}-{entry + 5}) Target {payload['targets']} Stoploss {payload['stop_loss']}",
+        "parsed_payload": payload, "parse_confidence": payload["confidence"],
+        "aegis_validation_result": validation, "latency_ms": rng.randint(50, 900),
+        "created_at": created.astimezone(IST).isoformat(),
+    }
+
+def write_day(rng, workdir, day, count=RECORDS_PER_DAY, start=0):
+    path = os.path.join(workdir, f"training_dataset_{day:%Y-%m-%d}.jsonl")
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            record = make_record(rng, day, i)
+            f.write(json.dumps(record) + "\n")
+            if record["signal_id"].startswith("SIG") and rng.random() < OUTCOME_SHARE:
+                f.write(json.dumps({"event": "OUTCOME_UPDATE", "signal_id": record["signal_id"],
+                                    "execution": {}, "pnl": round(rng.uniform(-500, 900), 2),
+                                    "status": rng.choice(OUTCOMES),
+                                    "timestamp": (datetime.fromisoformat(record["created_at"]) +
+                                                  timedelta(minutes=30)).isoformat()}) + "\n")
+    return path
+
+def json_query(paths, channel, outcome, since):
+    """The current way: re-read every file and re-parse every line."""
+    signals, outcomes = {}, {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("event") == "OUTCOME_UPDATE":
+                    outcomes[record["signal_id"]] = record["status"]
+                else:
+                    signals[record["signal_id"]] = record
+    matched = 0
+    since_epoch = _epoch(since + "T00:00:00")
+    for sid, record in signals.items():
+        if (record["parsed_payload"]["metadata"]["channel"] == channel
+                and record["aegis_validation_result"]["status"] == "ACCEPTED"
+                and outcomes.get(sid, "PENDING") == outcome and _epoch(record["created_at"]) >= since_epoch):
+            matched += 1
+    return matched
+
+def timed(fn, rounds=ROUNDS):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def nested_layout(workdir):
+    """A line shaped like backend/data/training/dataset_*.jsonl, plus one with malformed targets."""
+    path = os.path.join(workdir, "dataset_2026-01-25.jsonl")
+    signal = {"symbol": "NIFTY26JAN21500CE", "side": "BUY", "entry_price": 150, "stop_loss": 140,
+              "targets": [160, 170], "timestamp_ist": "2026-01-25T18:14:25.334463", "id": "SIG-1769345065377",
+              "source": "TELEGRAM:@Options_Banknifty_Share_Market",
+              "metadata": {"original_text": "NIFTY26JAN21500CE buy 150 sl 140 tgt 160/170"}}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "SIG-BROKEN", "structured_signal": {**signal, "id": "SIG-BROKEN", "targets": 160},
+                            "created_at": "2026-01-25T12:44:00.000Z"}) + "\n")
+        f.write(json.dumps({"timestamp": "2026-01-25T12:44:25.377Z", "id": "SIG-1769345065377",
+                            "source": "TELEGRAM:@Options_Banknifty_Share_Market", "structured_signal": signal,
+                            "validation_result": "ACCEPTED", "final_outcome": "PENDING",
+                            "created_at": "2026-01-25T12:44:25.377Z"}) + "\n")
+    store = TrainingDataset(os.path.join(workdir, "nested"))
+    added = store.ingest([path])
+    rows = [row for batch in store.scan(["signal_id", "channel", "raw_message"], channel="Options_Banknifty_Share_Market")
+            for row in zip(batch["signal_id"], batch["raw_message"])]
+    ok = added == 1 and rows == [("SIG-1769345065377", signal["metadata"]["original_text"])]
+    print(f"nested dataset layout: {added} line ingested (malformed one skipped), channel from source -> "
+          f"{rows} {'✅' if ok else '❌'}")
+    return ok
+
+def run_benchmark(workdir):
+    rng = random.Random(24)
+    sources = os.path.join(workdir, "training")
+    os.makedirs(sources)
+    first = datetime(2026, 9, 1)
+    paths = [write_day(rng, sources, first + timedelta(days=d)) for d in range(DAYS)]
+    json_bytes = sum(os.path.getsize(p) for p in paths)
+    print(f"=== Training Store Benchmark: {DAYS} days x {RECORDS_PER_DAY} records "
+          f"({json_bytes / 1e6:.1f} MB of JSONL) ===\n")
+
+    store = TrainingDataset(os.path.join(workdir, "columnar"))
+    added, convert = timed(lambda: store.ingest(paths), rounds=1)
+    s = store.stats()
+    print(f"convert: {added} lines in {convert:.2f}s ({added / convert:,.0f} lines/s) -> {s['parts']} parts, "
+          f"{s['bytes'] / 1e6:.1f} MB ({json_bytes / s['bytes']:.1f}x smaller)")
+
+    ok = True
+    since = (first + timedelta(days=DAYS - 7)).strftime("%Y-%m-%d")
+    queries = [
+        ("1 channel, accepted, TARGET1_HIT, last 7 days",
+         lambda: json_query(paths, CHANNELS[3], "TARGET1_HIT", since),
+         lambda: store.count(since=since, channel=CHANNELS[3], validation_result="ACCEPTED", outcome="TARGET1_HIT")),
+        ("1 channel, accepted, still PENDING, all days",
+         lambda: json_query(paths, CHANNELS[5], "PENDING", "2000-01-01"),
+         lambda: store.count(channel=CHANNELS[5], validation_result="ACCEPTED", outcome="PENDING")),
+    ]
+    for label, slow, fast in queries:
+        expected, json_time = timed(slow, rounds=1)
+        got, store_time = timed(fast)
+        match = expected == got
+        ok &= match
+        print(f"\n{label}: {got} rows {'✅' if match else f'❌ (JSON scan found {expected})'}")
+        print(f"  JSON re-parse {json_time * 1000:8.0f}ms | store scan {store_time * 1000:6.1f}ms "
+              f"({json_time / store_time:.0f}x)")
+
+    batch, _ = timed(lambda: next(store.scan(["signal_id", "entry_price", "t1", "outcome"], channel=CHANNELS[0])),
+                     rounds=1)
+    print(f"\nfirst batch of a column scan: {len(batch['signal_id'])} rows, columns {list(batch)}")
+
+    day = first + timedelta(days=DAYS - 1)
+    write_day(rng, sources, day, count=500, start=RECORDS_PER_DAY)
+    appended, append_time = timed(lambda: store.ingest(paths), rounds=1)
+    print(f"\nincremental ingest: {appended} new lines in {append_time * 1000:.0f}ms "
+          f"(only the grown file's tail is read)")
+    again, _ = timed(lambda: store.ingest(paths), rounds=1)
+    ok &= again == 0
+    before = store.count(channel=CHANNELS[5], outcome="PENDING")
+    merged, compact_time = timed(lambda: store.compact(), rounds=1)
+    ok &= store.count(channel=CHANNELS[5], outcome="PENDING") == before
+    print(f"re-ingest with nothing new: {again} lines | compact: {merged} parts merged in "
+          f"{compact_time * 1000:.0f}ms, counts unchanged")
+
+    ok &= nested_layout(workdir)
+
+    print("\nStore answers match the JSON scan, re-ingest is a no-op: " + ("yes" if ok else "NO"))
+    return ok
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="aegis-training-bench-")
+    try:
+        ok = run_benchmark(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
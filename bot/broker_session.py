@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class BrokerSession:
+    """
+    Logs the broker in at most once per trading day.
+
+    A successful login's access token is cached in `path` (mode 0600) with
+    its date. On restart, restore() sets the cached token and checks it with
+    one cheap profile() call, which is much faster than a full login. The
+    executor also calls validate() periodically. login() falls back to a
+    fresh adapter.login() when the cached token is missing, from another
+    day or rejected.
+
+    Any adapter with a login() method works. Token caching additionally
+    needs the client (the adapter itself, or its .kite) to expose
+    access_token, set_access_token() and profile(), as KiteConnect does.
+    Without them every start is a full login.
+    """
+    def __init__(self, adapter, path):
+        self.adapter = adapter
+        self.client = getattr(adapter, "kite", adapter)
+        self.path = path
+        self.source = None # "cache" or "login" once the broker accepted us
+        self.validated_at = None
+
+    @property
+    def cacheable(self):
+        return all(hasattr(self.client, attr) for attr in ("access_token", "set_access_token", "profile"))
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("date") != datetime.now().strftime("%Y-%m-%d"):
+            return None # Broker tokens don't outlive the trading day
+        return data.get("access_token")
+
+    def _save(self):
+        token = getattr(self.client, "access_token", None)
+        if not token:
+            return
+        tmp = f"{self.path}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"date": datetime.now().strftime("%Y-%m-%d"), "access_token": token}, f)
+        os.replace(tmp, self.path)
+
+    def validate(self):
+        """True if the broker still accepts the current session."""
+        if not self.cacheable:
+            return self.source is not None # Nothing cheaper than a login to ask
+        try:
+            self.client.profile()
+        except Exception as e:
+            logger.warning(f"SESSION: broker rejected the session ({e!r})")
+            return False
+        self.validated_at = time.time()
+        return True
+
+    def restore(self):
+        """Reuse today's cached token if the broker still accepts it."""
+        if not self.cacheable:
+            return False
+        token = self._load()
+        if not token:
+            return False
+        self.client.set_access_token(token)
+        if not self.validate():
+            return False
+        self.source = "cache"
+        return True
+
+    def login(self, fresh=False):
+        """Restore today's session, or log in afresh. Returns True once logged in."""
+        if not fresh and self.restore():
+            logger.info("✅ Broker session restored from cache")
+            return True
+        if not self.adapter.login():
+            self.source = None
+            return False
+        self.source = "login"
+        self.validated_at = time.time()
+        self._save()
+        return True
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from parser import parse_signals
+
+def message_text(record):
+    """
+    Plain text of an exported message. Telegram Desktop exports store formatted
+    messages as a list of plain strings and {"type": ..., "text": ...} entities.
+    """
+    text = record.get("text") or record.get("message") or ""
+    if isinstance(text, list):
+        text = "".join(part if isinstance(part, str) else part.get("text", "") for part in text)
+    return text
+
+def parse_jsonl(in_path, out_path, workers=os.cpu_count(), chunk_size=256):
+    """
+    Stream a JSONL message archive through parse_signals into a JSONL file.
+    Each output line is the input record plus a "signal" key (None for chatter).
+    Records are held only while their chunk is in flight.
+    """
+    in_flight = deque()
+    stats = {"messages": 0, "parsed": 0, "rejected": 0}
+
+    def texts(f):
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            in_flight.append(record)
+            yield message_text(record)
+
+    with open(in_path, "r", encoding="utf-8") as src, open(out_path, "w", encoding="utf-8") as dst:
+        for signal in parse_signals(texts(src), workers=workers, chunk_size=chunk_size):
+            record = in_flight.popleft()
+            record["signal"] = signal
+            dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            stats["messages"] += 1
+            if signal and signal.get("status") == "PARSED":
+                stats["parsed"] += 1
+            elif signal:
+                stats["rejected"] += 1
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Re-parse an archived channel export (JSONL) into parsed JSONL.")
+    ap.add_argument("input", help="JSONL file, one message object per line")
+    ap.add_argument("output", help="JSONL file to write")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--chunk-size", type=int, default=256)
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    stats = parse_jsonl(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"Parsed {stats['messages']} messages in {elapsed:.1f}s "
+          f"({stats['messages'] / max(elapsed, 1e-9):,.0f} msgs/sec) | "
+          f"signals: {stats['parsed']} | rejected: {stats['rejected']}", file=sys.stderr)
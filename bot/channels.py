@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import zlib
+import asyncio
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import parser
+from parser import configure_parse_cache
+import formats
+from dedup import DedupIndex, content_key, signal_key
+from latency import Histogram, QUANTILES, stamp
+
+logger = logging.getLogger(__name__)
+
+# Parser profiles a channel can name in channels.json (see formats.PROFILES)
+PROFILES = {name: formats.parser_for(name) for name in formats.PROFILES}
+SHARD_BATCH = 64 # Jobs handed to a shard per round-trip
+SNAPSHOT_INTERVAL = 30 # Seconds between a shard's dedup snapshots
+
+class ChannelConfig:
+    """
+    One subscribed channel. Channels with the same dedup_scope suppress each
+    other's duplicates (default: the channel on its own; "" is the scope the
+    single-channel ingester used). max_age overrides the live age limit.
+    """
+    def __init__(self, channel, profile="default", dedup_scope=None, max_age=None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown parser profile {profile!r} for channel {channel}")
+        self.channel = channel
+        self.profile = profile
+        self.dedup_scope = channel if dedup_scope is None else dedup_scope
+        self.max_age = max_age
+
+    def __repr__(self):
+        return f"ChannelConfig({self.channel!r}, profile={self.profile!r}, dedup_scope={self.dedup_scope!r})"
+
+def load_channels(path, default_channel):
+    """
+    channels.json: [{"channel": ..., "profile": ..., "dedup_scope": ...,
+    "max_age": ..., "enabled": true}]. Without the file, the one legacy
+    channel in the global scope, so existing dedup snapshots stay valid.
+    """
+    if not os.path.exists(path):
+        return [ChannelConfig(default_channel, dedup_scope="")]
+    with open(path, "r") as f:
+        entries = json.load(f)
+    return [ChannelConfig(**{k: v for k, v in entry.items() if k != "enabled"})
+            for entry in entries if entry.get("enabled", True)]
+
+class ChannelShard:
+    """
+    Parse + de-duplicate for the dedup scopes routed to one shard. Jobs are
+    {"text", "profile", "scope", "trace"} and come back as a result dict
+    with an "outcome": chatter, rejected, duplicate_text, duplicate_signal
+    or accepted. One owner handles a shard's jobs in order, so the
+    DedupIndex needs no locking and first-seen always wins.
+
+    With a parse_cache_path the process's parse cache is persisted next to
+    the dedup snapshot, so a restart's replay doesn't parse again.
+    """
+    def __init__(self, snapshot_path, dedup_window, content_window, parse_cache_path=None):
+        self.dedup = DedupIndex(snapshot_path=snapshot_path)
+        if parse_cache_path:
+            configure_parse_cache(path=parse_cache_path)
+        self.dedup_window = dedup_window
+        self.content_window = content_window
+        self._saved_at = time.monotonic()
+
+    def process(self, jobs, autosave=True):
+        results = [self._handle(job) for job in jobs]
+        if autosave and self.save_due():
+            self.save()
+        return results
+
+    def save_due(self):
+        return time.monotonic() - self._saved_at >= SNAPSHOT_INTERVAL
+
+    def _handle(self, job):
+        text, trace, scope = job["text"], job["trace"], job["scope"]
+        signal = PROFILES[job["profile"]](text)
+        if not signal:
+            return {"outcome": "chatter", "trace": trace}
+        if signal.get("status") == "REJECTED":
+            return {"outcome": "rejected", "reason": signal.get("reason"), "trace": trace}
+        stamp(trace, "parse")
+
+        ts = time.time()
+        self.dedup.expire(ts)
+        text_key = content_key(text, scope)
+        if self.dedup.seen(text_key, ts):
+            return {"outcome": "duplicate_text", "trace": trace}
+        dedup_key = signal_key(signal['symbol'], signal['side'], scope)
+        if self.dedup.seen(dedup_key, ts):
+            return {"outcome": "duplicate_signal", "signal": signal, "trace": trace}
+        self.dedup.add(dedup_key, self.dedup_window, ts)
+        self.dedup.add(text_key, self.content_window, ts)
+        stamp(trace, "dedup", ts=ts)
+        return {"outcome": "accepted", "signal": signal, "trace": trace, "ingested_at": ts}
+
+    def save(self, dedup_blob=None, parse_entries=None):
+        try:
+            self.dedup.save(dedup_blob)
+            parser.parse_cache.save(parse_entries)
+        except OSError as e:
+            logger.error(f"DEDUP: snapshot failed: {e}")
+        self._saved_at = time.monotonic()
+        return parser.parse_cache.stats()
+
+    async def save_off_loop(self):
+        """save() for a shard on the event loop: state is copied there, the fsync and JSON dump run in a thread."""
+        self._saved_at = time.monotonic() # Not due again while this one is being written
+        return await asyncio.to_thread(self.save, self.dedup.dump(), parser.parse_cache.snapshot())
+
+# Shard worker process state
+_shard = None
+
+def _init_shard(snapshot_path, dedup_window, content_window, parse_cache_path):
+    global _shard
+    _shard = ChannelShard(snapshot_path, dedup_window, content_window, parse_cache_path)
+
+def _shard_process(jobs):
+    return _shard.process(jobs)
+
+def _shard_save():
+    return _shard.save()
+
+class ShardRouter:
+    """
+    Spreads parse + dedup over `shards` worker processes. A dedup scope
+    always maps to the same shard (crc32 of its name), so channels that
+    share a scope share one DedupIndex and the mapping survives adding
+    channels. Each shard drains its queue in batches of up to `batch` jobs
+    per process round-trip, in arrival order.
+
+    shards=0 runs a single ChannelShard on the event loop: no processes,
+    the same results, and the pre-sharding dedup.snapshot file. Each shard
+    also keeps its parse cache in snapshot_dir when persist_parses is set.
+    """
+    def __init__(self, shards, snapshot_dir, dedup_window, content_window, batch=SHARD_BATCH, persist_parses=False):
+        self.shards = shards
+        self.batch = batch
+        count = max(1, shards)
+        self.queues = [asyncio.Queue() for _ in range(count)]
+        self.jobs = [0] * count
+        self.batches = [0] * count
+        self.inline = None
+        self.pools = []
+        self._saving = None # Inline shard's snapshot in progress
+        if shards == 0:
+            self.inline = ChannelShard(os.path.join(snapshot_dir, "dedup.snapshot"), dedup_window, content_window,
+                                       os.path.join(snapshot_dir, "parse_cache.json") if persist_parses else None)
+        for i in range(shards):
+            self.pools.append(ProcessPoolExecutor(
+                max_workers=1, initializer=_init_shard,
+                initargs=(os.path.join(snapshot_dir, f"dedup-{i}.snapshot"), dedup_window, content_window,
+                          os.path.join(snapshot_dir, f"parse_cache-{i}.json") if persist_parses else None)
+            ))
+        self._tasks = []
+
+    def shard_of(self, scope):
+        return zlib.crc32(scope.encode()) % len(self.queues)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run(i), name=f"shard-{i}") for i in range(len(self.queues))]
+
+    async def submit(self, job):
+        """Parse + dedup one job on its scope's shard; returns the result dict."""
+        future = asyncio.get_running_loop().create_future()
+        self.queues[self.shard_of(job["scope"])].put_nowait((job, future))
+        return await future
+
+    async def _run(self, i):
+        queue = self.queues[i]
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await queue.get()]
+            while len(items) < self.batch and not queue.empty():
+                items.append(queue.get_nowait())
+            jobs = [job for job, _ in items]
+            try:
+                if self.inline is not None:
+                    results = self.inline.process(jobs, autosave=False)
+                    if self.inline.save_due():
+                        self._saving = asyncio.create_task(self.inline.save_off_loop())
+                else:
+                    results = await loop.run_in_executor(self.pools[i], _shard_process, jobs)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+            self.jobs[i] += len(items)
+            self.batches[i] += 1
+
+    def format(self):
+        shards = " | ".join(f"shard {i}: {jobs} jobs in {batches} batches"
+                            for i, (jobs, batches) in enumerate(zip(self.jobs, self.batches)))
+        if self.inline is not None:
+            shards += f" | parse cache {parser.parse_cache.format()} | formats {formats.registry.format()}"
+        return shards
+
+    async def close(self):
+        """Stop routing, snapshot every shard's dedup state and stop the workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.inline is not None:
+            if self._saving is not None:
+                await asyncio.gather(self._saving, return_exceptions=True)
+            await self.inline.save_off_loop()
+        loop = asyncio.get_running_loop()
+        for pool in self.pools:
+            try:
+                stats = await loop.run_in_executor(pool, _shard_save)
+                logger.info(f"PARSE CACHE: shard {self.pools.index(pool)}: {stats}")
+            except Exception as e:
+                logger.error(f"DEDUP: shard snapshot failed: {e!r}")
+            pool.shutdown(wait=True)
+
+class ChannelMetrics:
+    """Per-channel message counts and message-to-dispatch lag, logged and served as Prometheus text."""
+    def __init__(self):
+        self.counts = {}
+        self.lag = {}
+        self.started = time.monotonic()
+
+    def count(self, channel, outcome):
+        counts = self.counts.get(channel)
+        if counts is None:
+            self.counts[channel] = counts = Counter()
+        counts[outcome] += 1
+
+    def record_lag(self, channel, seconds):
+        if seconds < 0:
+            return # Clock skew between us and Telegram
+        hist = self.lag.get(channel)
+        if hist is None:
+            self.lag[channel] = hist = Histogram()
+        hist.record(seconds)
+
+    def render(self):
+        lines = ["# HELP aegis_channel_messages_total Messages per channel by outcome.",
+                 "# TYPE aegis_channel_messages_total counter"]
+        for channel, counts in sorted(self.counts.items()):
+            for outcome, n in sorted(counts.items()):
+                lines.append(f'aegis_channel_messages_total{{channel="{channel}",outcome="{outcome}"}} {n}')
+        lines += ["# HELP aegis_channel_lag_seconds Telegram post to dispatch, live messages.",
+                  "# TYPE aegis_channel_lag_seconds summary"]
+        for channel, hist in sorted(self.lag.items()):
+            for q in QUANTILES:
+                lines.append(f'aegis_channel_lag_seconds{{channel="{channel}",quantile="{q}"}} {hist.quantile(q):.6f}')
+            lines.append(f'aegis_channel_lag_seconds_sum{{channel="{channel}"}} {hist.sum:.6f}')
+            lines.append(f'aegis_channel_lag_seconds_count{{channel="{channel}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def format(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        received = sum(c["received"] for c in self.counts.values())
+        forwarded = sum(c["forwarded"] for c in self.counts.values())
+        worst = max(self.lag.items(), key=lambda item: item[1].quantile(0.99), default=None)
+        return (f"{len(self.counts)} channels | {received} received ({received / elapsed:.2f}/s), "
+                f"{forwarded} forwarded" + (f" | worst lag p99 {worst[1].quantile(0.99):.2f}s ({worst[0]})"
+                                             if worst else ""))
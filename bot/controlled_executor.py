@@ -3,73 +3,205 @@ import sys
 import json
 import time
 import logging
-import requests
+import fcntl
 import asyncio
+from types import SimpleNamespace
+from functools import cached_property
+from collections import OrderedDict
 from datetime import datetime, timezone
+from signal_feed import SignalFeed
+from risk_ledger import RiskLedger
+from panic_watch import PanicWatcher, PanicHalt
+from latency import LatencyRecorder, stamp
+from offloop import OffLoopCalls, CallTimeout
+from outcome_reporter import OutcomeReporter
+from broker_session import BrokerSession
+from instruments import InstrumentIndex
+from fanout import FanOutEngine, AccountBook
+from async_log import setup_logging
 
 # --- CONFIGURATION (STRICT RULES) ---
-AEGIS_CORE_PATH = "/root/aegis-engine"
-BASE_DIR = "/opt/aegis-saas/telegram"
+AEGIS_CORE_PATH = os.environ.get("AEGIS_CORE_PATH", "/root/aegis-engine")
+BASE_DIR = os.environ.get("AEGIS_TELEGRAM_DIR", "/opt/aegis-saas/telegram")
 PANIC_FILE = os.path.join(BASE_DIR, "PANIC")
-TRADE_LIMIT_FILE = os.path.join(BASE_DIR, "daily_trades.json")
+TRADE_LIMIT_FILE = os.path.join(BASE_DIR, "daily_trades.json") # Legacy counter, imported once into the ledger
+RISK_LEDGER_DIR = os.path.join(BASE_DIR, "risk_ledger")
 MAX_TRADES_PER_DAY = 1
+MAX_TRADES_PER_INSTRUMENT = 1
 MAX_RISK_INR = 500
+MAX_DAILY_RISK_INR = MAX_RISK_INR * MAX_TRADES_PER_DAY
 TARGET_INSTRUMENT = "NIFTY"
+INSTRUMENT_INDEX_FILE = os.path.join(BASE_DIR, "instruments.idx") # Built daily: python3 instruments.py build <dump.csv>
+LEGACY_LOT_SIZE = 75 # Standard NIFTY 50 Lot, only used while no instrument index is built
+FANOUT_ACCOUNTS_FILE = os.path.join(BASE_DIR, "accounts.json") # Subscriber accounts; fan-out is off without it
+FANOUT_LOG_DIR = os.path.join(BASE_DIR, "fanout") # Per-account results, one JSON line per signal, and the trade journal
+
+# Local Backend Signal Feed
+SIGNALS_API = "http://localhost:4100/api/v1/signals"
+FEED_CURSOR_FILE = os.path.join(BASE_DIR, "feed_cursor.json")
+FEED_WAIT = 5 # Long-poll hold; keeps the PANIC check as frequent as the old poll
+POLL_INTERVAL = 5 # Fallback polling when the feed is unavailable
+MAX_CONCURRENT_SIGNALS = 4 # Distinct instruments evaluated in parallel per batch
+MAX_SIGNAL_AGE = 300 # Seconds since the Telegram post; older signals (outbox retries, catch-up) are not traded
+KERNEL_PARALLELISM = 1 # Concurrent kernel.submit_signal calls (raise only if the kernel is thread-safe)
+METRICS_PORT = 9465 # Stage latency histograms at 127.0.0.1:METRICS_PORT/metrics
+REPORT_OUTCOME_URL = f"{SIGNALS_API}/report-outcome" # Batched to /bulk by the OutcomeReporter
+OUTCOME_SPILL_DIR = os.path.join(BASE_DIR, "outcome_spill") # Outcomes the backend could not take yet
+BROKER_SESSION_FILE = os.path.join(BASE_DIR, "broker_session.json") # Today's access token, reused across restarts
+SESSION_CHECK_INTERVAL = 300 # Seconds between broker session re-validations
+LEADER_LOCK_FILE = os.path.join(BASE_DIR, "executor.leader.lock") # Held shared by active executors
+LEADER_POLL = 0.1 # Standby takeover latency once the last active executor exits
+
+# Blocking calls run on a bounded pool, each with its own deadline (seconds)
+CALL_WORKERS = 8
+KERNEL_TIMEOUT = 15
+LEDGER_TIMEOUT = 5
+ALERT_TIMEOUT = 10
+SESSION_TIMEOUT = 30
+WARMUP_TIMEOUT = 120 # Core import + construction + broker login
 
 # Add Aegis Core to path
 sys.path.append(AEGIS_CORE_PATH)
 os.chdir(AEGIS_CORE_PATH)
 
-# Import Aegis Core Components
-try:
-    from core.vault_engine import VaultEngine
-    from broker.kite_adapter import KiteAdapter
-    from execution.execution_kernel import ExecutionKernel, SignalProposal
-    from risk.lakshmi_pnl_governor import LakshmiPnLGovernor
-    from core.expectancy_engine import ExpectancyEngine
-    from notification.alert_manager import AlertManager
-except ImportError as e:
-    print(f"FAILED TO IMPORT AEGIS CORE: {e}")
-    sys.exit(1)
-
-# --- MONKEY PATCH (v1.1 Core Bug Fix) ---
-# ExpectancyStats dataclass is missing to_dict() required by ExecutionKernel
+# Aegis Core Components are imported on first use (see load_core): the import
+# is a large share of a cold start and nothing before the kernel needs it
 from dataclasses import asdict
-from core.expectancy_engine import ExpectancyStats
 def stats_to_dict(self): return asdict(self)
-ExpectancyStats.to_dict = stats_to_dict
-# -----------------------------------------
+_core = None
+
+def load_core():
+    global _core
+    if _core is None:
+        from core.vault_engine import VaultEngine
+        from broker.kite_adapter import KiteAdapter
+        from execution.execution_kernel import ExecutionKernel, SignalProposal
+        from risk.lakshmi_pnl_governor import LakshmiPnLGovernor
+        from core.expectancy_engine import ExpectancyEngine, ExpectancyStats
+        from notification.alert_manager import AlertManager
+
+        # --- MONKEY PATCH (v1.1 Core Bug Fix) ---
+        # ExpectancyStats dataclass is missing to_dict() required by ExecutionKernel
+        ExpectancyStats.to_dict = stats_to_dict
+        # -----------------------------------------
+        _core = SimpleNamespace(
+            VaultEngine=VaultEngine, KiteAdapter=KiteAdapter, ExecutionKernel=ExecutionKernel,
+            SignalProposal=SignalProposal, LakshmiPnLGovernor=LakshmiPnLGovernor,
+            ExpectancyEngine=ExpectancyEngine, AlertManager=AlertManager
+        )
+    return _core
 
 # Logging Setup
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - [CONTROLLED_EXEC] - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(BASE_DIR, "execution.log")),
-        logging.StreamHandler()
-    ]
-)
+# Formatting and disk writes happen on a background thread; decisions only enqueue
+log_pipeline = setup_logging(os.path.join(BASE_DIR, "execution.log"),
+                             '%(asctime)s - [CONTROLLED_EXEC] - %(levelname)s - %(message)s',
+                             static={"app": "controlled_exec"})
 logger = logging.getLogger(__name__)
 
 class ControlledExecutor:
+    """
+    Startup is split so a restart doesn't leave a blind window: __init__ only
+    sets up the cheap local pieces (ledger, PANIC watch, call pool), the Aegis
+    core components are built on first use, and warm_up() - import, build,
+    broker login - runs on the call pool while the feed is already being
+    consumed. Signals that reach the kernel before it is ready wait for it.
+
+    run(standby=True) does the whole warm-up first and then waits, logged in,
+    until no active executor holds LEADER_LOCK_FILE before it takes over.
+    """
     def __init__(self):
-        self.vault = VaultEngine()
-        self.kite = KiteAdapter(self.vault)
-        self.alert_manager = AlertManager(self.vault)
-        self.expectancy = ExpectancyEngine()
-        self.lakshmi = LakshmiPnLGovernor()
-        
-        self.kernel = ExecutionKernel(
+        self.paper_mode = False
+        self.ready = False # warm_up() done
+        self.startup = {} # Seconds per warm-up phase
+
+        # Shared with every other executor on the host; trades are reserved
+        # before the kernel is asked, so concurrent signals can't overshoot
+        self.ledger = RiskLedger(
+            RISK_LEDGER_DIR,
+            max_trades=MAX_TRADES_PER_DAY,
+            max_per_instrument=MAX_TRADES_PER_INSTRUMENT,
+            max_risk=MAX_DAILY_RISK_INR
+        )
+        self._import_legacy_trades()
+        self._kernel_slots = asyncio.Semaphore(KERNEL_PARALLELISM)
+        self.calls = OffLoopCalls(max_workers=CALL_WORKERS)
+        self.reporter = OutcomeReporter(REPORT_OUTCOME_URL, "AEGIS_BOT_SECRET_V1", OUTCOME_SPILL_DIR)
+        self._warm = None
+        self._fatal = False
+        self._leader_fd = None
+
+        # PANIC kill-switch: halts the kernel from a watcher thread the moment the
+        # file appears, refuses any order not yet sent and cancels the run loop
+        self._loop = None
+        self._main_task = None
+        self.panic = PanicWatcher(PANIC_FILE, self._on_panic)
+        self.latency = LatencyRecorder()
+        self.panic.start()
+
+        # Contract master (memory-mapped, shared with the parser): symbol -> lot size, expiry
+        self.instruments = InstrumentIndex(INSTRUMENT_INDEX_FILE)
+        if not self.instruments.loaded:
+            logger.warning(f"INSTRUMENTS: no index at {INSTRUMENT_INDEX_FILE}, "
+                           f"falling back to the NIFTY name check and lot size {LEGACY_LOT_SIZE}")
+
+        # Subscriber fan-out: every approved signal is sized and executed per account
+        self.fanout = None
+        if os.path.exists(FANOUT_ACCOUNTS_FILE):
+            # Only paper accounts have an adapter; a live broker's adapter comes with its orders/sec limit
+            self.fanout = FanOutEngine(AccountBook.load(FANOUT_ACCOUNTS_FILE, journal_dir=FANOUT_LOG_DIR),
+                                       {"paper": self._paper_account_order})
+            logger.info(f"📣 Fan-out enabled for {len(self.fanout.book)} subscriber accounts")
+
+    # --- Aegis core components, built on first use ---
+    @cached_property
+    def vault(self):
+        return load_core().VaultEngine()
+
+    @cached_property
+    def kite(self):
+        return load_core().KiteAdapter(self.vault)
+
+    @cached_property
+    def session(self):
+        return BrokerSession(self.kite, BROKER_SESSION_FILE)
+
+    @cached_property
+    def alert_manager(self):
+        return load_core().AlertManager(self.vault)
+
+    @cached_property
+    def expectancy(self):
+        return load_core().ExpectancyEngine()
+
+    @cached_property
+    def lakshmi(self):
+        return load_core().LakshmiPnLGovernor()
+
+    @cached_property
+    def kernel(self):
+        return load_core().ExecutionKernel(
             self.vault, 
             self.alert_manager, 
             self.kite,
             expectancy_engine=self.expectancy,
             pnl_governor=self.lakshmi
         )
-        
+
+    def _phase(self, name, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.startup[name] = time.perf_counter() - start
+        return result
+
+    def warm_up(self):
+        """Import the core, build every component and log the broker in. Blocking."""
+        if self.ready:
+            return
+        self._phase("import", load_core)
+        self._phase("construct", lambda: self.kernel)
+
         # Initialize Broker
-        self.paper_mode = False
-        if not self.kite.login():
+        if not self._phase("login", self.session.login):
             logger.warning("⚠️ KITE LOGIN FAILED. FALLING BACK TO PAPER MODE FOR PROOF.")
             self.paper_mode = True
             # Mock kite.place_order for paper mode
@@ -78,68 +210,210 @@ class ControlledExecutor:
             # FORCE OPEN GATE (Aegis Rule: Confirmation required)
             self.kernel.confirm_execution_ready(source="PAPER_POC_BRIDGE")
         else:
-            logger.info("✅ KITE LOGGED IN (LIVE READY)")
+            logger.info(f"✅ KITE LOGGED IN (LIVE READY, session from {self.session.source})")
+        self.kite.place_order = self.panic.guard(self._timed_order(self.kite.place_order))
+        if self.panic.is_set():
+            self.kernel.halt() # PANIC fired before there was a kernel to halt
+        self.ready = True
+        logger.info("STARTUP: " + " | ".join(f"{name} {secs:.2f}s" for name, secs in self.startup.items()))
+
+    def _ensure_warm(self):
+        if self._warm is None:
+            self._warm = asyncio.ensure_future(self.calls.call("warmup", self.warm_up, timeout=WARMUP_TIMEOUT))
+            self._warm.add_done_callback(self._on_warm_done)
+        return self._warm
+
+    def _on_warm_done(self, task):
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.critical(f"FAILED TO START AEGIS CORE: {task.exception()!r}")
+        self._fatal = True
+        if self._main_task is not None:
+            self._main_task.cancel()
+
+    async def _ready(self):
+        """Wait for warm_up(); shielded so one cancelled signal can't cancel it for everyone."""
+        await asyncio.shield(self._ensure_warm())
+
+    async def _keep_session(self):
+        """Re-validate the broker session, logging in again if the broker dropped it."""
+        try:
+            await self._ready()
+        except Exception:
+            return # _on_warm_done handles it
+        while not self.paper_mode:
+            await asyncio.sleep(SESSION_CHECK_INTERVAL)
+            try:
+                if await self.calls.call("session", self.session.validate, timeout=SESSION_TIMEOUT):
+                    continue
+                if await self.calls.call("session", self.session.login, fresh=True, timeout=SESSION_TIMEOUT):
+                    logger.info("✅ Broker session re-established")
+                    continue
+                logger.error("🚨 SESSION: broker login failed, orders will be refused by the broker")
+                self.calls.spawn("alert", self.alert_manager.send_telegram_alert,
+                                 "🚨 *BROKER SESSION LOST*: re-login failed", timeout=ALERT_TIMEOUT)
+            except Exception as e:
+                logger.error(f"SESSION: check failed: {e!r}")
+
+    async def _acquire_leadership(self, standby):
+        """
+        Active executors hold LEADER_LOCK_FILE shared. A standby needs it
+        exclusively, i.e. waits until no active executor is left; it polls
+        every LEADER_POLL seconds rather than blocking so PANIC can still
+        cancel it. The lock goes with the process, however it dies. An active
+        executor that finds a promoted standby holding it exclusively becomes
+        a standby itself, so the two never consume the feed together.
+        """
+        self._leader_fd = os.open(LEADER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        if not standby:
+            try:
+                fcntl.flock(self._leader_fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                logger.warning("A promoted standby holds the leader lock; standing by until it exits")
+        logger.info("💤 STANDBY: warm and waiting for the active executor to exit")
+        while True:
+            try:
+                fcntl.flock(self._leader_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(LEADER_POLL)
+        logger.info("⚡ STANDBY TAKING OVER")
 
     def _mock_paper_place_order(self, **kwargs):
         logger.info(f"📝 PAPER ORDER: {kwargs}")
         return {"status": "SUCCESS", "order_id": f"PAPER-{int(time.time())}"}
 
+    async def _paper_account_order(self, user_id, **order):
+        return {"status": "SUCCESS", "order_id": f"PAPER-{user_id}-{int(time.time())}"}
+
+    async def _fan_out(self, signal, entry, sl, lot_size, approved_at):
+        """Execute an approved signal for every subscriber account. Returns the summary."""
+        report = await self.fanout.execute(signal['signal_id'], signal['symbol'], signal['side'], entry, sl, lot_size,
+                                           approved_at=approved_at, halted=self.panic.is_set)
+        self.latency.record("fanout", report["wall_clock_ms"] / 1000)
+        self.calls.spawn("fanout_log", self._log_fanout, report, timeout=LEDGER_TIMEOUT)
+        return {k: v for k, v in report.items() if k != "results"}
+
+    def _log_fanout(self, report):
+        path = os.path.join(FANOUT_LOG_DIR, f"fanout-{datetime.now().strftime('%Y-%m-%d')}.jsonl")
+        with open(path, "a") as f:
+            f.write(json.dumps(report) + "\n")
+
+    def _timed_order(self, place_order):
+        def timed(*args, **kwargs):
+            with self.latency.time("order"):
+                return place_order(*args, **kwargs)
+        return timed
+
+    def _on_panic(self):
+        # Runs on the watcher thread
+        # Notify Aegis System if possible (warm_up halts a kernel built later)
+        kernel = self.__dict__.get("kernel")
+        if kernel is not None:
+            kernel.halt()
+        if self._main_task is not None:
+            self._loop.call_soon_threadsafe(self._main_task.cancel)
+
     def check_panic(self):
-        if os.path.exists(PANIC_FILE):
-            logger.critical("🚨 PANIC KILL-SWITCH DETECTED! HALTING SYSTEM.")
-            # Notify Aegis System if possible
-            self.kernel.halt()
+        if self.panic.is_set():
+            logger.critical("🚨 PANIC KILL-SWITCH ACTIVE. EXECUTOR STOPPED.")
             sys.exit(1)
 
-    def _get_trades_today(self):
-        if not os.path.exists(TRADE_LIMIT_FILE): return 0
+    def _import_legacy_trades(self):
+        # Trades booked today by a pre-ledger executor still count
+        if self.ledger.trades or not os.path.exists(TRADE_LIMIT_FILE): return
         try:
             with open(TRADE_LIMIT_FILE, "r") as f:
                 data = json.load(f)
-                if data.get("date") == datetime.now().strftime("%Y-%m-%d"):
-                    return data.get("count", 0)
-        except: pass
-        return 0
+        except: return
+        if data.get("date") != datetime.now().strftime("%Y-%m-%d"): return
+        for _ in range(data.get("count", 0)):
+            rid, _reason = self.ledger.reserve("LEGACY", 0.0)
+            if rid: self.ledger.commit(rid)
 
-    def _increment_trades(self):
-        count = self._get_trades_today() + 1
-        with open(TRADE_LIMIT_FILE, "w") as f:
-            json.dump({"date": datetime.now().strftime("%Y-%m-%d"), "count": count}, f)
+    def _risk_of(self, signal, contract=None):
+        entry = float(signal['entry_price'])
+        sl = float(signal['stop_loss'])
+        risk_per_unit = abs(entry - sl)
+        
+        # Lot size of the resolved contract, as listed in today's instrument master
+        lot_size = contract.lot_size if contract else LEGACY_LOT_SIZE
+        return entry, sl, lot_size, risk_per_unit * lot_size
 
-    def process_signal(self, signal):
+    def _signal_age(self, signal):
+        """Seconds since the signal was posted, from its trace or ingest stamp; None if it carries neither."""
+        metadata = signal.get('metadata') or {}
+        posted = ((metadata.get('trace') or {}).get('t') or {}).get('message')
+        if posted is None and metadata.get('ingested_at'):
+            try:
+                posted = datetime.fromisoformat(metadata['ingested_at']).timestamp()
+            except (TypeError, ValueError):
+                return None
+        return None if posted is None else time.time() - posted
+
+    async def process_signal(self, signal):
         """
         Telegram -> Aegis Bridge
         signal = { 'symbol': 'SENSEX 83400 CE', 'side': 'BUY', 'entry_price': 290, 'stop_loss': 270, ... }
         """
-        self.check_panic()
-        
-        # 1. INSTRUMENT FILTER (STRICT: NIFTY ONLY)
-        if "NIFTY" not in signal['symbol'] or "BANKNIFTY" in signal['symbol']:
-             logger.warning(f"SKIP: Instrument {signal['symbol']} not NIFTY")
+        # Backend + feed delivery time, from the trace telegram_live attached
+        trace = (signal.get('metadata') or {}).get('trace')
+        if trace:
+            stamp(trace, "delivery", self.latency)
+
+        if self.panic.is_set():
+             logger.warning(f"SKIP: PANIC kill-switch active, {signal['symbol']} not processed")
              return
 
-        # 2. DAILY TRADE LIMIT (STRICT: 1/DAY)
-        if self._get_trades_today() >= MAX_TRADES_PER_DAY:
-             logger.warning("SKIP: Daily trade limit reached (1/1)")
+        if (signal.get('metadata') or {}).get('training_only'):
+             logger.warning(f"SKIP: {signal['symbol']} is a training-only (backfilled) signal, never traded")
              return
 
-        # 3. RISK CALCULATOR (STRICT: ₹500)
-        entry = float(signal['entry_price'])
-        sl = float(signal['stop_loss'])
-        risk_per_unit = abs(entry - sl)
-        
-        # NIFTY Lot Size check
-        lot_size = 75 # Standard NIFTY 50 Lot (Update if changed)
-        # Check current engine config for lot size
-        total_risk = risk_per_unit * lot_size
+        age = self._signal_age(signal)
+        if age is not None and age > MAX_SIGNAL_AGE:
+             logger.warning(f"SKIP: {signal['symbol']} posted {int(age)}s ago (limit {MAX_SIGNAL_AGE}s), not trading it late")
+             return
         
+        # 1. INSTRUMENT FILTER (STRICT: NIFTY ONLY)
+        contract = self.instruments.resolve(signal['symbol'])
+        if self.instruments.loaded:
+            if contract is None:
+                 logger.warning(f"SKIP: {signal['symbol']} not in the instrument master (unknown or expired)")
+                 return
+            if contract.underlying != TARGET_INSTRUMENT:
+                 logger.warning(f"SKIP: Instrument {signal['symbol']} not {TARGET_INSTRUMENT}")
+                 return
+        elif "NIFTY" not in signal['symbol'] or "BANKNIFTY" in signal['symbol']:
+             logger.warning(f"SKIP: Instrument {signal['symbol']} not NIFTY")
+             return
+
+        # 2. RISK CALCULATOR (STRICT: ₹500)
+        entry, sl, lot_size, total_risk = self._risk_of(signal, contract)
         if total_risk > MAX_RISK_INR:
              logger.warning(f"REJECT: Risk ₹{total_risk:.2f} exceeds limit ₹{MAX_RISK_INR}")
              return
 
+        # 3. DAILY LIMITS (STRICT: 1/DAY) - booked in the shared risk ledger
+        rid, reason = await self.calls.call("ledger", self.ledger.reserve, signal['symbol'], total_risk,
+                                            timeout=LEDGER_TIMEOUT)
+        if rid is None:
+             logger.warning(f"SKIP: {reason}")
+             return
+
+        executed = False
+        try:
+            executed = await self._evaluate_signal(signal, entry, sl, lot_size, total_risk, contract, rid)
+        finally:
+            settle = self.ledger.commit if executed else self.ledger.release
+            await self.calls.call("ledger", settle, rid, timeout=LEDGER_TIMEOUT)
+
+    async def _evaluate_signal(self, signal, entry, sl, lot_size, total_risk, contract=None, rid=None):
+        """Kernel validation and execution of a booked signal. Returns True if a trade was executed."""
         logger.info(f"🎯 PROPOSING SIGNAL: {signal['symbol']} {signal['side']} @ {entry} (Risk: ₹{total_risk:.2f})")
 
         # 4. AEGIS KERNEL VALIDATION
+        await self._ready()
         # Producing valid tech_metrics to pass mandatory EdgeGuard & Regime gates
         t1 = signal.get('targets', [entry * 1.05])[0]
         rr_calc = (t1 - entry) / max(0.1, abs(entry - sl))
@@ -157,70 +431,140 @@ class ControlledExecutor:
             "iv_rank": 30
         }
 
-        proposal = SignalProposal(
+        proposal = load_core().SignalProposal(
             symbol=signal['symbol'],
             mode="BUY" if signal['side'] == "BUY" else "SELL",
             confidence=signal.get('confidence', 90) / 100.0,
-            metadata={"source": "TELEGRAM_BRIDGE"}
+            metadata={"source": "TELEGRAM_BRIDGE", **({
+                "tradingsymbol": contract.tradingsymbol,
+                "exchange": contract.exchange,
+                "expiry": contract.expiry
+            } if contract else {})}
         )
 
-        auth_ok, reason = self.kernel.submit_signal(proposal, tech_metrics=tech_metrics)
+        async with self._kernel_slots:
+            if rid is not None:
+                # From here the order may exist even if this process dies: the ledger keeps it booked
+                await self.calls.call("ledger", self.ledger.submit, rid, timeout=LEDGER_TIMEOUT)
+            try:
+                with self.latency.time("kernel"):
+                    auth_ok, reason = await self.calls.call(
+                        "kernel", self.kernel.submit_signal, proposal, tech_metrics=tech_metrics,
+                        timeout=KERNEL_TIMEOUT
+                    )
+            except CallTimeout as e:
+                # The kernel may still place the order: keep the trade on the books
+                logger.error(f"⏱️ KERNEL TIMEOUT: {e} | {signal['symbol']} counted against limits")
+                self.calls.spawn("alert", self.alert_manager.send_telegram_alert,
+                                 f"⏱️ *KERNEL TIMEOUT*: {signal['symbol']} - verify broker positions",
+                                 timeout=ALERT_TIMEOUT)
+                return True
+        approved_at = time.perf_counter()
+        metadata = signal.get('metadata') or {}
+        trace = metadata.get('trace')
+        if trace and not metadata.get('is_replay') and "message" in trace.get("t", {}):
+            self.latency.record("message_to_decision", time.time() - trace["t"]["message"])
         
+        executed = False
         if auth_ok:
             logger.info(f"✅ AEGIS KERNEL APPROVED: {reason}")
             # 5. EXECUTION (SMALL CAPITAL)
             try:
                 logger.info(f"🚀 EXECUTION INTENT: {signal['symbol']} x{lot_size} @ {entry}")
-                
-                # Report Intent to Training Pipeline
-                try:
-                    requests.post("http://localhost:4100/api/v1/signals/report-outcome", json={
-                        "signal_id": signal['signal_id'],
-                        "execution": {"intent": "PAPER_TRADE", "lot_size": lot_size, "kernel_reason": reason},
-                        "status": "EXECUTED_PAPER"
-                    }, headers={"x-api-key": "AEGIS_BOT_SECRET_V1", "x-source": "TELEGRAM"}, timeout=2)
-                except: pass
-
-                self._increment_trades()
-                self.alert_manager.send_telegram_alert(f"🟢 *CONTROLLED EXECUTION*: {signal['symbol']} at {entry}")
+                executed = True
+                execution = {"intent": "PAPER_TRADE", "lot_size": lot_size, "kernel_reason": reason}
+                if self.fanout is not None:
+                    execution["fanout"] = await self._fan_out(signal, entry, sl, lot_size, approved_at)
+
+                # Report Intent to Training Pipeline (queued, sent in batches)
+                self.reporter.report(signal['signal_id'], "EXECUTED_PAPER", execution)
+                self.calls.spawn("alert", self.alert_manager.send_telegram_alert,
+                                 f"🟢 *CONTROLLED EXECUTION*: {signal['symbol']} at {entry}", timeout=ALERT_TIMEOUT)
             except Exception as e:
                 logger.error(f"Execution Error: {e}")
         else:
             logger.warning(f"🛑 AEGIS KERNEL REJECTED: {reason}")
             # Report Rejection to Training Pipeline (Detailed reason)
-            try:
-                requests.post("http://localhost:4100/api/v1/signals/report-outcome", json={
-                    "signal_id": signal['signal_id'],
-                    "status": "REJECTED_BY_KERNEL",
-                    "execution": {"kernel_reason": reason}
-                }, headers={"x-api-key": "AEGIS_BOT_SECRET_V1", "x-source": "TELEGRAM"}, timeout=2)
-            except: pass
-
-    async def run(self):
-        logger.info("📡 Controlled Executor Bridge listening for signals via Local Backend...")
-        last_ingested_id = None
-        
-        while True:
-            self.check_panic()
-            try:
-                # Poll the local backend for latest signals
-                res = requests.get("http://localhost:4100/api/v1/signals/today", timeout=5)
-                if res.status_code == 200:
-                    signals = res.json().get('data', [])
-                    if signals:
-                        latest = signals[0] # Most recent
-                        sid = latest.get('signal_id')
-                        
-                        if sid != last_ingested_id:
-                            logger.info(f"🆕 New Signal Detected: {latest.get('symbol')}")
-                            self.process_signal(latest)
-                            last_ingested_id = sid
-                
-            except Exception as e:
-                logger.error(f"Polling Error: {e}")
-                
-            await asyncio.sleep(5)
+            self.reporter.report(signal['signal_id'], "REJECTED_BY_KERNEL", {"kernel_reason": reason})
+        return executed
+
+    async def run(self, standby=False):
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        warm = self._ensure_warm()
+        session_keeper = asyncio.create_task(self._keep_session())
+        feed = metrics_server = None
+        try:
+            if standby:
+                await asyncio.wait([warm]) # Failure cancels us via _on_warm_done
+            await self._acquire_leadership(standby)
+
+            logger.info("📡 Controlled Executor Bridge subscribed to Local Backend signal feed...")
+            feed = SignalFeed(SIGNALS_API, FEED_CURSOR_FILE, wait=FEED_WAIT, poll_interval=POLL_INTERVAL)
+            if feed.cursor:
+                logger.info(f"Resuming after signal {feed.cursor}")
+            metrics_server = await self.latency.serve(port=METRICS_PORT)
+            self.reporter.start()
+            async for batch in feed.batches():
+                self.check_panic()
+                if batch:
+                    await self.process_batch(batch, feed)
+        except asyncio.CancelledError:
+            if not self.panic.is_set() and not self._fatal:
+                raise
+        finally:
+            session_keeper.cancel()
+            if feed is not None:
+                await feed.close()
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+            await self.calls.close()
+            if self.fanout is not None:
+                await self.fanout.close()
+            await self.reporter.close()
+            logger.info(f"LATENCY: {self.latency.format()}")
+            logger.info(f"LOG: {log_pipeline.format()}")
+        if self._fatal:
+            sys.exit(1)
+        self.check_panic()
+
+    async def _process_safely(self, signal):
+        logger.info(f"🆕 New Signal Detected: {signal.get('symbol')}")
+        try:
+            await self.process_signal(signal)
+        except PanicHalt as e:
+            logger.critical(f"🛑 ORDER ABORTED: {e}")
+        except Exception as e:
+            logger.error(f"Processing Error: {e}")
+
+    async def process_batch(self, batch, feed):
+        """
+        Handle every signal of a burst. Signals for the same symbol stay in
+        arrival order on one lane; distinct symbols are evaluated concurrently,
+        at most MAX_CONCURRENT_SIGNALS at a time. Every blocking call goes
+        through self.calls, so the loop itself never waits on the kernel.
+        """
+        lanes = OrderedDict()
+        for signal in batch:
+            lanes.setdefault(signal.get('symbol'), []).append(signal)
+
+        slots = asyncio.Semaphore(MAX_CONCURRENT_SIGNALS)
+
+        async def run_lane(signals):
+            async with slots:
+                for signal in signals:
+                    await self._process_safely(signal)
+                    feed.mark_seen(signal.get('signal_id'))
+
+        if len(batch) > 1:
+            logger.info(f"📦 Burst of {len(batch)} signals across {len(lanes)} instruments")
+        await asyncio.gather(*(run_lane(signals) for signals in lanes.values()))
 
 if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Telegram -> Aegis controlled executor")
+    ap.add_argument("--standby", action="store_true",
+                    help="warm up fully, then take over as soon as no active executor is running")
+    args = ap.parse_args()
     executor = ControlledExecutor()
-    asyncio.run(executor.run())
+    asyncio.run(executor.run(standby=args.standby))
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import struct
+import hashlib
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"AEGDEDUP1"
+SNAPSHOT_HEADER = struct.Struct("<9sQ") # magic, key count
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data.encode(), digest_size=8).digest(), "little")
+
+def content_key(text, scope=""):
+    """Key for the message itself: case and whitespace don't make a new signal."""
+    return _hash64(f"C:{scope + ':' if scope else ''}" + " ".join(text.lower().split()))
+
+def signal_key(symbol, side, scope=""):
+    """Key for the trade idea: same instrument and direction (within a dedup scope)."""
+    return _hash64(f"S:{scope + ':' if scope else ''}{symbol}_{side}")
+
+class DedupIndex:
+    """
+    Set of 64-bit keys with per-key expiry, for de-duplicating signals.
+
+    Expiry uses a hashed timing wheel: every key is also filed under the
+    bucket (bucket_seconds wide) its expiry falls in, and expire() only walks
+    buckets whose time has passed, so adding, checking and expiring a key are
+    each O(1) amortized instead of a full scan. seen() compares the exact
+    expiry, so the bucket width only affects how soon memory is reclaimed.
+
+    With a snapshot_path the live keys are saved as two packed arrays
+    (16 bytes per key) and reloaded on startup, so a restart does not
+    forget what was already forwarded.
+    """
+    def __init__(self, bucket_seconds=1.0, snapshot_path=None):
+        self.bucket_seconds = bucket_seconds
+        self.snapshot_path = snapshot_path
+        self._expiry = {} # key -> expiry (unix time)
+        self._buckets = {} # bucket number -> keys expiring in it
+        self._next_bucket = None # Oldest bucket not yet expired
+        self.expired = 0
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def __contains__(self, key):
+        return self.seen(key)
+
+    def _bucket(self, ts):
+        return int(ts // self.bucket_seconds)
+
+    def seen(self, key, now=None):
+        expiry = self._expiry.get(key)
+        return expiry is not None and expiry > (time.time() if now is None else now)
+
+    def add(self, key, ttl, now=None):
+        """Remember key for ttl seconds (extending, never shortening, an existing entry)."""
+        expiry = (time.time() if now is None else now) + ttl
+        if self._expiry.get(key, 0) >= expiry:
+            return
+        self._expiry[key] = expiry
+        bucket = self._bucket(expiry)
+        keys = self._buckets.get(bucket)
+        if keys is None:
+            self._buckets[bucket] = keys = []
+        keys.append(key)
+        if self._next_bucket is None or bucket < self._next_bucket:
+            self._next_bucket = bucket
+
+    def expire(self, now=None):
+        """Drop keys whose expiry has passed; walks only the buckets that are due."""
+        if self._next_bucket is None:
+            return 0
+        now = time.time() if now is None else now
+        current = self._bucket(now)
+        if current - self._next_bucket > len(self._buckets):
+            due = sorted(b for b in self._buckets if b < current) # Long idle gap: skip empty buckets
+        else:
+            due = range(self._next_bucket, current)
+        dropped = 0
+        for bucket in due:
+            for key in self._buckets.pop(bucket, ()):
+                # Re-added keys are filed again under a later bucket
+                if key in self._expiry and self._expiry[key] <= now:
+                    del self._expiry[key]
+                    dropped += 1
+        self._next_bucket = current if self._buckets else None
+        self.expired += dropped
+        return dropped
+
+    # --- persistence ---
+    def dump(self, now=None):
+        """Serialize live keys; cheap enough to call on the event loop, write with save()."""
+        now = time.time() if now is None else now
+        keys, expiries = array("Q"), array("d")
+        for key, expiry in self._expiry.items():
+            if expiry > now:
+                keys.append(key)
+                expiries.append(expiry)
+        if sys.byteorder != "little":
+            keys.byteswap()
+            expiries.byteswap()
+        return SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(keys)) + keys.tobytes() + expiries.tobytes()
+
+    def save(self, blob=None):
+        blob = self.dump() if blob is None else blob
+        tmp = f"{self.snapshot_path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def load(self, now=None):
+        now = time.time() if now is None else now
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                blob = f.read()
+            magic, count = SNAPSHOT_HEADER.unpack_from(blob)
+            if magic != SNAPSHOT_MAGIC or len(blob) != SNAPSHOT_HEADER.size + 16 * count:
+                raise ValueError("bad header")
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"DEDUP: ignoring unreadable snapshot {self.snapshot_path} ({e})")
+            return 0
+        keys, expiries = array("Q"), array("d")
+        keys.frombytes(blob[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + 8 * count])
+        expiries.frombytes(blob[SNAPSHOT_HEADER.size + 8 * count:])
+        if sys.byteorder != "little":
+            keys.byteswap()
+            expiries.byteswap()
+        loaded = 0
+        for key, expiry in zip(keys, expiries):
+            if expiry > now:
+                self.add(key, expiry - now, now)
+                loaded += 1
+        logger.info(f"DEDUP: restored {loaded} keys from {self.snapshot_path}")
+        return loaded
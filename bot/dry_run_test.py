@@ -1,4 +1,4 @@
-from parser import parse_signal
+from parser import parse_signals
 import json
 
 def run_dry_run():
@@ -15,9 +15,8 @@ def run_dry_run():
     print("=== Aegis Signal Parser Dry-Run Validation ===\n")
     
     valid_count = 0
-    for i, msg in enumerate(samples, 1):
+    for i, (msg, result) in enumerate(zip(samples, parse_signals(samples)), 1):
         print(f"Sample {i}: {msg}")
-        result = parse_signal(msg)
         if result:
             print(f"✅ Parsed: {json.dumps(result, indent=2)}")
             valid_count += 1
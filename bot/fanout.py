@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import inspect
+from collections import Counter, deque
+from datetime import datetime
+import numpy as np
+from offloop import OffLoopCalls, CallTimeout
+
+logger = logging.getLogger(__name__)
+
+REASONS = ("OK", "DISABLED", "DAILY_LIMIT", "RISK_CAP", "CAPITAL_CAP")
+RATE_MARGIN = 0.05 # Seconds added to each broker's limit window for jitter between our clock and theirs
+
+class RateLimiter:
+    """
+    At most `rate` acquisitions in any `period`-second window, which is how
+    brokers state their order limits (a token bucket would allow a burst of
+    twice that across a window boundary). Waiters are served in order.
+    """
+    def __init__(self, rate, period=1.0):
+        self.rate = int(rate)
+        self.period = period
+        self.sent = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while len(self.sent) >= self.rate:
+                wait = self.sent[0] + self.period - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait) # May wake a hair early: re-check
+                else:
+                    self.sent.popleft()
+            self.sent.append(time.monotonic())
+
+class AccountBook:
+    """
+    Subscriber accounts held as columns, so sizing one signal for every
+    account is a handful of array operations instead of a Python loop.
+
+    Account fields: user_id, broker, max_risk_per_trade (INR), max_capital
+    (INR, default unlimited), max_lots (default 1), max_trades_per_day
+    (default 1) and auto_trading_enabled (default True).
+
+    With a journal_dir, each day's trade counts survive a restart: the
+    accounts a signal is sent to are journaled (trades-YYYY-MM-DD.jsonl,
+    fsync'd) before any order goes out, and the ones actually placed once
+    the brokers answer. Replaying the day counts the placed accounts, or
+    every account sent to if the process died before the answers.
+    """
+    def __init__(self, accounts, journal_dir=None):
+        self.ids = [a["user_id"] for a in accounts]
+        self.brokers = [a.get("broker", "paper") for a in accounts]
+        self.risk_cap = np.array([a["max_risk_per_trade"] for a in accounts], dtype=np.float64)
+        self.capital_cap = np.array([a.get("max_capital", np.inf) for a in accounts], dtype=np.float64)
+        self.max_lots = np.array([a.get("max_lots", 1) for a in accounts], dtype=np.int64)
+        self.max_trades = np.array([a.get("max_trades_per_day", 1) for a in accounts], dtype=np.int64)
+        self.enabled = np.array([a.get("auto_trading_enabled", True) for a in accounts], dtype=bool)
+        self.trades_today = np.zeros(len(accounts), dtype=np.int64)
+        self.day = datetime.now().strftime("%Y-%m-%d")
+        self.journal_dir = journal_dir
+        self._fd = None
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+            self._open_journal()
+
+    @classmethod
+    def load(cls, path, journal_dir=None):
+        with open(path, "r") as f:
+            return cls(json.load(f), journal_dir)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _open_journal(self):
+        """Replay today's journal into trades_today and keep it open for appends."""
+        if self._fd is not None:
+            os.close(self._fd)
+        path = os.path.join(self.journal_dir, f"trades-{self.day}.jsonl")
+        sent, placed = {}, {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue # Torn last line from a crash mid-write
+                    (placed if record.get("op") == "placed" else sent)[record["signal_id"]] = record["users"]
+        row = {user_id: i for i, user_id in enumerate(self.ids)}
+        for signal_id, users in sent.items():
+            for user_id in placed.get(signal_id, users):
+                if user_id in row:
+                    self.trades_today[row[user_id]] += 1
+        if sent:
+            logger.info(f"📣 FAN-OUT: {int(self.trades_today.sum())} trades already placed today ({len(sent)} signals)")
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def record(self, op, signal_id, rows):
+        """Journal the accounts (row indices) a signal was sent to or placed for."""
+        if self._fd is None:
+            return
+        line = json.dumps({"op": op, "signal_id": signal_id, "users": [self.ids[i] for i in rows],
+                           "ts": time.time()})
+        os.write(self._fd, (line + "\n").encode())
+        os.fsync(self._fd)
+
+    def roll_day(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today != self.day:
+            self.day = today
+            self.trades_today[:] = 0
+            if self.journal_dir:
+                self._open_journal()
+
+    def size(self, entry, sl, lot_size):
+        """Lots, risk (INR) and REASONS code per account for one signal."""
+        risk_per_lot = abs(entry - sl) * lot_size
+        cost_per_lot = entry * lot_size
+        by_risk = np.floor(self.risk_cap / risk_per_lot) if risk_per_lot > 0 else np.full(len(self), np.inf)
+        by_capital = np.floor(self.capital_cap / cost_per_lot) if cost_per_lot > 0 else np.full(len(self), np.inf)
+        reasons = np.select(
+            [~self.enabled | (self.max_lots < 1), self.trades_today >= self.max_trades, by_risk < 1, by_capital < 1],
+            [1, 2, 3, 4], 0
+        )
+        lots = np.minimum(np.minimum(by_risk, by_capital), self.max_lots)
+        lots = np.where(reasons == 0, lots, 0).astype(np.int64)
+        return lots, lots * risk_per_lot, reasons
+
+class FanOutEngine:
+    """
+    Executes one approved signal for every subscriber account.
+
+    Sizing is one vectorized AccountBook.size() call. Orders then go out
+    concurrently through brokers[name], a place_order(user_id, **order)
+    callable: coroutine functions are awaited, plain functions run on an
+    OffLoopCalls pool. Each broker has its own RateLimiter (rates[name]
+    orders/sec, unlimited if absent) and at most `concurrency` orders in
+    flight; every order has order_timeout seconds. The pool gets a thread
+    per in-flight order, so a blocking call starts as soon as its rate
+    slot is granted. The book's trade journal is written on the same pool.
+
+    execute() returns a report with one result per account and the wall
+    clock from approval to the last broker answer.
+    """
+    def __init__(self, book, brokers, rates=None, concurrency=32, order_timeout=10):
+        self.book = book
+        self.brokers = brokers
+        self.limiters = {name: RateLimiter(rate, period=1.0 + RATE_MARGIN) for name, rate in (rates or {}).items()}
+        self.slots = {name: asyncio.Semaphore(concurrency) for name in brokers}
+        self.order_timeout = order_timeout
+        self.calls = OffLoopCalls(max_workers=concurrency * max(1, len(brokers)), name="aegis-fanout")
+
+    async def _place(self, i, order, halted):
+        user_id, broker = self.book.ids[i], self.book.brokers[i]
+        place_order = self.brokers.get(broker)
+        if place_order is None:
+            return {"status": "FAILED", "reason": f"no adapter for broker {broker}"}
+        limiter = self.limiters.get(broker)
+        async with self.slots[broker]:
+            if limiter is not None:
+                await limiter.acquire()
+            if halted is not None and halted():
+                return {"status": "ABORTED", "reason": "PANIC"}
+            start = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(place_order):
+                    ack = await asyncio.wait_for(place_order(user_id, **order), self.order_timeout)
+                else:
+                    ack = await self.calls.call(broker, place_order, user_id, timeout=self.order_timeout, **order)
+            except (asyncio.TimeoutError, CallTimeout):
+                return {"status": "TIMEOUT", "reason": f"no answer within {self.order_timeout}s"}
+            except Exception as e:
+                return {"status": "FAILED", "reason": repr(e)}
+            result = {"latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+            if isinstance(ack, dict) and ack.get("status") not in (None, "SUCCESS"):
+                result.update(status="REJECTED", reason=ack.get("reason") or ack.get("status"))
+            else:
+                result.update(status="PLACED", order_id=ack.get("order_id") if isinstance(ack, dict) else ack)
+            return result
+
+    async def execute(self, signal_id, symbol, side, entry, sl, lot_size, approved_at=None, halted=None):
+        """Fan one approved signal out. approved_at is a time.perf_counter() stamp (default now)."""
+        approved_at = time.perf_counter() if approved_at is None else approved_at
+        self.book.roll_day()
+        lots, risk, reasons = self.book.size(entry, sl, lot_size)
+        sized_at = time.perf_counter()
+
+        targets = np.flatnonzero(lots)
+        if self.book.journal_dir:
+            # Durable before any order goes out; the fsync runs on the pool, not the loop
+            await self.calls.call("journal", self.book.record, "sent", signal_id, targets,
+                                  timeout=self.order_timeout)
+        outcomes = await asyncio.gather(*(
+            self._place(i, {"symbol": symbol, "side": side, "quantity": int(lots[i]) * lot_size, "price": entry,
+                            "tag": signal_id}, halted)
+            for i in targets
+        ))
+        done_at = time.perf_counter()
+
+        results = [{"user_id": self.book.ids[i], "broker": self.book.brokers[i], "lots": 0, "status": "SKIPPED",
+                    "reason": REASONS[reasons[i]]} for i in range(len(self.book))]
+        placed = []
+        for i, outcome in zip(targets, outcomes):
+            results[i].update({"lots": int(lots[i]), "risk": float(risk[i]), "reason": None, **outcome})
+            if outcome["status"] == "PLACED":
+                placed.append(i)
+        self.book.trades_today[placed] += 1
+        if self.book.journal_dir:
+            self.calls.spawn("journal", self.book.record, "placed", signal_id, placed, timeout=self.order_timeout)
+
+        statuses = Counter(r["status"] for r in results)
+        report = {
+            "signal_id": signal_id,
+            "accounts": len(self.book),
+            "statuses": dict(statuses),
+            "skipped": dict(Counter(r["reason"] for r in results if r["status"] == "SKIPPED")),
+            "total_lots": int(lots[placed].sum()),
+            "total_risk": float(risk[placed].sum()),
+            "sizing_ms": round((sized_at - approved_at) * 1000, 3),
+            "wall_clock_ms": round((done_at - approved_at) * 1000, 1),
+            "results": results
+        }
+        logger.info(f"📣 FAN-OUT {signal_id}: {statuses['PLACED']}/{len(targets)} orders placed "
+                    f"({len(self.book) - len(targets)} skipped) in {report['wall_clock_ms']}ms")
+        return report
+
+    async def close(self):
+        await self.calls.close()
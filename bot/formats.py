@@ -0,0 +1,152 @@
+import time
+import logging
+from parser import parse_signal, parse_strict
+
+logger = logging.getLogger(__name__)
+
+def fold(text):
+    """
+    Lower-case for keyword checks, with the non-ASCII letters that the
+    parsers' case-insensitive matching treats as ASCII (parser.CASE_FOLD)
+    mapped too. Not length-preserving; str.translate would be, at ~8x the cost.
+    """
+    if text.isascii():
+        return text.lower()
+    return text.replace("\u0130", "i").lower().replace("\u0131", "i").replace("\u017f", "s")
+
+class SignalFormat:
+    """
+    One message format: its parser plus a fingerprint that every message the
+    parser could accept is guaranteed to have. `keywords` is a list of
+    requirements, each a word or a tuple of alternatives, tested as
+    substrings of the case-folded text; `prefix` must open the message.
+    A fingerprint may let chatter through (that only costs a parse) but must
+    never turn away a message the parser would have accepted.
+    """
+    def __init__(self, name, parse, keywords=(), prefix=None):
+        self.name = name
+        self.parse = parse
+        self.requirements = [(k,) if isinstance(k, str) else tuple(k) for k in keywords]
+        self.prefix = prefix.lower() if prefix else None
+        self.calls = 0
+        self.parsed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.ns = 0
+
+    def matches(self, folded):
+        if self.prefix is not None and not folded.lstrip().startswith(self.prefix):
+            return False
+        for options in self.requirements:
+            for k in options:
+                if k in folded:
+                    break
+            else:
+                return False
+        return True
+
+class FormatRegistry:
+    """
+    Dispatches each message only to the formats whose fingerprint it has.
+    The text is folded once and every format's fingerprint is checked
+    against it, so a message no format could want (most channel chatter)
+    costs a few substring checks and never reaches a parser.
+
+    parse() tries the matching formats in the order given and returns the
+    first PARSED result, else the first REJECTED one, else None. Per-format
+    calls, results and time are kept for stats().
+    """
+    def __init__(self):
+        self.formats = {}
+        self.messages = 0
+        self.chatter = 0
+        self.prefilter_ns = 0
+
+    def register(self, name, parse, keywords=(), prefix=None):
+        if name in self.formats:
+            raise ValueError(f"Signal format {name!r} is already registered")
+        fmt = SignalFormat(name, parse, keywords, prefix)
+        self.formats[name] = fmt
+        return fmt
+
+    def parse(self, text, formats=None):
+        """Parse with every registered format, or only `formats` (SignalFormat objects, see parser())."""
+        if not text:
+            return None
+        self.messages += 1
+        start = time.perf_counter_ns()
+        folded = fold(text)
+        candidates = [fmt for fmt in (self.formats.values() if formats is None else formats) if fmt.matches(folded)]
+        self.prefilter_ns += time.perf_counter_ns() - start
+        if not candidates:
+            self.chatter += 1
+            return None
+
+        rejection = None
+        for fmt in candidates:
+            fmt.calls += 1
+            start = time.perf_counter_ns()
+            try:
+                result = fmt.parse(text)
+            except Exception as e:
+                fmt.errors += 1
+                logger.warning(f"PARSE: {fmt.name} failed on {text[:30]!r}: {e!r}")
+                result = None
+            fmt.ns += time.perf_counter_ns() - start
+            if not result:
+                continue
+            if result.get("status") == "REJECTED":
+                fmt.rejected += 1
+                rejection = rejection or result
+                continue
+            fmt.parsed += 1
+            return result
+        return rejection
+
+    def parser(self, formats):
+        """A parse_signal-style callable restricted to `formats`, in that order."""
+        for name in formats:
+            if name not in self.formats:
+                raise ValueError(f"Unknown signal format {name!r}")
+        formats = tuple(self.formats[name] for name in formats)
+        return lambda text: self.parse(text, formats)
+
+    def stats(self):
+        return {
+            "messages": self.messages,
+            "chatter": self.chatter,
+            "prefilter_us": round(self.prefilter_ns / 1000 / self.messages, 3) if self.messages else 0.0,
+            "formats": {
+                fmt.name: {
+                    "calls": fmt.calls,
+                    "parsed": fmt.parsed,
+                    "rejected": fmt.rejected,
+                    "errors": fmt.errors,
+                    "hit_rate": round(fmt.parsed / fmt.calls, 4) if fmt.calls else 0.0,
+                    "us_per_call": round(fmt.ns / 1000 / fmt.calls, 3) if fmt.calls else 0.0
+                } for fmt in self.formats.values()
+            }
+        }
+
+    def format(self):
+        s = self.stats()
+        formats = ", ".join(f"{name} {f['parsed']}/{f['calls']} parsed ({f['us_per_call']:.1f}us)"
+                            for name, f in s["formats"].items())
+        return (f"{s['messages']} msgs, {s['chatter']} chatter dropped by prefilter ({s['prefilter_us']:.2f}us) | "
+                f"{formats}")
+
+# Heuristic: every symbol it recognises ends in CE or PE.
+# Strict: "SYMBOL buy|sell PRICE sl PRICE tgt PRICE[/PRICE]".
+registry = FormatRegistry()
+registry.register("heuristic", parse_signal, keywords=[("ce", "pe")])
+registry.register("strict", parse_strict, keywords=[("buy", "sell"), "sl", "tgt"])
+
+# Profiles a channel or bot can name: formats tried, in order
+PROFILES = {
+    "default": ("heuristic",),
+    "strict": ("strict",),
+    "any": ("heuristic", "strict"),
+}
+
+def parser_for(profile):
+    return registry.parser(PROFILES[profile])
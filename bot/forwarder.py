@@ -0,0 +1,144 @@
+import json
+import asyncio
+import logging
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 425, 429} # 4xx answers that mean "try again later", not "never"
+
+class ForwardResponse:
+    """
+    Minimal requests.Response look-alike so callers keep their status/text/json() handling.
+    """
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+class SignalForwarder:
+    """
+    Async client for the backend ingest endpoint.
+    One keep-alive connection pool per process, a semaphore bounding requests in
+    flight, and a per-request deadline covering both the wait for a slot and the
+    round-trip itself. Never blocks the event loop.
+    """
+    def __init__(self, endpoint, api_key, source="TELEGRAM", timeout=10, max_concurrency=8, keepalive=60):
+        self.endpoint = endpoint
+        self.headers = {
+            "x-api-key": api_key,
+            "x-source": source,
+            "Content-Type": "application/json"
+        }
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.keepalive = keepalive
+        self._session = None
+        self._slots = None
+
+    def _ensure_session(self):
+        # Created lazily: aiohttp sessions must be built inside the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=self.keepalive)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _post(self, url, payload):
+        session = self._ensure_session()
+        async with self._slots:
+            async with session.post(url, data=json.dumps(payload)) as res:
+                return ForwardResponse(res.status, await res.text())
+
+    async def send(self, payload, timeout=None, url=None):
+        """
+        POST payload as JSON (to `url`, default the ingest endpoint). Raises
+        asyncio.TimeoutError once the deadline passes and aiohttp.ClientError on
+        connection failures, like requests.post would.
+        """
+        return await asyncio.wait_for(self._post(url or self.endpoint, payload), timeout or self.timeout)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+class SignalBatcher:
+    """
+    Coalesces concurrent submits into one POST to the bulk ingest endpoint.
+    A batch is sent when it reaches max_batch signals or max_delay seconds after
+    its first signal, whichever comes first. Each caller gets its own item's
+    result back as a ForwardResponse, so single and bulk paths log identically.
+
+    Bulk contract (POST {bulk_endpoint}):
+        request:  {"signals": [payload, ...]}
+        response: {"status": "success", "results": [
+                      {"id": ..., "status": "success", "signal_id": ...} |
+                      {"id": ..., "status": "rejected", "reason": ...}, ...]}
+        results are in request order, one per signal.
+
+    A non-200 bulk answer below 500 (malformed batch, bad key) is final:
+    every caller gets that response, so outboxes ack it instead of retrying
+    it forever. 5xx, RETRYABLE_STATUS, timeouts and connection errors raise,
+    and the signals stay queued for retry.
+    """
+    def __init__(self, forwarder, bulk_endpoint, max_batch=50, max_delay=0.05):
+        self.forwarder = forwarder
+        self.bulk_endpoint = bulk_endpoint
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+        self._flushes = set()
+
+    async def submit(self, payload):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush_now)
+        return await future
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _send_batch(self, batch):
+        try:
+            res = await self.forwarder.send({"signals": [payload for payload, _ in batch]}, url=self.bulk_endpoint)
+            if res.status_code >= 500 or res.status_code in RETRYABLE_STATUS:
+                raise RuntimeError(f"Bulk ingest failed ({res.status_code}): {res.text[:200]}")
+            if res.status_code != 200:
+                logger.error(f"BULK: batch of {len(batch)} refused ({res.status_code}), not retrying: {res.text[:200]}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(ForwardResponse(res.status_code, res.text))
+                return
+            results = res.json().get("results", [])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Bulk ingest returned {len(results)} results for {len(batch)} signals")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), item in zip(batch, results):
+            if not future.done():
+                status = 200 if item.get("status") == "success" else 400
+                future.set_result(ForwardResponse(status, json.dumps(item)))
+
+    async def flush(self):
+        """Send whatever is pending and wait for every in-flight batch."""
+        self._flush_now()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
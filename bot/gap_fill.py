@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+FETCH_CHUNK = 100 # Message ids per get_messages request (Telegram's maximum)
+
+class GapTracker:
+    """
+    Remembers the highest message id handled per chat and fills holes.
+
+    Every message goes through seen() as it arrives, before it is queued, so
+    messages still waiting in the pipeline never look like a gap. watch() notices reconnects
+    (client.is_connected() going False -> True) and, every interval seconds,
+    compares our high-water mark with the channel head; either way catch_up()
+    fetches the missing id range in FETCH_CHUNK slices, `concurrency` requests
+    at a time, and hands each message to on_message(message) in id order.
+    At most max_fill of the newest missing messages are fetched and the whole
+    catch-up is bounded by timeout seconds.
+
+    High-water marks are persisted to path, so a restart fills the gap since
+    the previous run the same way.
+    """
+    def __init__(self, client, path, on_message, concurrency=4, max_fill=500, timeout=30):
+        self.client = client
+        self.path = path
+        self.on_message = on_message
+        self.concurrency = concurrency
+        self.max_fill = max_fill
+        self.timeout = timeout
+        self.last_ids = {}
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self.last_recovery = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.last_ids = {int(k): v for k, v in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                logger.warning(f"GAP: unreadable high-water file ({e}), starting fresh")
+
+    def seen(self, chat_id, msg_id):
+        if msg_id > self.last_ids.get(chat_id, 0):
+            self.last_ids[chat_id] = msg_id
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.last_ids, f)
+        os.replace(tmp, self.path)
+
+    async def _fetch(self, chat, ids, slots):
+        async with slots:
+            return await self.client.get_messages(chat, ids=ids)
+
+    async def catch_up(self, chat, reason, head=None):
+        """Fetch and hand on everything after our high-water mark. Returns the recovery report."""
+        async with self._lock:
+            chat_id = await self.client.get_peer_id(chat)
+            if head is None:
+                latest = await self.client.get_messages(chat, limit=1)
+                head = latest[0].id if latest else 0
+            last = self.last_ids.get(chat_id)
+            if last is None:
+                # Nothing to compare against yet: start tracking from the head
+                self.seen(chat_id, head)
+                return None
+            if head <= last:
+                return None
+
+            start = time.monotonic()
+            first = max(last + 1, head - self.max_fill + 1)
+            skipped = first - (last + 1)
+            ids = list(range(first, head + 1))
+            slots = asyncio.Semaphore(self.concurrency)
+            chunks = [ids[i:i + FETCH_CHUNK] for i in range(0, len(ids), FETCH_CHUNK)]
+            try:
+                pages = await asyncio.wait_for(
+                    asyncio.gather(*(self._fetch(chat, chunk, slots) for chunk in chunks)), self.timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"GAP: catch-up of #{first}-#{head} timed out after {self.timeout}s")
+                return None
+            fetched_ms = (time.monotonic() - start) * 1000
+
+            recovered = 0
+            for page in pages:
+                for message in page:
+                    if message is None:
+                        continue # Deleted, or a service message id
+                    await self.on_message(message)
+                    recovered += 1
+            self.seen(chat_id, head)
+            self.save()
+
+            report = {
+                "reason": reason,
+                "range": (first, head),
+                "recovered": recovered,
+                "skipped": skipped,
+                "fetch_ms": round(fetched_ms, 1),
+                "total_ms": round((time.monotonic() - start) * 1000, 1)
+            }
+            self.last_recovery = report
+            logger.info(f"🔁 GAP RECOVERED ({reason}): {recovered} msgs in #{first}-#{head} | "
+                        f"fetch {report['fetch_ms']}ms, handed on in {report['total_ms']}ms"
+                        + (f" | {skipped} older msgs beyond max_fill skipped" if skipped else ""))
+            return report
+
+    async def watch(self, chat, interval=30, tick=1.0):
+        """Catch up after every reconnect, and every interval seconds in case a drop went unnoticed."""
+        connected = self.client.is_connected()
+        down_since = None
+        next_check = time.monotonic() + interval
+        while True:
+            await asyncio.sleep(tick)
+            now_connected = self.client.is_connected()
+            try:
+                if not now_connected:
+                    if connected:
+                        down_since = time.monotonic()
+                        logger.warning("GAP: Telegram connection lost")
+                elif not connected:
+                    outage = time.monotonic() - down_since if down_since else 0
+                    await self.catch_up(chat, f"reconnect after {outage:.1f}s")
+                    next_check = time.monotonic() + interval
+                elif time.monotonic() >= next_check:
+                    await self.catch_up(chat, "periodic check")
+                    next_check = time.monotonic() + interval
+                self.save()
+            except Exception as e:
+                logger.error(f"GAP: catch-up failed: {e!r}")
+            connected = now_connected
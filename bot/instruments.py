@@ -0,0 +1,269 @@
+import os
+import re
+import csv
+import sys
+import mmap
+import time
+import zlib
+import struct
+import logging
+from collections import namedtuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENT_INDEX = os.environ.get(
+    "AEGIS_INSTRUMENT_INDEX",
+    os.path.join(os.environ.get("AEGIS_TELEGRAM_DIR", "/opt/aegis-saas/telegram"), "instruments.idx")
+)
+MAGIC = b"AEGINST2"
+HEADER = struct.Struct("<8sIII") # magic, built (yyyymmdd), entries, slots
+# crc32(key), key offset, tradingsymbol offset, underlying offset, key len, tradingsymbol len,
+# underlying len, expiry (yyyymmdd), lot size, instrument token, strike, tick size, exchange code,
+# instrument type code
+SLOT = struct.Struct("<IIIIHHHIIIddBB")
+EXCHANGES = ("NFO", "BFO", "NSE", "BSE", "MCX", "CDS")
+OPTION_TYPES = ("CE", "PE")
+KINDS = ("FUT",) + OPTION_TYPES
+TRADINGSYMBOL_PREFIX = "#" # Keys of exact-contract entries, e.g. "#NIFTY26JAN21500CE"
+REFRESH_INTERVAL = 5.0 # Seconds between checks for a rebuilt index file
+
+# Parser symbols: "SENSEX 83400 CE", "NIFTY22000PE" (tradingsymbols such as
+# "NIFTY26JAN21500CE" are looked up as they are first)
+SYMBOL_RE = re.compile(r'^([A-Z]+)\s*(\d+(?:\.\d+)?)\s*(CE|PE)$')
+
+Instrument = namedtuple("Instrument", "tradingsymbol exchange underlying strike option_type expiry lot_size tick_size instrument_token")
+
+def _strike_key(strike):
+    strike = float(strike)
+    return str(int(strike)) if strike.is_integer() else repr(strike)
+
+def option_key(underlying, strike, option_type):
+    return f"{underlying}|{_strike_key(strike)}|{option_type}"
+
+def tradingsymbol_key(tradingsymbol):
+    return TRADINGSYMBOL_PREFIX + tradingsymbol.replace(" ", "").upper()
+
+def _ymd(date_str):
+    return int(date_str.replace("-", "")) if date_str else 0
+
+def _iso(ymd):
+    return f"{ymd // 10000:04d}-{ymd // 100 % 100:02d}-{ymd % 100:02d}" if ymd else None
+
+def build_index(csv_path, index_path=INSTRUMENT_INDEX, today=None):
+    """
+    Build the index from a Kite-format instrument dump (instrument_token,
+    tradingsymbol, name, expiry, strike, tick_size, lot_size, instrument_type,
+    exchange, ...). Per (underlying, strike, CE/PE) the nearest expiry on or
+    after `today` wins; each underlying also gets an entry for its nearest
+    contract, for lot-size lookups, and every unexpired contract is keyed
+    by its tradingsymbol too. Written atomically: readers that mapped the
+    previous file keep it until they refresh.
+    """
+    today = _ymd(today or datetime.now().strftime("%Y-%m-%d"))
+    entries = {}
+
+    def offer(key, row):
+        current = entries.get(key)
+        if current is None or row["expiry"] < current["expiry"]:
+            entries[key] = row
+
+    rows = 0
+    with open(csv_path, "r", newline="") as f:
+        for raw in csv.DictReader(f):
+            rows += 1
+            kind = raw["instrument_type"]
+            expiry = _ymd(raw["expiry"])
+            if kind not in OPTION_TYPES + ("FUT",) or expiry < today or raw["exchange"] not in EXCHANGES:
+                continue
+            row = {
+                "tradingsymbol": raw["tradingsymbol"],
+                "underlying": raw["name"].strip().upper(),
+                "kind": KINDS.index(kind),
+                "exchange": EXCHANGES.index(raw["exchange"]),
+                "expiry": expiry,
+                "lot_size": int(float(raw["lot_size"])),
+                "tick_size": float(raw["tick_size"]),
+                "token": int(raw["instrument_token"]),
+                "strike": float(raw["strike"] or 0),
+            }
+            offer(row["underlying"], row)
+            offer(tradingsymbol_key(row["tradingsymbol"]), row)
+            if kind in OPTION_TYPES:
+                offer(option_key(row["underlying"], row["strike"], kind), row)
+
+    slots = 1 << max(4, (len(entries) * 2 - 1).bit_length()) # Load factor <= 0.5
+    mask = slots - 1
+    table = bytearray(slots * SLOT.size)
+    strings = bytearray()
+    used = bytearray(slots)
+    for key, row in entries.items():
+        key_bytes = key.encode()
+        symbol_bytes = row["tradingsymbol"].encode()
+        name_bytes = row["underlying"].encode()
+        crc = zlib.crc32(key_bytes)
+        i = crc & mask
+        while used[i]:
+            i = (i + 1) & mask
+        used[i] = 1
+        key_off = len(strings)
+        strings += key_bytes
+        symbol_off = len(strings)
+        strings += symbol_bytes
+        name_off = len(strings)
+        strings += name_bytes
+        SLOT.pack_into(table, i * SLOT.size, crc, key_off, symbol_off, name_off, len(key_bytes), len(symbol_bytes),
+                       len(name_bytes), row["expiry"], row["lot_size"], row["token"], row["strike"],
+                       row["tick_size"], row["exchange"], row["kind"])
+
+    tmp = f"{index_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, today, len(entries), slots))
+        f.write(table)
+        f.write(strings)
+    os.replace(tmp, index_path)
+    logger.info(f"🗂️ Instrument index: {len(entries)} entries from {rows} rows -> {index_path}")
+    return len(entries)
+
+class InstrumentIndex:
+    """
+    Read-only view of a built index, memory-mapped so every process on the
+    host shares one copy through the page cache and nothing is parsed at
+    load. Lookups hash the key into an open-addressing table in the map: one
+    crc32 plus a probe or two. Results are memoized per process, which makes
+    a repeated resolve() a dict hit.
+
+    A missing index is not an error: loaded stays False and every lookup
+    returns None until the file appears. The file is re-checked every
+    REFRESH_INTERVAL seconds, so a daily rebuild is picked up without a
+    restart. Contracts that have expired since the build are never returned.
+    """
+    def __init__(self, path=INSTRUMENT_INDEX):
+        self.path = path
+        self.loaded = False
+        self.built = None
+        self._mm = None
+        self._identity = None
+        self._cache = {}
+        self._symbols = {}
+        self._today = None
+        self._next_check = 0.0
+        self.refresh()
+
+    def refresh(self):
+        """Map the file if it is new or was rebuilt. Returns True if it (re)loaded."""
+        self._next_check = time.monotonic() + REFRESH_INTERVAL
+        today = int(datetime.now().strftime("%Y%m%d"))
+        if today != self._today:
+            self._today = today
+            self._cache, self._symbols = {}, {} # Yesterday's answers may have expired
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if identity == self._identity:
+            return False
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, built, count, slots = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            logger.error(f"INSTRUMENTS: {self.path} is not an instrument index (or an older format) - rebuild it")
+            return False
+        # The previous map is left to the GC: a lookup on another thread may still hold it
+        self._mm, self._identity, self._mask = mm, identity, slots - 1
+        self._strings = HEADER.size + slots * SLOT.size
+        self._cache, self._symbols = {}, {}
+        self.built = _iso(built)
+        self.count = count
+        self.loaded = True
+        if built < self._today:
+            logger.warning(f"INSTRUMENTS: index built {self.built} is stale - rebuild it from today's dump")
+        return True
+
+    def _find(self, key):
+        mm = self._mm
+        key_bytes = key.encode()
+        crc = zlib.crc32(key_bytes)
+        i = crc & self._mask
+        while True:
+            rec = SLOT.unpack_from(mm, HEADER.size + i * SLOT.size)
+            if rec[4] == 0:
+                return None # Empty slot: not in the table
+            if rec[0] == crc and mm[self._strings + rec[1]:self._strings + rec[1] + rec[4]] == key_bytes:
+                return rec
+            i = (i + 1) & self._mask
+
+    def _lookup(self, key):
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        found = None
+        if self.loaded:
+            rec = self._find(key)
+            if rec is not None and rec[7] >= self._today:
+                symbol_start, name_start = self._strings + rec[2], self._strings + rec[3]
+                option_type = KINDS[rec[13]] if KINDS[rec[13]] in OPTION_TYPES else None
+                found = Instrument(
+                    self._mm[symbol_start:symbol_start + rec[5]].decode(), EXCHANGES[rec[12]],
+                    self._mm[name_start:name_start + rec[6]].decode(), rec[10] if option_type else None,
+                    option_type, _iso(rec[7]), rec[8], rec[11], rec[9]
+                )
+        self._cache[key] = found
+        return found
+
+    def option(self, underlying, strike, option_type):
+        """Nearest-expiry contract for UNDERLYING STRIKE CE/PE, or None."""
+        return self._lookup(option_key(underlying, strike, option_type))
+
+    def underlying(self, name):
+        """Nearest-expiry derivative of an underlying (lot size, exchange), or None."""
+        return self._lookup(name)
+
+    def contract(self, tradingsymbol):
+        """The contract with this exact tradingsymbol (e.g. NIFTY26JAN21500CE), or None."""
+        return self._lookup(tradingsymbol_key(tradingsymbol))
+
+    def resolve(self, symbol):
+        """
+        Contract for a parser symbol: a tradingsymbol such as 'NIFTY26JAN21500CE'
+        (the strict format), else 'SENSEX 83400 CE' (nearest expiry). None if neither.
+        """
+        if time.monotonic() < self._next_check:
+            hit = self._symbols.get(symbol)
+            if hit is not None or not self.loaded:
+                return hit
+        found = self.contract(symbol)
+        if found is None:
+            match = SYMBOL_RE.match(symbol.strip().upper())
+            if not match:
+                return None
+            found = self.option(*match.groups())
+        if found is not None:
+            self._symbols[symbol] = found
+        return found
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    ap = argparse.ArgumentParser(description="Build or query the memory-mapped instrument index")
+    ap.add_argument("--index", default=INSTRUMENT_INDEX)
+    sub = ap.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build the index from a Kite instrument dump (CSV)")
+    build.add_argument("csv")
+    build.add_argument("--date", help="resolve expiries from this day (YYYY-MM-DD), default today")
+    lookup = sub.add_parser("lookup", help="resolve parser symbols, e.g. 'NIFTY 22000 CE'")
+    lookup.add_argument("symbols", nargs="+")
+    args = ap.parse_args()
+
+    if args.command == "build":
+        build_index(args.csv, args.index, args.date)
+    else:
+        index = InstrumentIndex(args.index)
+        if not index.loaded:
+            sys.exit(f"No instrument index at {args.index}")
+        for symbol in args.symbols:
+            print(f"{symbol}: {index.resolve(symbol)}")
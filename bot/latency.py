@@ -0,0 +1,137 @@
+import math
+import time
+import uuid
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+MIN_SECONDS = 1e-5 # 10us: anything faster lands in the first bucket
+MAX_SECONDS = 3600.0
+GROWTH = 1.04 # Bucket width ratio, i.e. quantiles are within ~4%
+QUANTILES = (0.5, 0.99, 0.999)
+METRIC_NAME = "aegis_stage_latency_seconds"
+
+class Histogram:
+    """
+    Fixed log-scale histogram: record() is one log() and a list increment,
+    memory is ~500 ints regardless of how many samples it has seen.
+    """
+    _log_growth = math.log(GROWTH)
+    size = int(math.log(MAX_SECONDS / MIN_SECONDS) / math.log(GROWTH)) + 2
+
+    def __init__(self):
+        self.counts = [0] * self.size
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, seconds):
+        if seconds <= MIN_SECONDS:
+            i = 0
+        else:
+            i = min(self.size - 1, int(math.log(seconds / MIN_SECONDS) / self._log_growth) + 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                # Upper bound of the bucket, so we never under-report
+                return MIN_SECONDS * GROWTH ** i
+        return MAX_SECONDS
+
+class LatencyRecorder:
+    """Per-stage histograms, safe to record into from the loop and worker threads."""
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        if seconds < 0:
+            return # Clock skew between hosts; not a real measurement
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                self.stages[stage] = hist = Histogram()
+            hist.record(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {"count": h.count, "sum": h.sum, **{str(q): h.quantile(q) for q in QUANTILES}}
+                for name, h in self.stages.items()
+            }
+
+    def render(self):
+        """Prometheus text exposition format (summary per stage)."""
+        lines = [f"# HELP {METRIC_NAME} Time spent per signal stage.", f"# TYPE {METRIC_NAME} summary"]
+        for name, s in sorted(self.snapshot().items()):
+            label = f'stage="{self.prefix}{name}"'
+            for q in QUANTILES:
+                lines.append(f'{METRIC_NAME}{{{label},quantile="{q}"}} {s[str(q)]:.6f}')
+            lines.append(f"{METRIC_NAME}_sum{{{label}}} {s['sum']:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{label}}} {s['count']}")
+        return "\n".join(lines) + "\n"
+
+    def format(self):
+        return " | ".join(
+            f"{name}: p50 {s['0.5'] * 1000:.1f}ms p99 {s['0.99'] * 1000:.1f}ms ({s['count']})"
+            for name, s in sorted(self.snapshot().items())
+        )
+
+    async def serve(self, host="127.0.0.1", port=9464, extra=()):
+        """
+        Expose GET /metrics on the running loop. Returns the aiohttp runner.
+        `extra` render() callables are appended to the exposition.
+        """
+        from aiohttp import web
+
+        async def metrics(request):
+            text = self.render() + "".join(render() for render in extra)
+            return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"📈 Latency metrics on http://{host}:{port}/metrics")
+        return runner
+
+def new_trace(origin_ts=None):
+    """Trace carried in payload metadata: an id plus wall-clock stamps per stage."""
+    trace = {"id": uuid.uuid4().hex[:16], "t": {}}
+    if origin_ts is not None:
+        trace["t"]["message"] = origin_ts
+    return trace
+
+def stamp(trace, stage, recorder=None, since=None, ts=None):
+    """
+    Mark `stage` on the trace at wall-clock time ts (default now). With a
+    recorder, also record the time since the trace's `since` mark, or since
+    its latest mark.
+    """
+    ts = time.time() if ts is None else ts
+    marks = trace["t"]
+    if recorder is not None and marks:
+        start = marks.get(since) if since else max(marks.values())
+        if start is not None:
+            recorder.record(stage, ts - start)
+    marks[stage] = ts
+    return ts
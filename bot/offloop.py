@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import functools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class CallTimeout(Exception):
+    """A blocking call did not finish within its timeout."""
+
+class OffLoopCalls:
+    """
+    Runs blocking calls (kernel, broker, HTTP, alerts) on a bounded thread
+    pool so the event loop keeps polling and watching for PANIC.
+
+    call() awaits the result with a per-call timeout. A timed-out call keeps
+    its pool thread until it returns - Python threads can't be killed - but
+    the caller moves on, and the pool bound keeps a hung dependency from
+    piling up threads. spawn() is call() as a background task for fire-and-
+    forget work such as alerts.
+    """
+    def __init__(self, max_workers=8, name="aegis-call"):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.calls = Counter()
+        self.timeouts = Counter()
+        self.errors = Counter()
+        self._background = set()
+
+    async def call(self, name, fn, *args, timeout=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        self.calls[name] += 1
+        future = loop.run_in_executor(self.pool, functools.partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts[name] += 1
+            raise CallTimeout(f"{name} did not return within {timeout}s") from None
+        except Exception:
+            self.errors[name] += 1
+            raise
+
+    def spawn(self, name, fn, *args, timeout=None, **kwargs):
+        async def run():
+            try:
+                await self.call(name, fn, *args, timeout=timeout, **kwargs)
+            except Exception as e:
+                logger.error(f"{name} failed: {e!r}")
+
+        task = asyncio.create_task(run(), name=name)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def stats(self):
+        return {name: {"calls": n, "timeouts": self.timeouts[name], "errors": self.errors[name]}
+                for name, n in self.calls.items()}
+
+    async def close(self, timeout=5):
+        if self._background:
+            await asyncio.wait(list(self._background), timeout=timeout)
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+
+class Outbox:
+    """
+    Append-only on-disk outbox for signal payloads.
+
+    Every payload is appended as a "put" record before it is sent and an "ack"
+    record once the backend has given a definitive answer. Records are single
+    unbuffered os.write() calls, so they survive a process crash as soon as put()
+    returns; sync() fsyncs for power-loss safety and runs off the hot path in
+    drain(). On startup all segments are replayed and whatever was never acked
+    is pending again. Once the active segment outgrows segment_bytes (or twice
+    the backlog it started with), drain() compacts: pending payloads are copied
+    into a fresh segment and the old ones are deleted.
+
+    Each put records its wall-clock time; with max_age, drain() expires
+    payloads queued longer ago than that instead of sending them late.
+    """
+    def __init__(self, directory, segment_bytes=8 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending = {} # id -> payload, insertion ordered
+        self._in_flight = set() # ids currently being sent by someone
+        self._retry_at = {} # id -> (attempts, monotonic due time)
+        self._queued_at = {} # id -> wall-clock time of the put
+        self._dirty = False
+
+        segments = self._segments()
+        for seq in segments:
+            complete = self._replay(self._path(seq))
+        self._seq = segments[-1] if segments else 0
+        if segments and complete < os.path.getsize(self._path(self._seq)):
+            # A crash left half a record: cut it off, or the next put would be appended onto it and lost too
+            logger.warning(f"OUTBOX: dropping a torn record at the end of {self._path(self._seq)}")
+            os.truncate(self._path(self._seq), complete)
+        self._fd = self._open(self._seq)
+        self._size = os.fstat(self._fd).st_size
+        self._roll_at = max(self.segment_bytes, 2 * self._size)
+        if self._pending:
+            logger.warning(f"OUTBOX: {len(self._pending)} unacked signals recovered from {directory}")
+
+    # --- segment files ---
+    def _path(self, seq):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+
+    def _segments(self):
+        seqs = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                seqs.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(seqs)
+
+    def _open(self, seq):
+        return os.open(self._path(seq), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+
+    def _replay(self, path):
+        """Load a segment's records. Returns the length of its complete (newline-terminated) lines."""
+        complete = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # Torn tail from a crash mid-write
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("op") == "put":
+                    self._pending[record["id"]] = record["payload"]
+                    self._queued_at[record["id"]] = record.get("ts", time.time()) # Older segments have no ts
+                elif record.get("op") == "ack":
+                    self._pending.pop(record["id"], None)
+                    self._queued_at.pop(record["id"], None)
+        return complete
+
+    def _append(self, record):
+        data = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        os.write(self._fd, data)
+        self._size += len(data)
+        self._dirty = True
+
+    def compact(self):
+        """Roll to a fresh segment holding only unacked payloads, if the active one is due."""
+        if self._size < self._roll_at:
+            return
+        old = self._segments()
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._seq += 1
+        self._fd = self._open(self._seq)
+        self._size = 0
+        for signal_id, payload in self._pending.items():
+            record = {"op": "put", "id": signal_id, "payload": payload, "ts": self._queued_at.get(signal_id)}
+            data = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+            os.write(self._fd, data)
+            self._size += len(data)
+        os.fsync(self._fd)
+        # A large backlog must not make every following append roll again
+        self._roll_at = max(self.segment_bytes, 2 * self._size)
+        for seq in old:
+            os.remove(self._path(seq))
+
+    # --- public API ---
+    def put(self, payload):
+        """Persist payload (keyed by payload['id']) and mark it in flight for the caller."""
+        signal_id = payload["id"]
+        self._pending[signal_id] = payload
+        self._in_flight.add(signal_id)
+        self._queued_at[signal_id] = time.time()
+        self._append({"op": "put", "id": signal_id, "payload": payload, "ts": self._queued_at[signal_id]})
+
+    def ack(self, signal_id):
+        """The backend answered definitively: never send this id again."""
+        self._in_flight.discard(signal_id)
+        self._retry_at.pop(signal_id, None)
+        self._queued_at.pop(signal_id, None)
+        if self._pending.pop(signal_id, None) is not None:
+            self._append({"op": "ack", "id": signal_id})
+
+    def release(self, signal_id):
+        """Sending failed: leave the payload to drain()'s retries."""
+        self._in_flight.discard(signal_id)
+
+    def pending(self):
+        return list(self._pending.values())
+
+    def __len__(self):
+        return len(self._pending)
+
+    def sync(self):
+        if self._dirty:
+            self._dirty = False
+            os.fsync(self._fd)
+
+    def close(self):
+        os.fsync(self._fd)
+        os.close(self._fd)
+
+    def expire(self, max_age):
+        """Ack (drop) payloads queued more than max_age seconds ago and not being sent. Returns how many."""
+        cutoff = time.time() - max_age
+        stale = [sid for sid in self._pending
+                 if sid not in self._in_flight and (self._queued_at.get(sid) or 0) < cutoff]
+        for sid in stale:
+            self.ack(sid)
+        if stale:
+            logger.warning(f"OUTBOX: expired {len(stale)} signals queued over {max_age:.0f}s ago, not sending them late")
+        return len(stale)
+
+    async def drain(self, send, interval=1.0, retry_base=1.0, retry_max=60.0, max_age=None):
+        """
+        Forever: fsync new records, then resend pending payloads nobody else is
+        sending. `send(payload)` returns a response with status_code; anything
+        below 500 is a definitive answer and acks. Failures back off per id
+        exponentially up to retry_max. With max_age, payloads older than that
+        are expired instead of resent.
+        """
+        while True:
+            if max_age is not None:
+                self.expire(max_age)
+            self.compact()
+            await asyncio.to_thread(self.sync)
+            now = time.monotonic()
+            due = [p for sid, p in self._pending.items()
+                   if sid not in self._in_flight and self._retry_at.get(sid, (0, 0))[1] <= now]
+            if due:
+                await asyncio.gather(*(self._resend(p, send, retry_base, retry_max) for p in due))
+            await asyncio.sleep(interval)
+
+    async def _resend(self, payload, send, retry_base, retry_max):
+        signal_id = payload["id"]
+        self._in_flight.add(signal_id)
+        try:
+            res = await send(payload)
+            if res.status_code < 500:
+                logger.info(f"OUTBOX: delivered {signal_id} ({res.status_code})")
+                self.ack(signal_id)
+                return
+            error = f"HTTP {res.status_code}"
+        except asyncio.CancelledError:
+            self.release(signal_id)
+            raise
+        except Exception as e:
+            error = repr(e)
+        self.release(signal_id)
+        attempts = self._retry_at.get(signal_id, (0, 0))[0] + 1
+        delay = min(retry_max, retry_base * 2 ** (attempts - 1))
+        self._retry_at[signal_id] = (attempts, time.monotonic() + delay)
+        logger.warning(f"OUTBOX: retry {attempts} for {signal_id} in {delay:.1f}s ({error})")
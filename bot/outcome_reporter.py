@@ -0,0 +1,154 @@
+import time
+import uuid
+import asyncio
+import logging
+from forwarder import SignalForwarder
+from outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+COLLECT_TICK = 0.05 # Seconds between queue checks while a batch fills
+
+class OutcomeReporter:
+    """
+    Background reporter for POST {url}/bulk (report-outcome).
+
+    report() only enqueues, so decisions never wait on the network. A worker
+    task flushes the queue in batches of up to max_batch outcomes, or whatever
+    accumulated after max_delay seconds. A failed batch is retried in memory
+    `attempts` times with exponential backoff; after that (or when the queue
+    overflows) outcomes are spilled to an on-disk Outbox and re-sent in
+    batches every spill_interval seconds until the backend answers. Any
+    answer below 500 is definitive, as for signal forwarding.
+
+    Bulk contract: {"outcomes": [{id, signal_id, ...}]} ->
+    {"status", "results": [{id, status, reason?}]}.
+    """
+    def __init__(self, url, api_key, spill_dir, max_batch=50, max_delay=1.0, attempts=3,
+                 retry_base=0.5, spill_interval=30.0, queue_size=10000, timeout=5):
+        self.url = url
+        self.bulk_url = f"{url}/bulk"
+        self.forwarder = SignalForwarder(url, api_key, timeout=timeout, max_concurrency=2)
+        self.spill = Outbox(spill_dir)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.attempts = attempts
+        self.retry_base = retry_base
+        self.spill_interval = spill_interval
+        self.queue = asyncio.Queue(queue_size)
+        self.stats = {"reported": 0, "sent": 0, "rejected": 0, "spilled": 0, "recovered": 0, "batches": 0}
+        self._tasks = []
+        self._sending = None # Batch taken off the queue but not yet sent or spilled
+
+    def report(self, signal_id, status, execution=None, pnl=None):
+        """Queue an outcome; never blocks and never raises for network reasons."""
+        outcome = {"id": uuid.uuid4().hex, "signal_id": signal_id, "status": status, "execution": execution}
+        if pnl is not None:
+            outcome["pnl"] = pnl
+        self.stats["reported"] += 1
+        try:
+            self.queue.put_nowait(outcome)
+        except asyncio.QueueFull:
+            self._spill([outcome])
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(), name="outcome-reporter"),
+                           asyncio.create_task(self._run_recovery(), name="outcome-recovery")]
+
+    async def _collect(self):
+        # Polls instead of wait_for(queue.get()) so a timeout can never swallow an item
+        batch = self._sending = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while True:
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch or remaining <= 0:
+                return batch
+            await asyncio.sleep(min(remaining, COLLECT_TICK))
+
+    async def _post(self, batch):
+        """One bulk attempt. True if the backend answered definitively."""
+        try:
+            res = await self.forwarder.send({"outcomes": batch}, url=self.bulk_url)
+        except Exception as e:
+            logger.warning(f"OUTCOMES: batch of {len(batch)} failed ({e!r})")
+            return False
+        if res.status_code >= 500:
+            logger.warning(f"OUTCOMES: batch of {len(batch)} failed (HTTP {res.status_code})")
+            return False
+        self.stats["batches"] += 1
+        if res.status_code != 200:
+            # The whole request was refused (auth, shape): retrying won't help
+            logger.error(f"OUTCOMES: batch rejected ({res.status_code}): {res.text[:200]}")
+            self.stats["rejected"] += len(batch)
+            return True
+        for result in res.json().get("results", []):
+            if result.get("status") == "success":
+                self.stats["sent"] += 1
+            else:
+                self.stats["rejected"] += 1
+                logger.warning(f"OUTCOMES: {result.get('id')} rejected: {result.get('reason')}")
+        return True
+
+    def _spill(self, outcomes):
+        for outcome in outcomes:
+            self.spill.put(outcome)
+            self.spill.release(outcome["id"])
+        self.stats["spilled"] += len(outcomes)
+        logger.warning(f"OUTCOMES: {len(outcomes)} spilled to disk ({len(self.spill)} waiting for the backend)")
+
+    async def _send(self, batch):
+        for attempt in range(self.attempts):
+            if await self._post(batch):
+                return
+            if attempt + 1 < self.attempts:
+                await asyncio.sleep(self.retry_base * 2 ** attempt)
+        self._spill(batch)
+
+    async def _recover(self):
+        """Re-send spilled outcomes in batches; stops at the first failure."""
+        pending = self.spill.pending()
+        for i in range(0, len(pending), self.max_batch):
+            batch = pending[i:i + self.max_batch]
+            if not await self._post(batch):
+                return
+            for outcome in batch:
+                self.spill.ack(outcome["id"])
+            self.stats["recovered"] += len(batch)
+        self.spill.compact()
+        await asyncio.to_thread(self.spill.sync)
+        if pending:
+            logger.info(f"OUTCOMES: recovered {len(pending)} spilled outcomes")
+
+    async def _run(self):
+        while True:
+            await self._send(await self._collect())
+            self._sending = None
+
+    async def _run_recovery(self):
+        while True:
+            if len(self.spill):
+                await self._recover()
+            await asyncio.sleep(self.spill_interval)
+
+    async def close(self, timeout=5):
+        """Stop the worker, make one last attempt at queued outcomes and spill what's left."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        leftover, self._sending = self._sending or [], None
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait())
+        for i in range(0, len(leftover), self.max_batch):
+            batch = leftover[i:i + self.max_batch]
+            try:
+                sent = await asyncio.wait_for(self._post(batch), timeout)
+            except asyncio.TimeoutError:
+                sent = False
+            if not sent:
+                self._spill(batch)
+        self.spill.close()
+        await self.forwarder.close()
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime
+import numpy as np
+
+from training_store import TrainingDataset, STORE_DIR, TRAINING_DIR, IST, source_files
+
+logger = logging.getLogger(__name__)
+
+PRICES_DIR = os.path.join(TRAINING_DIR, "prices") # prices/YYYY-MM-DD/<SYMBOL>.csv, spaces in the symbol as "_"
+SESSION_CLOSE_S = 15 * 3600 + 30 * 60 # 15:30 IST: signals still open then are EXPIRED
+SIGNAL_COLUMNS = ["signal_id", "created_at", "symbol", "side", "entry_price", "stop_loss", "t1", "t2", "t3"]
+SETTLED = ("WIN", "LOSS", "EXPIRED") # Final outcomes; anything else (PENDING, EXECUTED_PAPER, ...) is still open
+NEVER = np.iinfo(np.int64).max # First-reach index of a level that isn't reached before the horizon
+
+class PriceSeries:
+    """One symbol's day, sorted by time: ticks (high == low == price) or bars."""
+    def __init__(self, ts, high, low):
+        self.ts = ts
+        self.high = _ReachIndex(high)
+        self.low = _ReachIndex(-low) # Falling to L is rising to -L
+
+    def __len__(self):
+        return len(self.ts)
+
+def load_prices(path):
+    """
+    CSV with a header: ts (Unix seconds or ms) and either price (ticks) or
+    high and low (OHLC bars; other columns ignored). Rows with gaps dropped.
+    """
+    with open(path, "r") as f:
+        header = [name.strip().lower() for name in f.readline().split(",")]
+        data = np.loadtxt(f, delimiter=",", ndmin=2, dtype=np.float64)
+    ts = data[:, header.index("ts")]
+    if "high" in header:
+        high, low = data[:, header.index("high")], data[:, header.index("low")]
+    else:
+        high = low = data[:, header.index("price")]
+    keep = np.isfinite(ts) & np.isfinite(high) & np.isfinite(low)
+    ts, high, low = ts[keep], high[keep], low[keep]
+    if len(ts) and ts.max() > 1e11:
+        ts = ts / 1000.0
+    order = np.argsort(ts, kind="stable")
+    return PriceSeries(ts[order], high[order], low[order])
+
+class PriceFiles:
+    """Price series by (day, symbol), loaded on first use."""
+    def __init__(self, directory=PRICES_DIR):
+        self.directory = directory
+        self._loaded = {}
+
+    def get(self, day, symbol):
+        key = (day, symbol)
+        if key not in self._loaded:
+            path = os.path.join(self.directory, day, f"{symbol.replace(' ', '_')}.csv")
+            self._loaded[key] = load_prices(path) if os.path.exists(path) else None
+        return self._loaded[key]
+
+class _ReachIndex:
+    """
+    Sparse table of running maxima (level k = max over 2**k consecutive
+    values) answering "first index >= start whose value reaches L" for a
+    whole array of (start, L) pairs at once, by binary lifting: one
+    vectorized step per power of two, so log2(ticks) array operations
+    regardless of how many signals ask.
+    """
+    def __init__(self, values):
+        self.n = len(values)
+        self.levels = [values]
+        step = 1
+        while step * 2 <= self.n:
+            previous = self.levels[-1]
+            self.levels.append(np.maximum(previous[:-step], previous[step:]))
+            step *= 2
+
+    def first_reach(self, start, level):
+        """Per pair: the first index i >= start with value[i] >= level, else n."""
+        pos = start.copy()
+        for k in range(len(self.levels) - 1, -1, -1):
+            step = 1 << k
+            last = self.n - step # Last index a block of this size can start at
+            if last < 0:
+                continue
+            fits = pos <= last
+            below = self.levels[k][np.minimum(pos, last)] < level
+            pos += (fits & below) * step # Skip the whole block: nothing in it reaches the level
+        return pos
+
+def session_close(created_at):
+    """15:30 IST on each signal's trading day, as Unix seconds."""
+    offset = IST.utcoffset(None).total_seconds()
+    return np.floor((created_at + offset) / 86400) * 86400 - offset + SESSION_CLOSE_S
+
+def resolve_series(series, signals, horizon, complete):
+    """
+    Settle the signals of one symbol-day against its prices, all at once.
+    Returns (status, hit, event_ts): status WIN/LOSS/EXPIRED or "" (still
+    open: the prices stop before the horizon and `complete`, the session
+    being over, isn't set for it).
+
+    WIN: T1 is reached before the stop; hit is the furthest target reached
+    before the stop. LOSS: the stop is reached first. When a bar reaches
+    both, it counts as the stop (a bar doesn't say which came first).
+    event_ts is when T1 or the stop was reached, or the horizon.
+    """
+    count = len(signals["signal_id"])
+    ts = series.ts
+    start = np.searchsorted(ts, signals["created_at"], side="left") # Prices stamped at/after the signal
+    end = np.searchsorted(ts, horizon, side="right")
+    buy = signals["side"] == "BUY"
+    sell = signals["side"] == "SELL"
+    levels = np.stack([signals["t1"], signals["t2"], signals["t3"], signals["stop_loss"]], axis=1)
+    up = np.empty((count, 4), dtype=bool) # Reached by the price rising: BUY targets, SELL stop
+    up[:, :3] = buy[:, None]
+    up[:, 3] = sell
+    starts = np.broadcast_to(start[:, None], (count, 4))
+    first = np.empty((count, 4), dtype=np.int64)
+    rising, falling = levels[up], -levels[~up]
+    first[up] = series.high.first_reach(starts[up], np.where(np.isnan(rising), np.inf, rising))
+    first[~up] = series.low.first_reach(starts[~up], np.where(np.isnan(falling), np.inf, falling))
+    first[first >= end[:, None]] = NEVER
+    t1, t2, t3, sl = first.T
+
+    loss = (sl <= t1) & (sl != NEVER)
+    win = ~loss & (t1 != NEVER)
+    expired = ~loss & ~win & ((ts[-1] >= horizon) | complete)
+    settled = (buy | sell) & (win | loss | expired)
+    status = np.where(loss, "LOSS", np.where(win, "WIN", "EXPIRED"))
+    hit = np.where(loss, "SL", np.where(t3 < sl, "T3", np.where(t2 < sl, "T2", "T1")))
+    hit = np.where(win | loss, hit, "")
+    decided = np.where(loss, sl, t1)
+    event_ts = np.where(win | loss, ts[np.minimum(decided, len(ts) - 1)], horizon)
+    return np.where(settled, status, ""), hit, event_ts
+
+def resolve(signals, prices, max_hold=None, now=None):
+    """
+    Settle a batch of signals (dict of SIGNAL_COLUMNS arrays) against
+    `prices` (PriceFiles or anything with get(day, symbol)). The loop is per
+    symbol-day; everything inside it is array operations over that
+    symbol-day's signals. Returns (outcomes columns for the settled
+    signals, counts).
+
+    A price file for a session that has closed (by `now`) is taken to be the
+    whole session, since feeds stop at the last trade rather than at 15:30.
+    """
+    created = signals["created_at"]
+    close = session_close(created)
+    horizon = np.minimum(close, created + max_hold) if max_hold else close
+    complete = (horizon >= close) & (close <= (time.time() if now is None else now))
+    offset = IST.utcoffset(None).total_seconds()
+    day_number = np.floor((created + offset) / 86400)
+    symbols, symbol_code = np.unique(signals["symbol"], return_inverse=True)
+    valid = np.isfinite(day_number)
+    groups, group_of = np.unique(np.where(valid, day_number, -1) * len(symbols) + symbol_code, return_inverse=True)
+    order = np.argsort(group_of, kind="stable")
+    bounds = np.searchsorted(group_of[order], np.arange(len(groups) + 1))
+
+    status = np.full(len(created), "", dtype="<U7")
+    hit = np.full(len(created), "", dtype="<U2")
+    event_ts = np.full(len(created), np.nan)
+    unpriced = 0
+    for g in range(len(groups)):
+        index = order[bounds[g]:bounds[g + 1]]
+        first = index[0]
+        if not valid[first]:
+            continue
+        day = np.datetime_as_string(np.datetime64(int(day_number[first]), "D"))
+        series = prices.get(day, str(signals["symbol"][first]))
+        if series is None or not len(series):
+            unpriced += len(index)
+            continue
+        subset = {name: signals[name][index] for name in SIGNAL_COLUMNS}
+        status[index], hit[index], event_ts[index] = resolve_series(series, subset, horizon[index],
+                                                                    complete[index])
+
+    settled = np.flatnonzero(status != "")
+    outcomes = {
+        "signal_id": signals["signal_id"][settled],
+        "ts": event_ts[settled],
+        "status": status[settled],
+        "hit": hit[settled],
+        "time_to_outcome_s": (event_ts - created)[settled],
+    }
+    counts = {name: int((status == name).sum()) for name in ("WIN", "LOSS", "EXPIRED")}
+    counts.update(signals=len(created), unpriced=unpriced, open=len(created) - len(settled) - unpriced)
+    return outcomes, counts
+
+def write_updates(outcomes, directory=TRAINING_DIR):
+    """
+    Append the settled outcomes as OUTCOME_UPDATE lines to
+    training_dataset_resolved_YYYY-MM-DD.jsonl, next to the backend's files,
+    so the JSONL dataset carries them too. Returns the file's path.
+    """
+    now = datetime.now(IST)
+    path = os.path.join(directory, f"training_dataset_resolved_{now.strftime('%Y-%m-%d')}.jsonl")
+    stamp = now.isoformat()
+    lines = [json.dumps({"event": "OUTCOME_UPDATE", "signal_id": str(outcomes["signal_id"][i]),
+                         "status": str(outcomes["status"][i]), "hit": str(outcomes["hit"][i]),
+                         "time_to_outcome_s": round(float(outcomes["time_to_outcome_s"][i]), 3),
+                         "source": "resolver", "timestamp": stamp}) + "\n"
+             for i in range(len(outcomes["signal_id"]))]
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    return path
+
+def resolve_pending(store, prices, since=None, until=None, max_hold=None, dry_run=False, dataset_dir=TRAINING_DIR):
+    """
+    Settle every signal in the store whose effective outcome isn't final yet
+    (PENDING, or an execution update such as EXECUTED_PAPER; accepted or not:
+    rejected ones are training data too). Results go to the JSONL dataset
+    as OUTCOME_UPDATE lines and reach the store by ingesting that file.
+    """
+    start = time.perf_counter()
+    signals = {name: [] for name in SIGNAL_COLUMNS}
+    for batch in store.scan(SIGNAL_COLUMNS + ["outcome"], since, until):
+        keep = ~np.isin(batch["outcome"], SETTLED)
+        for name in SIGNAL_COLUMNS:
+            signals[name].append(batch[name][keep])
+    signals = {name: np.concatenate(pieces) for name, pieces in signals.items() if pieces}
+    if not signals or not len(signals["signal_id"]):
+        logger.info("🎯 RESOLVER: nothing pending")
+        return {"signals": 0, "WIN": 0, "LOSS": 0, "EXPIRED": 0, "unpriced": 0, "open": 0, "seconds": 0.0}
+    outcomes, counts = resolve(signals, prices, max_hold)
+    if not dry_run and len(outcomes["signal_id"]):
+        store.ingest([write_updates(outcomes, dataset_dir)])
+    counts["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"🎯 RESOLVER: {counts['signals']} pending | {counts['WIN']} WIN, {counts['LOSS']} LOSS, "
+                f"{counts['EXPIRED']} EXPIRED | {counts['unpriced']} without prices, {counts['open']} still open | "
+                f"{counts['seconds']:.2f}s{' (dry run)' if dry_run else ''}")
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    ap = argparse.ArgumentParser(description="Settle open training records against local tick/OHLC files")
+    ap.add_argument("--store", default=STORE_DIR)
+    ap.add_argument("--dataset-dir", default=TRAINING_DIR,
+                    help="training JSONL directory: ingested first, settled outcomes appended there")
+    ap.add_argument("--prices", default=PRICES_DIR, help="directory of YYYY-MM-DD/<SYMBOL>.csv files")
+    ap.add_argument("--since")
+    ap.add_argument("--until")
+    ap.add_argument("--max-hold", type=float, help="seconds before an open signal expires (default: session close)")
+    ap.add_argument("--dry-run", action="store_true", help="report what would be settled without writing it")
+    args = ap.parse_args()
+    store = TrainingDataset(args.store)
+    store.ingest(source_files(args.dataset_dir)) # Execution updates since the last ingest decide what is still open
+    resolve_pending(store, PriceFiles(args.prices), args.since, args.until, args.max_hold, args.dry_run,
+                    args.dataset_dir)
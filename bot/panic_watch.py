@@ -0,0 +1,128 @@
+import os
+import sys
+import select
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+POLL_INTERVAL = 0.05 # Stat fallback when inotify is unavailable
+
+class PanicHalt(Exception):
+    """Raised instead of placing an order once the kill-switch has fired."""
+
+def _inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+class PanicWatcher:
+    """
+    Watches for the PANIC kill-switch file from a background thread.
+
+    On Linux the file's directory is watched with inotify, so creation is seen
+    as soon as the kernel reports it; elsewhere (or if inotify can't be set
+    up) the path is stat'ed every poll_interval seconds. When the file appears
+    the `triggered` event is set and on_panic() is called once, from the
+    watcher thread. Checking `triggered` is a memory read, not a syscall.
+    """
+    def __init__(self, path, on_panic=None, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.on_panic = on_panic
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.triggered = threading.Event()
+        self.mode = None
+        self._stop = threading.Event()
+        self._fire_lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = None
+
+    def is_set(self):
+        return self.triggered.is_set()
+
+    def start(self):
+        fd = self._watch() if self.use_inotify else None
+        self.mode = "inotify" if fd is not None else "poll"
+        target = self._run_inotify if fd is not None else self._run_poll
+        self._thread = threading.Thread(target=target, args=(fd,), name="panic-watch", daemon=True)
+        self._thread.start()
+        # The file may already be there from before we started watching
+        self._check()
+        logger.info(f"PANIC WATCH: {self.path} ({self.mode})")
+        return self
+
+    def _watch(self):
+        libc = _inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if fd < 0:
+            return None
+        directory = os.path.dirname(self.path)
+        if libc.inotify_add_watch(fd, directory.encode(), IN_CREATE | IN_MOVED_TO | IN_ATTRIB) < 0:
+            logger.warning(f"PANIC WATCH: inotify on {directory} failed ({os.strerror(ctypes.get_errno())}), polling")
+            os.close(fd)
+            return None
+        return fd
+
+    def _check(self):
+        if not self.triggered.is_set() and os.path.exists(self.path):
+            self._fire()
+
+    def _fire(self):
+        with self._fire_lock:
+            if self.triggered.is_set():
+                return
+            self.triggered.set()
+        logger.critical("🚨 PANIC KILL-SWITCH DETECTED! HALTING SYSTEM.")
+        if self.on_panic is not None:
+            try:
+                self.on_panic()
+            except Exception as e:
+                logger.error(f"PANIC WATCH: halt callback failed: {e}")
+
+    def _run_inotify(self, fd):
+        try:
+            while not self._stop.is_set() and not self.triggered.is_set():
+                ready, _, _ = select.select([fd, self._wake_r], [], [])
+                if fd in ready:
+                    try:
+                        os.read(fd, 65536) # Drain events; one stat decides
+                    except BlockingIOError:
+                        pass
+                    self._check()
+        finally:
+            os.close(fd)
+
+    def _run_poll(self, _fd=None):
+        while not self._stop.is_set() and not self.triggered.is_set():
+            self._check()
+            self._stop.wait(self.poll_interval)
+
+    def guard(self, place_order):
+        """Wrap an order function so nothing reaches the broker after the kill-switch."""
+        def guarded(*args, **kwargs):
+            if self.triggered.is_set():
+                raise PanicHalt("PANIC kill-switch active, order not placed")
+            return place_order(*args, **kwargs)
+        return guarded
+
+    def stop(self):
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
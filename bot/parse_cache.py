@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+MISS = object() # get() result for a key that is not cached (None is a cached "not a signal")
+
+def text_key(normalized):
+    """64-bit key for normalized message text; stable across processes and restarts."""
+    return int.from_bytes(hashlib.blake2b(normalized.encode(), digest_size=8).digest(), "little")
+
+class ParseCache:
+    """
+    Bounded LRU of parse results keyed by text_key(). Values must be
+    JSON-serializable and immutable by convention: callers build fresh
+    objects from them on every hit. max_entries=0 disables the cache.
+
+    With a path, save() writes the entries (least recently used first)
+    atomically and the constructor loads them back, so a restart's replay
+    finds every message it parsed last time.
+    """
+    def __init__(self, max_entries=4096, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def format(self):
+        s = self.stats()
+        return (f"{s['entries']}/{self.max_entries} entries | {s['hits']} hits, {s['misses']} misses "
+                f"({s['hit_rate']:.1%}), {s['evictions']} evictions")
+
+    # --- persistence ---
+    def snapshot(self):
+        """Copy of the entries, cheap enough for the event loop; write it with save()."""
+        return list(self._entries.items())
+
+    def save(self, entries=None):
+        if not self.path:
+            return
+        entries = self.snapshot() if entries is None else entries
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION:
+                raise ValueError(f"version {data.get('version')}")
+            entries = data["entries"]
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            logger.warning(f"PARSE CACHE: ignoring unreadable {self.path} ({e})")
+            return 0
+        for key, value in entries[-self.max_entries:] if self.max_entries > 0 else ():
+            self._entries[key] = value
+        logger.info(f"🧠 Parse cache: {len(self._entries)} entries restored from {self.path}")
+        return len(self._entries)
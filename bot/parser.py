@@ -1,11 +1,62 @@
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 import logging
+from instruments import InstrumentIndex
+from parse_cache import ParseCache, MISS, text_key
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# --- COMPILED ENGINE ---
+# Everything is compiled once at import. Messages are case-folded a single time
+# so the scanners below run case-sensitively (IGNORECASE defeats the regex
+# engine's literal-prefix search and was the bulk of the per-message cost).
+CLEAN_PATTERN = re.compile(r'[^\w\s\.\-\/\@\(\)]')
+SYMBOL_PATTERN = re.compile(r'(nifty|banknifty|sensex|finnifty|midcpnifty)\s*(\d*)\s*(ce|pe)')
+STRIKE_PATTERN = re.compile(r'(\d{5})\s*(ce|pe)')
+RANGE_PATTERN = re.compile(r'\((\d+)\s*\-\s*(\d+)\)')
+ENTRY_PATTERN = re.compile(r'(?:buy|at|\@|upto|price|entry)\s*(\d+(?:\.\d+)?)')
+NUMBER_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+TARGET_PATTERN = re.compile(r'target|tgt')
+STOP_PATTERN = re.compile(r'stop|sl')
+SL_PATTERN = re.compile(r'(?:sl|stoploss|stop|loss)\s*(\d+(?:\.\d+)?)')
+
+# re.IGNORECASE also treats these non-ASCII letters as their ASCII partners,
+# so the fold has to map them too to keep results identical.
+CASE_FOLD = {**{c: c + 32 for c in range(ord('A'), ord('Z') + 1)},
+             0x130: ord('i'), 0x131: ord('i'), 0x17F: ord('s'), 0x212A: ord('k')}
+
+# Contract resolution: mapped on first use in each process (parse workers included)
+_instruments = None
+
+# Reposts, edits and forwards repeat the same text: remember what each normalized
+# message parsed to. Only the text-derived fields are cached; the timestamp and
+# the contract are filled in fresh on every call.
+PARSE_CACHE_SIZE = 4096 # Distinct messages per process (0 disables)
+parse_cache = ParseCache(PARSE_CACHE_SIZE)
+
+def configure_parse_cache(max_entries=PARSE_CACHE_SIZE, path=None):
+    """Replace this process's parse cache; with a path it is loaded now and written by parse_cache.save()."""
+    global parse_cache
+    parse_cache = ParseCache(max_entries, path)
+    return parse_cache
+
+def _contract(symbol):
+    global _instruments
+    if _instruments is None:
+        _instruments = InstrumentIndex()
+    return _instruments.resolve(symbol)
+
+def _fold(text_clean):
+    # Length-preserving, so match offsets in the fold index text_clean directly
+    if text_clean.isascii():
+        return text_clean.lower()
+    return text_clean.translate(CASE_FOLD)
+
 def parse_signal(text: str):
     """
     Heuristic-based parser for varied Telegram signal formats.
@@ -14,56 +65,65 @@ def parse_signal(text: str):
         return None
         
     # Clean text
-    text_clean = re.sub(r'[^\w\s\.\-\/\@\(\)]', ' ', text)
-    
+    text_clean = CLEAN_PATTERN.sub(' ', text)
+    folded = _fold(text_clean)
+
+    # Case only reaches the result through symbol.upper(), which ASCII folding preserves
+    key = text_key(folded if text_clean.isascii() else text_clean)
+    parsed = parse_cache.get(key)
+    if parsed is MISS:
+        parsed = _parse(text_clean, folded)
+        parse_cache.put(key, parsed)
+    return _signal(parsed)
+
+def _parse(text_clean, folded):
+    """Text-derived part of the result: None, ["R", reason] or ["P", symbol, side, entry, sl, targets]."""
     # 1. Extract Symbol (e.g., BANKNIFTY 25JAN 45500 CE, NIFTY 22000 PE, SENSEX 83400 CE)
     # Pattern: Look for major words + Optional numbers + CE/PE
-    symbol_match = re.search(r'(NIFTY|BANKNIFTY|SENSEX|FINNIFTY|MIDCPNIFTY)\s*(\d*)\s*(CE|PE)', text_clean, re.IGNORECASE)
-    if not symbol_match:
-        # Fallback for just symbols like 83400 CE
-        symbol_match = re.search(r'(\d{5})\s*(CE|PE)', text_clean, re.IGNORECASE)
-        
+    # Fallback for just symbols like 83400 CE
+    symbol_match = SYMBOL_PATTERN.search(folded) or STRIKE_PATTERN.search(folded)
     if not symbol_match:
         return None
-        
-    symbol = symbol_match.group(0).strip().upper()
+
+    symbol = text_clean[symbol_match.start():symbol_match.end()].strip().upper()
     
     # 2. Extract Side (Buy/Sell)
-    side = "BUY" # Default to buy as per channel style
-    if re.search(r'sell|put', text_clean, re.IGNORECASE):
-        side = "SELL"
-    elif re.search(r'buy|call', text_clean, re.IGNORECASE):
-        side = "BUY"
+    # Default to buy as per channel style
+    side = "SELL" if ("sell" in folded or "put" in folded) else "BUY"
 
     # 3. Extract Entry Price
     # Patterns: "@ 350", "buy it (285-295)", "Upto 275", "CMP", "current price"
     entry = None
     # Try range first like (285-295)
-    range_match = re.search(r'\((\d+)\s*\-\s*(\d+)\)', text_clean)
+    range_match = RANGE_PATTERN.search(folded) if "(" in folded else None
     if range_match:
         entry = (float(range_match.group(1)) + float(range_match.group(2))) / 2
     else:
         # Try numbers near "buy", "at", "@", "upto"
-        entry_match = re.search(r'(?:buy|at|\@|upto|price|entry)\s*(\d+(?:\.\d+)?)', text_clean, re.IGNORECASE)
+        entry_match = ENTRY_PATTERN.search(folded)
         if entry_match:
             entry = float(entry_match.group(1))
         else:
             # Last resort: just find numbers after symbol
-            numbers = re.findall(r'(\d+(?:\.\d+)?)', text_clean[symbol_match.end():])
-            if numbers:
-                entry = float(numbers[0])
+            number_match = NUMBER_PATTERN.search(folded, symbol_match.end())
+            if number_match:
+                entry = float(number_match.group(1))
 
     if not entry:
         return None
 
     # 4. Extract Targets
-    # Pattern: "Target" followed by list of numbers
+    # Pattern: "Target" followed by list of numbers, up to the next "target", "stop" or "sl"
     targets = []
-    target_section = re.split(r'target|tgt', text_clean, flags=re.IGNORECASE)
-    if len(target_section) > 1:
-        # Extract all numbers from the target section until "stop" or "sl"
-        target_text = re.split(r'stop|sl|sl hit', target_section[1], flags=re.IGNORECASE)[0]
-        targets = [float(t) for t in re.findall(r'(\d+(?:\.\d+)?)', target_text)]
+    target_match = TARGET_PATTERN.search(folded)
+    if target_match:
+        section_start = target_match.end()
+        next_target = TARGET_PATTERN.search(folded, section_start)
+        section_end = next_target.start() if next_target else len(folded)
+        stop_match = STOP_PATTERN.search(folded, section_start, section_end)
+        if stop_match:
+            section_end = stop_match.start()
+        targets = [float(t) for t in NUMBER_PATTERN.findall(folded, section_start, section_end)]
     
     # Filter targets that make sense (targets > entry for BUY)
     if side == "BUY":
@@ -73,40 +133,115 @@ def parse_signal(text: str):
 
     # 5. Extract Stoploss
     sl = None
-    sl_match = re.search(r'(?:sl|stoploss|stop|loss)\s*(\d+(?:\.\d+)?)', text_clean, re.IGNORECASE)
+    sl_match = SL_PATTERN.search(folded)
     if sl_match:
         sl = float(sl_match.group(1))
     
     # --- STRICT VALIDATION LAYER ---
     if not targets:
-        return {"status": "REJECTED", "reason": "No valid targets found"}
+        return ["R", "No valid targets found"]
         
     if sl is None:
         # Auto-calculate SL if missing? No, user wants strict.
-        return {"status": "REJECTED", "reason": "No stoploss found"}
+        return ["R", "No stoploss found"]
 
     if side == "BUY":
         if sl >= entry:
-            return {"status": "REJECTED", "reason": f"SL ({sl}) >= Entry ({entry}) for BUY"}
+            return ["R", f"SL ({sl}) >= Entry ({entry}) for BUY"]
         if entry >= targets[0]:
-            return {"status": "REJECTED", "reason": f"Entry ({entry}) >= T1 ({targets[0]}) for BUY"}
+            return ["R", f"Entry ({entry}) >= T1 ({targets[0]}) for BUY"]
     else:
         if sl <= entry:
-            return {"status": "REJECTED", "reason": f"SL ({sl}) <= Entry ({entry}) for SELL"}
+            return ["R", f"SL ({sl}) <= Entry ({entry}) for SELL"]
         if entry <= targets[0]:
-            return {"status": "REJECTED", "reason": f"Entry ({entry}) <= T1 ({targets[0]}) for SELL"}
+            return ["R", f"Entry ({entry}) <= T1 ({targets[0]}) for SELL"]
+
+    return ["P", symbol, side, entry, sl, targets]
 
-    return {
-        "instrument": "NFO",
+def _signal(parsed):
+    if parsed is None:
+        return None
+    if parsed[0] == "R":
+        return {"status": "REJECTED", "reason": parsed[1]}
+    _, symbol, side, entry, sl, targets = parsed
+
+    # 6. Resolve the contract (nearest expiry) when the instrument index is built
+    contract = _contract(symbol)
+    signal = {
+        "instrument": contract.exchange if contract else "NFO",
         "symbol": symbol,
         "side": side,
         "entry_price": entry,
         "stop_loss": sl,
-        "targets": targets,
+        "targets": list(targets),
         "confidence": 90,
         "timestamp_ist": datetime.now().isoformat(),
         "status": "PARSED"
     }
+    if contract:
+        signal["contract"] = {
+            "tradingsymbol": contract.tradingsymbol,
+            "expiry": contract.expiry,
+            "lot_size": contract.lot_size,
+            "tick_size": contract.tick_size,
+            "instrument_token": contract.instrument_token
+        }
+    return signal
+
+# --- STRICT FORMAT ---
+# "SYMBOL buy PRICE sl PRICE tgt PRICE[/PRICE]", the format the middleware and replay bots accept
+STRICT_PATTERN = re.compile(r"([A-Z0-9]+)\s+(buy|sell)\s+(\d+)\s+sl\s+(\d+)\s+tgt\s+([\d\/]+)", re.IGNORECASE)
+
+def parse_strict(text: str):
+    """Exact single-line format; None for anything else."""
+    match = STRICT_PATTERN.search(text)
+    if match:
+        symbol, side, entry, sl, tgts = match.groups()
+        return {
+            "instrument": "NFO",
+            "symbol": symbol.upper(),
+            "side": side.upper(),
+            "entry_price": float(entry),
+            "stop_loss": float(sl),
+            "targets": [float(t) for t in tgts.split('/')],
+            "confidence": 95,
+            "timestamp_ist": datetime.now().isoformat()
+        }
+    return None
+
+# --- BULK API ---
+def _parse_chunk(texts):
+    return [parse_signal(text) for text in texts]
+
+def parse_signals(texts, workers=1, chunk_size=256, pool=None):
+    """
+    Parse an iterable of messages, yielding one result per message in input order.
+    With workers > 1 chunks are spread over a process pool; at most 2 chunks per
+    worker are in flight so arbitrarily long inputs stream in bounded memory.
+    Callers parsing many inputs can pass their own `pool` (of `workers`
+    processes) so workers and their parse caches stay warm between calls.
+    """
+    if pool is not None:
+        yield from _parse_pooled(texts, pool, workers, chunk_size)
+        return
+    if workers <= 1:
+        for text in texts:
+            yield parse_signal(text)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from _parse_pooled(texts, pool, workers, chunk_size)
+
+def _parse_pooled(texts, pool, workers, chunk_size):
+    texts = iter(texts)
+    pending = deque()
+    while True:
+        chunk = list(islice(texts, chunk_size))
+        if chunk:
+            pending.append(pool.submit(_parse_chunk, chunk))
+        if pending and (not chunk or len(pending) >= max(1, workers) * 2):
+            yield from pending.popleft().result()
+        elif not chunk:
+            return
 
 if __name__ == "__main__":
     test_cases = [
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Queue-full policies
+BLOCK = "block"             # Wait for space (backpressure on the producer)
+DROP_NEWEST = "drop_newest" # Discard the incoming item
+DROP_OLDEST = "drop_oldest" # Evict the oldest queued item to make room
+
+class Stage:
+    """
+    One pipeline step: a bounded input queue drained by `workers` tasks running
+    `handler(job)`. The handler returns the job for the next stage, or None to
+    stop it here (filtered, duplicate, already forwarded...). A handler error
+    drops the job; with halt_on_error it halts the whole pipeline instead.
+    """
+    def __init__(self, name, handler, workers=1, maxsize=1000, policy=BLOCK, halt_on_error=False):
+        if policy not in (BLOCK, DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.policy = policy
+        self.halt_on_error = halt_on_error
+        self.queue = asyncio.Queue(maxsize)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    async def put(self, job, policy=None):
+        """Enqueue according to policy. Returns False if the job was dropped."""
+        policy = policy or self.policy
+        if policy == BLOCK:
+            await self.queue.put(job)
+            return True
+        if self.queue.full():
+            self.dropped += 1
+            if policy == DROP_NEWEST:
+                return False
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait(job)
+        return True
+
+class IngestPipeline:
+    """
+    Chain of Stages connected by bounded asyncio queues.
+    A full downstream queue blocks (or drops, per its policy) the upstream
+    workers, so a burst can only ever occupy sum(maxsize) jobs of memory.
+
+    Once a halt_on_error stage fails, `failure` holds (stage name, exception)
+    and every stage discards what is still queued, so nothing behind the
+    failed job is processed.
+    """
+    def __init__(self, *stages):
+        self.stages = stages
+        self.failure = None
+        self._tasks = []
+        self._started_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for i, stage in enumerate(self.stages):
+            nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                self._tasks.append(asyncio.create_task(self._work(stage, nxt), name=f"{stage.name}-{n}"))
+
+    async def _work(self, stage, nxt):
+        while True:
+            job = await stage.queue.get()
+            try:
+                if self.failure is not None:
+                    continue # Halted: discard, the finally still marks it done
+                out = await stage.handler(job)
+                stage.processed += 1
+                if out is not None and nxt is not None:
+                    await nxt.put(out)
+            except Exception as e:
+                stage.errors += 1
+                logger.error(f"PIPELINE [{stage.name}] ERROR: {e!r}")
+                if stage.halt_on_error and self.failure is None:
+                    self.failure = (stage.name, e)
+            finally:
+                stage.queue.task_done()
+
+    async def submit(self, job, policy=None):
+        """Feed the first stage. `policy` overrides its queue policy for this job."""
+        return await self.stages[0].put(job, policy)
+
+    async def join(self):
+        # Stages drain front to back: a job is only task_done() once handed on
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def stop(self, drain=True):
+        if drain:
+            await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def metrics(self):
+        elapsed = max(time.monotonic() - (self._started_at or time.monotonic()), 1e-9)
+        return {
+            stage.name: {
+                "depth": stage.queue.qsize(),
+                "capacity": stage.queue.maxsize,
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "dropped": stage.dropped,
+                "errors": stage.errors,
+                "per_sec": round(stage.processed / elapsed, 2)
+            }
+            for stage in self.stages
+        }
+
+    def format_metrics(self):
+        return " | ".join(
+            f"{name}: {m['depth']}/{m['capacity']} q, {m['processed']} done, {m['dropped']} dropped, {m['per_sec']}/s"
+            for name, m in self.metrics().items()
+        )
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = "ledger-"
+JOURNAL_SUFFIX = ".jsonl"
+LOCK_NAME = "ledger.lock"
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class RiskLedger:
+    """
+    Daily risk counters shared by every executor process on the host.
+
+    State lives in memory (trades per day, trades per instrument, risk rupees)
+    so checks are O(1) dict lookups. Every change is one JSON line appended to
+    today's journal (ledger-YYYY-MM-DD.jsonl) and fsync'd before it counts.
+    Mutations take an exclusive flock on ledger.lock and first replay whatever
+    other processes appended since our last read, so several executors can
+    never jointly overshoot a limit. A record left half-written by a process
+    that died mid-append is cut off under the lock before anything else is
+    appended.
+
+    A trade is reserved before the kernel is asked, marked submitted when the
+    order is handed to the kernel, and committed or released afterwards; an
+    open reservation counts against the limits. Reservations left open by a
+    process that died before submitting are released by the next reserve()
+    that runs into a limit; submitted ones may have become orders, so they
+    stay counted for the day.
+    """
+    def __init__(self, directory, max_trades=1, max_per_instrument=None, max_risk=None):
+        self.directory = directory
+        self.max_trades = max_trades
+        self.max_per_instrument = max_per_instrument
+        self.max_risk = max_risk
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock() # flock is per open file, so threads need their own
+        self._lock_fd = os.open(os.path.join(directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+        self._day = None
+        self._fd = None
+        self._seq = 0
+        with self._lock, self._locked():
+            self._catch_up()
+        logger.info(f"RISK LEDGER: {self.trades} trades, ₹{self.risk:.2f} risk booked for {self._day}")
+
+    # --- journal ---
+    def _path(self, day):
+        return os.path.join(self.directory, f"{JOURNAL_PREFIX}{day}{JOURNAL_SUFFIX}")
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _reset(self, day):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._day = day
+        self._fd = os.open(self._path(day), os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        self._offset = 0
+        self.trades = 0
+        self.risk = 0.0
+        self.per_instrument = Counter()
+        self._open = {} # reservation id -> record
+
+    def _catch_up(self):
+        """Roll to today's journal if needed and apply records appended since the last read."""
+        day = datetime.now().strftime("%Y-%m-%d")
+        if day != self._day:
+            self._reset(day)
+        size = os.fstat(self._fd).st_size
+        if size == self._offset:
+            return
+        data = os.pread(self._fd, size - self._offset, self._offset)
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # Every writer appends under the lock, so a partial line now is from one that died mid-write:
+            # cut it off, or the next record would be appended onto it and never parse
+            logger.warning(f"RISK LEDGER: dropping a torn record at the end of {self._path(self._day)}")
+            os.ftruncate(self._fd, self._offset + complete)
+        self._offset += complete
+        for line in data[:complete].split(b"\n")[:-1]:
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                continue
+
+    def _apply(self, record):
+        op, rid = record.get("op"), record.get("id")
+        if op == "reserve":
+            self._open[rid] = record
+            self.trades += 1
+            self.per_instrument[record["symbol"]] += 1
+            self.risk += record["risk"]
+        elif op == "release" and rid in self._open:
+            record = self._open.pop(rid)
+            self.trades -= 1
+            self.per_instrument[record["symbol"]] -= 1
+            self.risk -= record["risk"]
+        elif op == "submit" and rid in self._open:
+            self._open[rid] = {**self._open[rid], "submitted": True}
+        elif op == "commit":
+            self._open.pop(rid, None)
+
+    def _append(self, record):
+        data = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+        self._catch_up() # Applies our own record exactly like everyone else's
+
+    # --- limits ---
+    def _breach(self, symbol, risk):
+        if self.trades >= self.max_trades:
+            return f"Daily trade limit reached ({self.trades}/{self.max_trades})"
+        if self.max_per_instrument is not None and self.per_instrument[symbol] >= self.max_per_instrument:
+            return f"Instrument limit reached for {symbol} ({self.per_instrument[symbol]}/{self.max_per_instrument})"
+        if self.max_risk is not None and self.risk + risk > self.max_risk:
+            return f"Daily risk ₹{self.risk + risk:.2f} would exceed ₹{self.max_risk}"
+        return None
+
+    def _release_orphans(self):
+        for rid, record in list(self._open.items()):
+            if record.get("submitted"):
+                continue # The kernel may have placed it: counted until the day rolls
+            if record.get("pid") != os.getpid() and not _pid_alive(record.get("pid", 0)):
+                logger.warning(f"RISK LEDGER: releasing {rid} left open by dead process {record.get('pid')}")
+                self._append({"op": "release", "id": rid, "ts": time.time()})
+
+    def check(self, symbol, risk):
+        """In-memory pre-check without touching disk. Returns a breach reason or None."""
+        return self._breach(symbol, risk)
+
+    def reserve(self, symbol, risk):
+        """
+        Atomically book a trade against the limits. Returns (reservation_id, None)
+        or (None, reason). Pass the id to commit() or release() when done.
+        """
+        with self._lock, self._locked():
+            self._catch_up()
+            reason = self._breach(symbol, risk)
+            if reason and self._open:
+                self._release_orphans()
+                reason = self._breach(symbol, risk)
+            if reason:
+                return None, reason
+            self._seq += 1
+            rid = f"{os.getpid()}-{int(time.time() * 1000)}-{self._seq}"
+            self._append({"op": "reserve", "id": rid, "symbol": symbol, "risk": round(risk, 2),
+                          "pid": os.getpid(), "ts": time.time()})
+            return rid, None
+
+    def submit(self, rid):
+        """The order is being handed to the kernel: never free this slot on behalf of a dead process."""
+        self._finish("submit", rid)
+
+    def commit(self, rid):
+        """The trade was executed: keep it on the books."""
+        self._finish("commit", rid)
+
+    def release(self, rid):
+        """The trade did not happen: give its slot and risk back."""
+        self._finish("release", rid)
+
+    def _finish(self, op, rid):
+        with self._lock, self._locked():
+            self._catch_up()
+            if rid in self._open:
+                self._append({"op": op, "id": rid, "ts": time.time()})
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "date": self._day,
+                "trades": self.trades,
+                "open": len(self._open),
+                "risk": round(self.risk, 2),
+                "per_instrument": {k: v for k, v in self.per_instrument.items() if v}
+            }
+
+    def close(self):
+        os.close(self._fd)
+        os.close(self._lock_fd)
+
+if __name__ == "__main__":
+    # Show today's booked risk: python risk_ledger.py [ledger_dir]
+    import sys
+    directory = sys.argv[1] if len(sys.argv) > 1 else "/opt/aegis-saas/telegram/risk_ledger"
+    ledger = RiskLedger(directory, max_trades=float("inf"))
+    print(json.dumps(ledger.snapshot(), indent=2, ensure_ascii=False))
+    ledger.close()
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import aiohttp
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class SignalFeed:
+    """
+    Cursor-based subscription to the backend signal feed.
+
+    Long-polls GET {base_url}/feed?since=<signal_id> so a new signal is seen as
+    soon as it is ingested. If the feed is unreachable (or the backend predates
+    it) it falls back to polling GET {base_url}/today every poll_interval
+    seconds and retries the feed after retry_feed_after seconds. The cursor is
+    the last committed signal_id and is persisted to cursor_path, so a restart
+    resumes exactly where the previous run stopped.
+
+    Alongside the cursor it keeps an indexed seen-set of the last seen_limit
+    handled ids, so a signal is never yielded twice: not when a cursor aged out
+    of the backend window makes it resend everything, not across feed/poll
+    switches, and not when a restart lands in the middle of a batch.
+    """
+    def __init__(self, base_url, cursor_path, wait=25, poll_interval=5, retry_feed_after=30, seen_limit=500):
+        self.base_url = base_url.rstrip("/")
+        self.cursor_path = cursor_path
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.retry_feed_after = retry_feed_after
+        self.seen_limit = seen_limit
+        self.seen = OrderedDict()
+        self.cursor = self._load_cursor()
+        self.mode = "feed"
+        self._session = None
+        self._feed_down_since = None
+
+    def _load_cursor(self):
+        if not os.path.exists(self.cursor_path):
+            return None
+        try:
+            with open(self.cursor_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"FEED: unreadable cursor file ({e}), starting from latest")
+            return None
+        self.seen.update((sid, None) for sid in state.get("seen", []))
+        return state.get("cursor")
+
+    def _save(self):
+        tmp = f"{self.cursor_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"cursor": self.cursor, "seen": list(self.seen), "updated_at": time.time()}, f)
+        os.replace(tmp, self.cursor_path)
+
+    def mark_seen(self, signal_id):
+        """Record signal_id as handled, without moving the cursor."""
+        self.seen[signal_id] = None
+        self.seen.move_to_end(signal_id)
+        while len(self.seen) > self.seen_limit:
+            self.seen.popitem(last=False)
+        self._save()
+
+    def commit(self, signal_id):
+        """Advance the cursor to signal_id (everything up to it is handled) and persist."""
+        self.cursor = signal_id
+        self.mark_seen(signal_id)
+
+    def signals_since(self, signals):
+        """Newest-first /today listing -> signals after the cursor, oldest first."""
+        if not self.cursor:
+            return signals[:1]
+        ids = [s.get("signal_id") for s in signals]
+        newer = signals[:ids.index(self.cursor)] if self.cursor in ids else signals
+        return newer[::-1]
+
+    async def _get(self, path, params, timeout):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        async with self._session.get(f"{self.base_url}{path}", params=params,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as res:
+            if res.status != 200:
+                raise RuntimeError(f"{path} returned {res.status}")
+            return await res.json()
+
+    async def _from_feed(self):
+        params = {"wait": self.wait}
+        if self.cursor:
+            params["since"] = self.cursor
+        body = await self._get("/feed", params, timeout=self.wait + 10)
+        return body.get("data", [])
+
+    async def _from_poll(self):
+        await asyncio.sleep(self.poll_interval)
+        body = await self._get("/today", None, timeout=5)
+        return self.signals_since(body.get("data", []))
+
+    async def batches(self):
+        """
+        Yield lists of unseen signals (oldest first), possibly empty, one per
+        round-trip. Callers mark_seen() each signal once handled; the cursor
+        is committed past the batch when the caller asks for the next one.
+        """
+        while True:
+            if self.mode == "poll" and time.monotonic() - self._feed_down_since >= self.retry_feed_after:
+                logger.info("FEED: retrying stream")
+                self.mode = "feed"
+            try:
+                if self.mode == "feed":
+                    batch = await self._from_feed()
+                else:
+                    batch = await self._from_poll()
+            except Exception as e:
+                if self.mode == "feed":
+                    logger.warning(f"FEED: stream dropped ({e!r}), falling back to {self.poll_interval}s polling")
+                    self.mode = "poll"
+                    self._feed_down_since = time.monotonic()
+                else:
+                    logger.error(f"Polling Error: {e!r}")
+                batch = []
+            yield [s for s in batch if s.get("signal_id") not in self.seen]
+            # Resumed by the caller: the whole batch is handled
+            if batch:
+                self.commit(batch[-1].get("signal_id"))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+async def _tail(base_url, cursor_path):
+    feed = SignalFeed(base_url, cursor_path)
+    try:
+        async for batch in feed.batches():
+            for signal in batch:
+                print(f"[{feed.mode}] {signal.get('signal_id')} {signal.get('symbol')} {signal.get('side')} @ {signal.get('entry_price')}")
+                feed.mark_seen(signal.get("signal_id"))
+    finally:
+        await feed.close()
+
+if __name__ == "__main__":
+    # Tail a backend (or stub_backend.py) feed: python signal_feed.py [base_url] [cursor_file]
+    import sys
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:4100/api/v1/signals"
+    cursor_path = sys.argv[2] if len(sys.argv) > 2 else "feed_cursor.json"
+    asyncio.run(_tail(base_url, cursor_path))
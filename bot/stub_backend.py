@@ -0,0 +1,169 @@
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from aiohttp import web
+
+BOT_SECRET = "AEGIS_BOT_SECRET_V1"
+REQUIRED_FIELDS = ("symbol", "side", "entry_price", "stop_loss", "targets")
+MAX_BULK_SIGNALS = 100
+MAX_BULK_OUTCOMES = 200
+DAILY_LIMIT = 50
+FEED_MAX_WAIT = 30
+
+class StubBackend:
+    """
+    Local stand-in for the backend signal routes, for benchmarks and offline runs.
+    Mirrors the auth check and response shapes of backend/src/routes/signals.ts
+    and adds a fixed per-request latency to simulate a remote VPS.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.ingested = []
+        self.daily = [] # Newest first, like DAILY_SIGNALS
+        self.outcomes = []
+        self._arrived = None # asyncio.Event, created on the serving loop
+
+    def _authorized(self, request):
+        return request.headers.get("x-api-key") == BOT_SECRET and request.headers.get("x-source") == "TELEGRAM"
+
+    def _accept(self, payload):
+        missing = [k for k in REQUIRED_FIELDS if payload.get(k) is None]
+        if missing:
+            return {"status": "rejected", "reason": f"MISSING_FIELDS: {', '.join(missing)}"}
+        self.ingested.append(payload)
+        signal_id = f"SIG-{int(time.time() * 1000)}-{len(self.ingested)}"
+        self.daily.insert(0, {**payload, "signal_id": signal_id})
+        del self.daily[DAILY_LIMIT:]
+        if self._arrived is not None:
+            self._arrived.set()
+        return {
+            "status": "success",
+            "signal_id": signal_id,
+            "action": "QUEUED_FOR_ROUTING"
+        }
+
+    def signals_since(self, since):
+        # Same cursor rules as GET /feed in signals_vps.js
+        if not since:
+            return self.daily[:1]
+        ids = [s["signal_id"] for s in self.daily]
+        newer = self.daily[:ids.index(since)] if since in ids else list(self.daily)
+        return newer[::-1]
+
+    async def ingest(self, request):
+        if not self._authorized(request):
+            return web.json_response({"error": "UNAUTHORIZED_SOURCE"}, status=403)
+        payload = await request.json()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = self._accept(payload)
+        return web.json_response(result, status=200 if result["status"] == "success" else 400)
+
+    async def ingest_bulk(self, request):
+        # One round-trip (and one multi-row INSERT on the real backend) per batch
+        if not self._authorized(request):
+            return web.json_response({"error": "UNAUTHORIZED_SOURCE"}, status=403)
+        signals = (await request.json()).get("signals")
+        if not isinstance(signals, list) or len(signals) > MAX_BULK_SIGNALS:
+            return web.json_response({"status": "error", "reason": f"signals must be a list of <= {MAX_BULK_SIGNALS}"}, status=400)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = [{"id": s.get("id"), **self._accept(s)} for s in signals]
+        return web.json_response({"status": "success", "results": results})
+
+    async def report_outcome(self, request):
+        if not self._authorized(request):
+            return web.json_response({"error": "UNAUTHORIZED_SOURCE"}, status=403)
+        body = await request.json()
+        if not body.get("signal_id"):
+            return web.json_response({"status": "error", "message": "signal_id required"}, status=400)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.outcomes.append(body)
+        return web.json_response({"status": "success", "message": "OUTCOME_RECORDED"})
+
+    async def report_outcome_bulk(self, request):
+        if not self._authorized(request):
+            return web.json_response({"error": "UNAUTHORIZED_SOURCE"}, status=403)
+        outcomes = (await request.json()).get("outcomes")
+        if not isinstance(outcomes, list) or len(outcomes) > MAX_BULK_OUTCOMES:
+            return web.json_response({"status": "error", "message": f"outcomes must be a list of <= {MAX_BULK_OUTCOMES}"}, status=400)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for o in outcomes:
+            if not o.get("signal_id"):
+                results.append({"id": o.get("id"), "status": "rejected", "reason": "signal_id required"})
+                continue
+            self.outcomes.append(o)
+            results.append({"id": o.get("id"), "status": "success"})
+        return web.json_response({"status": "success", "results": results})
+
+    async def today(self, request):
+        return web.json_response({"market_status": "OPEN", "server_port": 4100, "data": self.daily})
+
+    async def feed(self, request):
+        since = request.query.get("since")
+        wait = min(float(request.query.get("wait", 0) or 0), FEED_MAX_WAIT)
+        if self._arrived is None:
+            self._arrived = asyncio.Event()
+        data = self.signals_since(since)
+        deadline = time.monotonic() + wait
+        while not data and time.monotonic() < deadline:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+            data = self.signals_since(since)
+        return web.json_response({
+            "status": "success",
+            "cursor": data[-1]["signal_id"] if data else since,
+            "data": data
+        })
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/api/v1/signals/ingest", self.ingest)
+        app.router.add_post("/api/v1/signals/ingest/bulk", self.ingest_bulk)
+        app.router.add_get("/api/v1/signals/today", self.today)
+        app.router.add_get("/api/v1/signals/feed", self.feed)
+        app.router.add_post("/api/v1/signals/report-outcome", self.report_outcome)
+        app.router.add_post("/api/v1/signals/report-outcome/bulk", self.report_outcome_bulk)
+        return app
+
+    async def start(self, host="127.0.0.1", port=4100):
+        runner = web.AppRunner(self.make_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    def start_in_thread(self, host="127.0.0.1", port=4100):
+        """
+        Serve from a daemon thread with its own loop, so callers that block
+        their own loop (e.g. requests.post inside async code) can still be served.
+        """
+        ready = threading.Event()
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start(host, port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{port}"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local stub of the Aegis signals API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=4100)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = ap.parse_args()
+
+    print(f"Stub backend on http://{args.host}:{args.port} (latency {args.latency * 1000:.0f}ms)", file=sys.stderr)
+    web.run_app(StubBackend(args.latency).make_app(), host=args.host, port=args.port, print=None)
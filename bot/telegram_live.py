@@ -1,10 +1,17 @@
 import os
+import time
 import asyncio
 import logging
-import requests
+from contextlib import suppress
 from datetime import datetime, timezone, timedelta
 from telethon import TelegramClient, events
-from parser import parse_signal
+from forwarder import SignalForwarder, SignalBatcher
+from outbox import Outbox
+from gap_fill import GapTracker
+from latency import LatencyRecorder, new_trace, stamp
+from channels import ChannelMetrics, ShardRouter, load_channels
+from pipeline import IngestPipeline, Stage, BLOCK, DROP_OLDEST
+from async_log import setup_logging
 
 # CONFIGURATION
 BASE_DIR = "/opt/aegis-saas/telegram"
@@ -14,16 +21,49 @@ SESSION_PATH = os.path.join(BASE_DIR, SESSION_NAME)
 # Telegram API Credentials
 API_ID = 33096444
 API_HASH = "a15b675d594842d128711e8391c1b6a1"
-TARGET_CHANNEL = "Options_Banknifty_Share_Market"
+TARGET_CHANNEL = "Options_Banknifty_Share_Market" # Used when there is no channels.json
 
 # Backend API
 API_ENDPOINT = "http://91.98.226.5:4100/api/v1/signals/ingest"
+BULK_ENDPOINT = f"{API_ENDPOINT}/bulk"
 BOT_SECRET = "AEGIS_BOT_SECRET_V1"
+BATCH_SIZE = 50 # Max signals per bulk request
+BATCH_WINDOW = 0.05 # Seconds a signal may wait for others to share its request
 
-# In-Memory Cache for De-duplication (5 Minutes)
-# Format: { "Symbol_Side": datetime }
-dedup_cache = {}
+# De-duplication: same symbol/side within 5 minutes, or the exact same message
+# within a day. Snapshotted to disk so a restart's initial sync doesn't re-forward;
+# parse results are kept alongside (parse_cache*.json) so it doesn't re-parse either.
 DEDUP_WINDOW = timedelta(minutes=5)
+CONTENT_DEDUP_WINDOW = timedelta(hours=24)
+
+# Channels: one Telegram connection for all of them. Parse + dedup runs on
+# SHARD_WORKERS processes, each owning the dedup scopes hashed to it
+# (0 = on the event loop, which keeps up with a handful of channels).
+SHARD_WORKERS = 0
+SHARD_STAGE_WORKERS = 256 # Jobs in flight to the shards; ordering is kept per shard
+
+# Ingestion Pipeline (receive -> shard (parse + dedup) -> forward)
+QUEUE_SIZE = 500 # Per-stage queue bound
+FORWARD_WORKERS = BATCH_SIZE # Concurrent forwards, coalesced into bulk POSTs
+METRICS_INTERVAL = 60 # Seconds between queue/throughput log lines
+OUTBOX_DRAIN_INTERVAL = 1.0 # Seconds between outbox fsync/retry passes
+OUTBOX_MAX_AGE = 300 # Seconds: an unsent signal older than this is dropped, not delivered late (= GAP_MAX_AGE)
+pipeline = None # Built inside the running loop by main()
+
+# Staleness: live posts must be fresh; posts recovered after a disconnect get
+# a longer allowance since they were late through no fault of the channel
+LIVE_MAX_AGE = 60 # Seconds
+GAP_MAX_AGE = 300 # Seconds
+GAP_CHECK_INTERVAL = 30 # Seconds between head checks when no reconnect was seen
+GAP_FILL_MAX = 500 # Newest missing messages fetched per catch-up
+GAP_FILL_TIMEOUT = 30 # Seconds a catch-up may take
+GAP_FETCH_CONCURRENCY = 4 # Parallel get_messages requests during catch-up
+gaps = None # Built by main() once the channels are resolved
+
+# Stage latency histograms, served as Prometheus text on 127.0.0.1:METRICS_PORT/metrics
+METRICS_PORT = 9464
+latency = LatencyRecorder()
+channel_metrics = ChannelMetrics()
 
 # Logging setup
 if not os.path.exists(BASE_DIR):
@@ -33,27 +73,26 @@ if not os.path.exists(BASE_DIR):
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
         SESSION_PATH = os.path.join(BASE_DIR, SESSION_NAME)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(BASE_DIR, "live_ingest.log")),
-        logging.StreamHandler()
-    ]
-)
+CHANNELS = load_channels(os.path.join(BASE_DIR, "channels.json"), TARGET_CHANNEL)
+by_peer = {} # Telegram chat_id -> ChannelConfig, filled by main()
+router = None # Built inside the running loop by main()
+
+# Formatting and disk writes happen on a background thread; the hot path only enqueues
+log_pipeline = setup_logging(os.path.join(BASE_DIR, "live_ingest.log"), static={"app": "telegram_live"})
 logger = logging.getLogger(__name__)
 
 client = TelegramClient(SESSION_PATH, API_ID, API_HASH)
+forwarder = SignalForwarder(API_ENDPOINT, BOT_SECRET, timeout=10)
+batcher = SignalBatcher(forwarder, BULK_ENDPOINT, max_batch=BATCH_SIZE, max_delay=BATCH_WINDOW)
+outbox = Outbox(os.path.join(BASE_DIR, "outbox"))
 
 async def forward_signal(payload, is_replay=False):
-    headers = {
-        "x-api-key": BOT_SECRET,
-        "x-source": "TELEGRAM",
-        "Content-Type": "application/json"
-    }
-    
+    # Persist first: if the POST never gets an answer the outbox drainer retries it
+    outbox.put(payload)
     try:
-        res = requests.post(API_ENDPOINT, json=payload, headers=headers, timeout=10)
+        with latency.time("backend"):
+            res = await batcher.submit(payload)
+        outbox.ack(payload["id"]) # The batcher raises on 5xx and retryable 4xx: an answer here is final
         decision = "ACCEPTED" if res.status_code == 200 else f"REJECTED ({res.status_code})"
         
         # LOG REQUIREMENT: Raw, Parsed, Confidence, Decision
@@ -62,96 +101,208 @@ async def forward_signal(payload, is_replay=False):
         logger.info(f"PARSED: {payload['symbol']} {payload['side']} @ {payload['entry_price']}")
         logger.info(f"CONFIDENCE: {payload.get('confidence', 90)}%")
         logger.info(f"DECISION: {decision}")
+        logger.info(f"TRACE: {payload['metadata']['trace']['id']}")
         if res.status_code != 200:
             logger.error(f"BACKEND ERROR: {res.text}")
         logger.info(f"------------------------")
         
     except Exception as e:
-        logger.error(f"❌ NETWORK ERROR: {e}")
+        outbox.release(payload["id"])
+        logger.error(f"❌ NETWORK ERROR: {e!r} | {payload['id']} kept in outbox for retry")
 
-async def process_message(message, is_live=False):
+async def receive_stage(job):
+    message, config = job["message"], job["config"]
+    channel_metrics.count(config.channel, "received")
     text = message.text
     if not text:
-        return
+        return None
         
-    # 1. LIVE AGE CHECK (< 60 seconds)
-    if is_live:
+    # 1. AGE CHECK (live < 60 seconds unless the channel says otherwise, gap-fill < 5 minutes)
+    max_age = (config.max_age or LIVE_MAX_AGE) if job["is_live"] else GAP_MAX_AGE if job.get("gap_fill") else None
+    if max_age is not None:
         msg_time = message.date.replace(tzinfo=timezone.utc)
         now = datetime.now(timezone.utc)
         age = (now - msg_time).total_seconds()
-        if age > 60:
-            logger.warning(f"SKIP: Message too old ({int(age)}s) | Text: {text[:30]}")
-            return
-
-    # 2. PARSE SIGNAL
-    signal = parse_signal(text)
-    if not signal:
-        return # Skip non-signal chatter
-        
-    # 3. LOGIC VALIDATION
-    if signal.get("status") == "REJECTED":
+        if age > max_age:
+            kind = "Gap message" if job.get("gap_fill") else "Message"
+            logger.warning(f"SKIP: {kind} too old ({int(age)}s) | {config.channel} | Text: {text[:30]}")
+            channel_metrics.count(config.channel, "stale")
+            return None
+
+    job["text"] = text
+    stamp(job["trace"], "receive", latency)
+    return job
+
+async def shard_stage(job):
+    config, text = job["config"], job["text"]
+
+    # 2-4. PARSE, VALIDATE and DE-DUPLICATE on the channel's shard
+    # (5-minute window per symbol/side, same message within a day, per dedup scope)
+    marked = len(job["trace"]["t"])
+    result = await router.submit({"text": text, "profile": config.profile, "scope": config.dedup_scope,
+                                  "trace": job["trace"]})
+    trace = job["trace"] = result["trace"]
+    if len(trace["t"]) > marked:
+        # Stamped inside the shard: record parse/dedup here, where the histograms live
+        marks = trace["t"]
+        if "dedup" in marks:
+            latency.record("dedup", marks["dedup"] - marks["parse"])
+        latency.record("parse", marks["parse"] - marks["receive"])
+
+    outcome = result["outcome"]
+    if outcome == "chatter":
+        channel_metrics.count(config.channel, "chatter")
+        return None # Skip non-signal chatter
+    if outcome == "rejected":
         logger.info(f"--- REJECTION REPORT ---")
         logger.info(f"RAW: {text[:100]}...")
-        logger.info(f"DECISION: REJECTED ({signal.get('reason')})")
+        logger.info(f"DECISION: REJECTED ({result['reason']})")
         logger.info(f"------------------------")
-        return
-
-    # 4. DE-DUPLICATION (5-Minute Window)
-    dedup_key = f"{signal['symbol']}_{signal['side']}"
-    now = datetime.now(timezone.utc)
-    if dedup_key in dedup_cache:
-        last_seen = dedup_cache[dedup_key]
-        if now - last_seen < DEDUP_WINDOW:
-            logger.info(f"SKIP: Duplicate signal for {dedup_key} within 5 mins")
-            return
-    
-    dedup_cache[dedup_key] = now
-    # Clean old cache entries occasionally
-    if len(dedup_cache) > 100:
-        expired = [k for k, v in dedup_cache.items() if now - v > DEDUP_WINDOW]
-        for k in expired: del dedup_cache[k]
+        channel_metrics.count(config.channel, "rejected")
+        return None
+    if outcome == "duplicate_text":
+        logger.info(f"SKIP: Message already forwarded | {config.channel} | Text: {text[:30]}")
+        channel_metrics.count(config.channel, "duplicate")
+        return None
+    if outcome == "duplicate_signal":
+        signal = result["signal"]
+        logger.info(f"SKIP: Duplicate signal for {signal['symbol']}_{signal['side']} within 5 mins | {config.channel}")
+        channel_metrics.count(config.channel, "duplicate")
+        return None
+
+    job["signal"] = result["signal"]
+    job["ingested_at"] = datetime.fromtimestamp(result["ingested_at"], timezone.utc)
+    return job
+
+async def forward_stage(job):
+    is_live, message, config = job["is_live"], job["message"], job["config"]
 
     # 5. PREPARE PAYLOAD
     payload = {
-        **signal,
-        "id": f"TLG-{message.id}",
+        **job["signal"],
+        "id": f"TLG-{message.chat_id}-{message.id}",
         "source": "TELEGRAM_EXTERNAL",
         "metadata": {
-            "original_text": text,
+            "original_text": job["text"],
+            "channel": config.channel,
             "is_replay": not is_live,
-            "ingested_at": now.isoformat()
+            "is_gap_fill": job.get("gap_fill", False),
+            "ingested_at": job["ingested_at"].isoformat(),
+            "trace": job["trace"]
         }
     }
     
+    stamp(job["trace"], "dispatch", latency)
+    channel_metrics.count(config.channel, "forwarded")
+    if is_live:
+        channel_metrics.record_lag(config.channel, time.time() - job["trace"]["t"]["message"])
     await forward_signal(payload, is_replay=not is_live)
+    if is_live:
+        latency.record("ingest_total", time.time() - job["trace"]["t"]["message"])
 
-@client.on(events.NewMessage(chats=TARGET_CHANNEL))
+def build_pipeline():
+    # Live posts older than the age limit are worthless, so a full intake sheds
+    # the oldest; every later stage pushes back instead of losing signals.
+    # The shard stage's workers only wait on the router, which queues each
+    # job before its first await, so every shard still sees arrival order.
+    return IngestPipeline(
+        Stage("receive", receive_stage, workers=1, maxsize=QUEUE_SIZE, policy=DROP_OLDEST),
+        Stage("shard", shard_stage, workers=SHARD_STAGE_WORKERS, maxsize=QUEUE_SIZE),
+        Stage("forward", forward_stage, workers=FORWARD_WORKERS, maxsize=QUEUE_SIZE),
+    )
+
+async def process_message(message, config, is_live=False, gap_fill=False):
+    # Marked on arrival: a message still queued in the pipeline is not a gap
+    if gaps is not None:
+        gaps.seen(message.chat_id, message.id)
+    # Telegram delivery delay only means something for live posts
+    trace = new_trace(message.date.replace(tzinfo=timezone.utc).timestamp())
+    stamp(trace, "telegram", latency if is_live else None)
+    # Replays and gap-fills must not be shed: wait for room instead
+    await pipeline.submit({"message": message, "config": config, "is_live": is_live, "gap_fill": gap_fill,
+                           "trace": trace}, policy=None if is_live else BLOCK)
+
+async def process_gap_message(message):
+    await process_message(message, by_peer[message.chat_id], gap_fill=True)
+
+async def report_pipeline_metrics():
+    while True:
+        await asyncio.sleep(METRICS_INTERVAL)
+        logger.info(f"PIPELINE: {pipeline.format_metrics()}")
+        logger.info(f"LATENCY: {latency.format()}")
+        logger.info(f"LOG: {log_pipeline.format()}")
+        logger.info(f"CHANNELS: {channel_metrics.format()} | {router.format()}")
+
+@client.on(events.NewMessage(chats=[c.channel for c in CHANNELS]))
 async def live_handler(event):
-    await process_message(event.message, is_live=True)
+    config = by_peer.get(event.chat_id)
+    if config is not None:
+        await process_message(event.message, config, is_live=True)
 
-async def run_initial_sync():
+async def run_initial_sync(entity, config):
     # Only sync last 20 messages on startup to avoid massive historical replay
-    logger.info(f"📜 Replaying last 20 messages for initial sync...")
-    async for message in client.iter_messages(TARGET_CHANNEL, limit=20):
-        await process_message(message, is_live=False)
+    logger.info(f"📜 Replaying last 20 messages of @{config.channel} for initial sync...")
+    async for message in client.iter_messages(entity, limit=20):
+        await process_message(message, config, is_live=False)
 
 async def main():
-    logger.info("🚀 Aegis Telegram LIVE Ingestion starting (PROD MODE)...")
+    global pipeline, gaps, router
+    logger.info(f"🚀 Aegis Telegram LIVE Ingestion starting (PROD MODE): {len(CHANNELS)} channels, "
+                f"{SHARD_WORKERS or 'inline'} shard workers...")
+    router = ShardRouter(SHARD_WORKERS, BASE_DIR, DEDUP_WINDOW.total_seconds(), CONTENT_DEDUP_WINDOW.total_seconds(),
+                         persist_parses=True)
+    router.start()
+    pipeline = build_pipeline()
+    pipeline.start()
+    metrics_task = asyncio.create_task(report_pipeline_metrics())
+    gap_tasks = []
+    metrics_server = await latency.serve(port=METRICS_PORT, extra=(channel_metrics.render,))
+    # Also replays whatever was left unacked by the previous run
+    drain_task = asyncio.create_task(outbox.drain(batcher.submit, interval=OUTBOX_DRAIN_INTERVAL,
+                                                  max_age=OUTBOX_MAX_AGE))
     try:
         await client.start()
         
-        # Verify access to channel
-        channel = await client.get_entity(TARGET_CHANNEL)
-        logger.info(f"Connected to @{TARGET_CHANNEL}: {channel.title}")
+        # Verify access to every channel
+        entities = []
+        for config in CHANNELS:
+            channel = await client.get_entity(config.channel)
+            by_peer[await client.get_peer_id(channel)] = config
+            entities.append((channel, config))
+            logger.info(f"Connected to @{config.channel}: {channel.title} "
+                        f"(profile {config.profile}, dedup scope {config.dedup_scope or 'global'})")
         
-        # Initial sync
-        await run_initial_sync()
+        gaps = GapTracker(client, os.path.join(BASE_DIR, "last_seen.json"), process_gap_message,
+                          concurrency=GAP_FETCH_CONCURRENCY, max_fill=GAP_FILL_MAX, timeout=GAP_FILL_TIMEOUT)
+
+        # Initial sync: fill the gap since the previous run, or replay the tail on a first run
+        for channel, config in entities:
+            if await client.get_peer_id(channel) in gaps.last_ids:
+                await gaps.catch_up(channel, "restart")
+            else:
+                await run_initial_sync(channel, config)
+            gap_tasks.append(asyncio.create_task(gaps.watch(channel, interval=GAP_CHECK_INTERVAL)))
         
         # Live Ingestion
         logger.info("📡 LIVE Ingestion Active. Listening for new broadcasts...")
         await client.run_until_disconnected()
     except Exception as e:
         logger.error(f"FATAL ERROR: {e}")
+    finally:
+        metrics_task.cancel()
+        for task in gap_tasks:
+            task.cancel()
+        await pipeline.stop()
+        await router.close()
+        if gaps is not None:
+            gaps.save()
+        await batcher.flush()
+        drain_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await drain_task # Let in-flight resends ack or release before the outbox's fd is closed
+        outbox.close()
+        await forwarder.close()
+        await metrics_server.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,9 +1,8 @@
-import re
 import json
 import asyncio
-import requests
-from datetime import datetime
 from telethon import TelegramClient, events
+from formats import parser_for
+from forwarder import SignalForwarder
 
 # CONFIG
 API_ENDPOINT = "http://91.98.226.5:4100/api/v1/signals/ingest"
@@ -12,41 +11,21 @@ API_ID = 33096444
 API_HASH = "a15b675d594842d128711e8391c1b6a1"
 TARGET_CHANNEL = "Options_Banknifty_Share_Market"
 
-# Regex for standard format: SYMBOL buy PRICE sl PRICE tgt PRICE[/PRICE]
-SIGNAL_PATTERN = r"([A-Z0-9]+)\s+(buy|sell)\s+(\d+)\s+sl\s+(\d+)\s+tgt\s+([\d\/]+)"
+# Standard format only: SYMBOL buy PRICE sl PRICE tgt PRICE[/PRICE]
+parse_signal = parser_for("strict")
 
+forwarder = SignalForwarder(API_ENDPOINT, BOT_SECRET, timeout=5)
 client = TelegramClient('aegis_session', API_ID, API_HASH)
 
-def parse_signal(text):
-    match = re.search(SIGNAL_PATTERN, text, re.IGNORECASE)
-    if match:
-        symbol, side, entry, sl, tgts = match.groups()
-        return {
-            "instrument": "NFO",
-            "symbol": symbol.upper(),
-            "side": side.upper(),
-            "entry_price": float(entry),
-            "stop_loss": float(sl),
-            "targets": [float(t) for t in tgts.split('/')],
-            "confidence": 95,
-            "timestamp_ist": datetime.now().isoformat()
-        }
-    return None
-
 async def forward_signal(payload):
-    headers = {
-        "x-api-key": BOT_SECRET,
-        "x-source": "TELEGRAM",
-        "Content-Type": "application/json"
-    }
     try:
-        res = requests.post(API_ENDPOINT, json=payload, headers=headers, timeout=5)
+        res = await forwarder.send(payload)
         if res.status_code == 200:
             print(f"✅ ACCEPTED: {payload['symbol']} {payload['side']}")
         else:
             print(f"⚠️ REJECTED: {res.json().get('reason', 'Unknown error')}")
     except Exception as e:
-        print(f"❌ NETWORK ERROR: {e}")
+        print(f"❌ NETWORK ERROR: {e!r}")
 
 @client.on(events.NewMessage(chats=TARGET_CHANNEL))
 async def handler(event):
@@ -69,7 +48,10 @@ async def main():
     print(f"🚀 Aegis Telethon Listener starting for @{TARGET_CHANNEL}...")
     await client.start()
     print("📡 Listening for real-time signals...")
-    await client.run_until_disconnected()
+    try:
+        await client.run_until_disconnected()
+    finally:
+        await forwarder.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -3,7 +3,8 @@ import asyncio
 import logging
 from datetime import datetime
 from telethon import TelegramClient, events
-from parser import parse_signal
+from forwarder import SignalForwarder
+from formats import parser_for
 
 # CONFIGURATION
 # Primary configuration for VPS environment
@@ -37,25 +38,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+parse_signal = parser_for("default") # Chatter is dropped by the format prefilter before parsing
+forwarder = SignalForwarder(API_ENDPOINT, BOT_SECRET, timeout=5)
 client = TelegramClient(SESSION_PATH, API_ID, API_HASH)
 
 async def forward_signal(payload):
-    import requests
-    headers = {
-        "x-api-key": BOT_SECRET,
-        "x-source": "TELEGRAM",
-        "Content-Type": "application/json"
-    }
     try:
-        # Use simple POST for now as per previous implementation
-        # In production, consider using aiohttp for async compatibility
-        res = requests.post(API_ENDPOINT, json=payload, headers=headers, timeout=5)
+        res = await forwarder.send(payload)
         if res.status_code == 200:
             logger.info(f"✅ ACCEPTED: {payload['symbol']} {payload['side']}")
         else:
             logger.warning(f"⚠️ REJECTED: {res.json().get('reason', 'Unknown error')}")
     except Exception as e:
-        logger.error(f"❌ NETWORK ERROR: {e}")
+        logger.error(f"❌ NETWORK ERROR: {e!r}")
 
 @client.on(events.NewMessage(chats=TARGET_CHANNEL))
 async def handler(event):
@@ -91,6 +86,8 @@ async def main():
         await client.run_until_disconnected()
     except Exception as e:
         logger.error(f"Failed to start client: {e}")
+    finally:
+        await forwarder.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,54 +1,38 @@
-import re
 import json
 import asyncio
-import requests
-from datetime import datetime
 from telethon import TelegramClient
+from formats import parser_for
+from forwarder import SignalForwarder, SignalBatcher
 
 # CONFIG
 API_ENDPOINT = "http://91.98.226.5:4100/api/v1/signals/ingest"
+BULK_ENDPOINT = f"{API_ENDPOINT}/bulk"
 BOT_SECRET = "AEGIS_BOT_SECRET_V1"
 API_ID = 33096444
 API_HASH = "a15b675d594842d128711e8391c1b6a1"
 TARGET_CHANNEL = "Options_Banknifty_Share_Market"
 
-# Regex for standard format
-SIGNAL_PATTERN = r"([A-Z0-9]+)\s+(buy|sell)\s+(\d+)\s+sl\s+(\d+)\s+tgt\s+([\d\/]+)"
+# Standard format only: SYMBOL buy PRICE sl PRICE tgt PRICE[/PRICE]
+parse_signal = parser_for("strict")
 
 client = TelegramClient('aegis_session', API_ID, API_HASH)
-
-def parse_signal(text):
-    match = re.search(SIGNAL_PATTERN, text, re.IGNORECASE)
-    if match:
-        symbol, side, entry, sl, tgts = match.groups()
-        return {
-            "instrument": "NFO",
-            "symbol": symbol.upper(),
-            "side": side.upper(),
-            "entry_price": float(entry),
-            "stop_loss": float(sl),
-            "targets": [float(t) for t in tgts.split('/')],
-            "confidence": 95,
-            "timestamp_ist": datetime.now().isoformat()
-        }
-    return None
+forwarder = SignalForwarder(API_ENDPOINT, BOT_SECRET, timeout=5)
+batcher = SignalBatcher(forwarder, BULK_ENDPOINT)
 
 async def forward_signal(payload):
-    headers = {
-        "x-api-key": BOT_SECRET,
-        "x-source": "TELEGRAM",
-        "Content-Type": "application/json"
-    }
     try:
-        res = requests.post(API_ENDPOINT, json=payload, headers=headers, timeout=5)
-        print(f"   [API] Status: {res.status_code} | Reason: {res.json().get('reason', 'ACCEPTED')}")
+        res = await batcher.submit(payload)
+        print(f"   [API] {payload['id']} Status: {res.status_code} | Reason: {res.json().get('reason', 'ACCEPTED')}")
     except Exception as e:
-        print(f"   [API] Error: {e}")
+        print(f"   [API] {payload['id']} Error: {e!r}")
 
 async def main():
     print(f"📜 Replaying last 10 messages from @{TARGET_CHANNEL}...")
     await client.start()
     
+    # Forwards run concurrently so the batcher can coalesce them
+    forwards = []
+
     # Get last 10 messages
     async for message in client.iter_messages(TARGET_CHANNEL, limit=10):
         if not message.text: continue
@@ -64,9 +48,12 @@ async def main():
                 "source": f"TELEGRAM:@{TARGET_CHANNEL}",
                 "metadata": {"original_text": message.text, "is_replay": True}
             }
-            await forward_signal(payload)
+            forwards.append(asyncio.create_task(forward_signal(payload)))
         else:
             print("   [SKIP] Non-signal message")
 
+    await asyncio.gather(*forwards)
+    await forwarder.close()
+
 if __name__ == "__main__":
     asyncio.run(main())
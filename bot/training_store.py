@@ -0,0 +1,494 @@
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime, timezone, timedelta
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRAINING_DIR = os.environ.get("AEGIS_TRAINING_DIR", "/data/training") # Where the backend mirrors training_dataset_*.jsonl
+STORE_DIR = os.path.join(TRAINING_DIR, "columnar")
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+PART_ROWS = 100000 # Rows buffered per date before a part is written
+IST = timezone(timedelta(hours=5, minutes=30)) # Partitions are trading days
+
+# Column kinds: "dict" = dictionary-encoded strings (int32 codes + the part's
+# distinct values), "str" = short strings as a NumPy unicode array, "text" =
+# UTF-8 blob + offsets, everything else a NumPy dtype.
+SCHEMAS = {
+    "signals": {
+        "signal_id": "str",
+        "created_at": np.float64, # Unix seconds
+        "channel": "dict",
+        "source": "dict",
+        "symbol": "dict",
+        "side": "dict",
+        "validation_result": "dict",
+        "reject_reason": "dict",
+        "outcome_status": "dict", # As recorded on the line; see the "outcome" scan column
+        "entry_price": np.float64,
+        "stop_loss": np.float64,
+        "t1": np.float64,
+        "t2": np.float64,
+        "t3": np.float64,
+        "n_targets": np.int8,
+        "confidence": np.float32,
+        "parse_confidence": np.float32,
+        "latency_ms": np.float32,
+        "score_parsing": np.float32,
+        "score_logic": np.float32,
+        "score_latency": np.float32,
+        "score_history": np.float32,
+        "pnl": np.float64,
+        "raw_message": "text",
+    },
+    # OUTCOME_UPDATE events: the latest one per signal_id wins
+    "outcomes": {
+        "signal_id": "str",
+        "ts": np.float64,
+        "status": "dict",
+        "pnl": np.float64,
+        "hit": "dict", # T1/T2/T3/SL, set by outcome_resolver
+        "time_to_outcome_s": np.float32,
+    },
+}
+# Scan columns joined from the latest outcome update: name -> (outcomes column, signals fallback)
+OUTCOME_COLUMNS = {
+    "outcome": ("status", "outcome_status"),
+    "outcome_pnl": ("pnl", "pnl"),
+    "outcome_hit": ("hit", None),
+    "time_to_outcome_s": ("time_to_outcome_s", None),
+}
+FILTERS = ("channel", "symbol", "validation_result", "outcome") # scan() keyword filters
+
+def _epoch(value):
+    """ISO-8601 (naive = IST, like timestamp_ist) or Unix seconds -> Unix seconds; NaN if unusable."""
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return float("nan")
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=IST)
+    return ts.timestamp()
+
+def _day(epoch):
+    return datetime.fromtimestamp(epoch, IST).strftime("%Y-%m-%d") if epoch == epoch else "unknown"
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+def _source_channel(source):
+    """Channel name from a "TELEGRAM:@<name>" source, else ""."""
+    kind, _, name = str(source or "").partition(":")
+    return name.lstrip("@") if kind == "TELEGRAM" else ""
+
+def flatten(record):
+    """
+    One JSONL line -> (kind, row). Reads the backend's TrainingStore layout
+    (parsed_payload, aegis_validation_result, OUTCOME_UPDATE events) and the
+    nested structured_signal / score_breakdown / final_outcome layout.
+    """
+    if record.get("event") == "OUTCOME_UPDATE":
+        return "outcomes", {
+            "signal_id": str(record.get("signal_id") or ""),
+            "ts": _epoch(record.get("timestamp")),
+            "status": str(record.get("status") or ""),
+            "pnl": _num(record.get("pnl")),
+            "hit": str(record.get("hit") or ""),
+            "time_to_outcome_s": _num(record.get("time_to_outcome_s")),
+        }
+    payload = record.get("structured_signal") or record.get("parsed_payload") or {}
+    validation = record.get("aegis_validation_result") or {}
+    if not isinstance(validation, dict):
+        validation = {"status": validation}
+    breakdown = (record.get("score_breakdown") or validation.get("score_breakdown")
+                 or payload.get("score_breakdown") or {})
+    final = record.get("final_outcome")
+    if not isinstance(final, dict):
+        final = {"status": final} if final else {}
+    metadata = payload.get("metadata") or {}
+    targets = [_num(t) for t in payload.get("targets") or []]
+    targets += [float("nan")] * (3 - len(targets))
+    return "signals", {
+        "signal_id": str(record.get("signal_id") or payload.get("id") or record.get("id") or ""),
+        "created_at": _epoch(record.get("created_at") or payload.get("timestamp_ist")),
+        "channel": str(metadata.get("channel") or record.get("channel")
+                       or _source_channel(record.get("source") or payload.get("source"))),
+        "source": str(payload.get("source") or record.get("source") or ""),
+        "symbol": str(payload.get("symbol") or ""),
+        "side": str(payload.get("side") or ""),
+        "validation_result": str(record.get("validation_result") or validation.get("status") or ""),
+        "reject_reason": str(validation.get("reason") or ""),
+        "outcome_status": str(final.get("status") or record.get("outcome_status") or "PENDING"),
+        "entry_price": _num(payload.get("entry_price")),
+        "stop_loss": _num(payload.get("stop_loss")),
+        "t1": targets[0],
+        "t2": targets[1],
+        "t3": targets[2],
+        "n_targets": min(len(payload.get("targets") or []), 127),
+        "confidence": _num(payload.get("confidence")),
+        "parse_confidence": _num(record.get("parse_confidence")),
+        "latency_ms": _num(record.get("latency_ms")),
+        "score_parsing": _num(breakdown.get("parsing")),
+        "score_logic": _num(breakdown.get("logic")),
+        "score_latency": _num(breakdown.get("latency")),
+        "score_history": _num(breakdown.get("history")),
+        "pnl": _num(final.get("pnl", record.get("pnl"))),
+        "raw_message": str(record.get("raw_message") or metadata.get("original_text")
+                           or ((record.get("parsed_payload") or {}).get("metadata") or {}).get("original_text") or ""),
+    }
+
+# --- part files ---
+def _write_part(path, kind, columns):
+    """`columns` (name -> sequence) into one compressed .npz; returns the manifest's per-column distinct values."""
+    arrays, values = {}, {}
+    for name, kind_ in SCHEMAS[kind].items():
+        column = columns[name]
+        if kind_ == "dict":
+            distinct, codes = np.unique(np.asarray(column, dtype=str), return_inverse=True)
+            arrays[f"{name}.codes"] = codes.astype(np.int32)
+            arrays[f"{name}.values"] = distinct
+            values[name] = distinct.tolist()
+        elif kind_ == "str":
+            arrays[name] = np.asarray(column, dtype=str)
+        elif kind_ == "text":
+            encoded = [v.encode() for v in column]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            arrays[f"{name}.blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            arrays[f"{name}.offsets"] = offsets
+        else:
+            arrays[name] = np.asarray(column, dtype=kind_)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return values
+
+class Part:
+    """Lazy reader: only the columns asked for are decompressed."""
+    def __init__(self, path, kind, rows):
+        self.kind = kind
+        self.rows = rows
+        self._npz = np.load(path, allow_pickle=False)
+
+    def column(self, name, index=None):
+        kind = SCHEMAS[self.kind][name]
+        files = self._npz.files
+        if kind == "dict":
+            if f"{name}.codes" not in files:
+                return np.full(self.rows if index is None else len(index), "", dtype=str)
+            codes = self._npz[f"{name}.codes"]
+            return self._npz[f"{name}.values"][codes if index is None else codes[index]]
+        if kind == "text":
+            if f"{name}.blob" not in files:
+                return [""] * (self.rows if index is None else len(index))
+            blob, offsets = self._npz[f"{name}.blob"], self._npz[f"{name}.offsets"]
+            rows = range(self.rows) if index is None else index
+            return [blob[offsets[i]:offsets[i + 1]].tobytes().decode() for i in rows]
+        if name not in files:
+            fill = "" if kind == "str" else (np.nan if np.dtype(kind).kind == "f" else 0)
+            return np.full(self.rows if index is None else len(index), fill, dtype=str if kind == "str" else kind)
+        data = self._npz[name]
+        return data if index is None else data[index]
+
+    def codes_matching(self, name, wanted):
+        """Row mask for a dictionary column, comparing int codes only."""
+        values = self._npz[f"{name}.values"]
+        allowed = np.flatnonzero(np.isin(values, list(wanted)))
+        return np.isin(self._npz[f"{name}.codes"], allowed)
+
+    def close(self):
+        self._npz.close()
+
+class TrainingDataset:
+    """
+    Columnar, compressed copy of the training JSONL, partitioned by trading
+    day (date=YYYY-MM-DD/part-NNNNNN.npz, one .npz per ingest batch and day).
+
+    ingest() streams new lines from the source files, resuming from the byte
+    offset it reached last time, so it can run from cron as the files grow.
+    A manifest lists the parts with their row counts and the distinct
+    channel/symbol/validation/outcome values of each, so scan() skips whole
+    parts (and whole days) without opening them, then filters the rest on
+    dictionary codes and decodes only the matching rows of the columns asked
+    for. Outcome updates live in their own parts and are joined in at scan
+    time as the "outcome" / "outcome_pnl" columns.
+
+    Parts are written before the manifest (both atomically), so a crash
+    mid-ingest only leaves an unreferenced part and re-reads the same lines.
+    """
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, MANIFEST)
+        self.manifest = {"version": STORE_VERSION, "parts": [], "sources": {}, "next_part": 0}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        self._outcomes = None
+
+    def _save_manifest(self):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def _add_part(self, kind, day, columns, rows):
+        number = self.manifest["next_part"]
+        self.manifest["next_part"] += 1
+        relative = os.path.join(f"date={day}", f"{'part' if kind == 'signals' else 'outcomes'}-{number:06d}.npz")
+        os.makedirs(os.path.join(self.directory, f"date={day}"), exist_ok=True)
+        values = _write_part(os.path.join(self.directory, relative), kind, columns)
+        self.manifest["parts"].append({"file": relative, "kind": kind, "date": day, "rows": rows, "values": values})
+        self._outcomes = None
+        return relative
+
+    def _flush(self, buffers):
+        for (kind, day), rows in buffers.items():
+            if rows:
+                self._add_part(kind, day, {name: [row[name] for row in rows] for name in SCHEMAS[kind]}, len(rows))
+        buffers.clear()
+
+    def append(self, kind, columns):
+        """
+        Add rows given as arrays (name -> array, missing columns empty/NaN),
+        partitioned by day like ingested lines. Returns rows added.
+        """
+        time_column = np.asarray(columns["created_at" if kind == "signals" else "ts"], dtype=np.float64)
+        rows = len(time_column)
+        if not rows:
+            return 0
+        offset = IST.utcoffset(None).total_seconds()
+        day_number = np.floor((time_column + offset) / 86400) # NaN stays NaN: the "unknown" day
+        for number in np.unique(day_number):
+            index = np.flatnonzero(day_number == number if number == number else np.isnan(day_number))
+            day = _day(number * 86400 - offset if number == number else number)
+            part = {}
+            for name, kind_ in SCHEMAS[kind].items():
+                if name in columns:
+                    part[name] = np.asarray(columns[name])[index] if kind_ != "text" else [columns[name][i] for i in index]
+                elif kind_ in ("dict", "str", "text"):
+                    part[name] = [""] * len(index)
+                else:
+                    part[name] = np.full(len(index), np.nan if np.dtype(kind_).kind == "f" else 0, dtype=kind_)
+            self._add_part(kind, day, part, len(index))
+        self._save_manifest()
+        return rows
+
+    def ingest(self, paths):
+        """Append every complete line added to `paths` since the last ingest. Returns rows added."""
+        added = 0
+        buffers = {}
+        for path in paths:
+            key = os.path.abspath(path)
+            offset = self.manifest["sources"].get(key, 0)
+            if os.path.getsize(path) < offset:
+                logger.warning(f"TRAINING: {path} shrank, re-reading it from the start")
+                offset = 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break # Still being written: pick it up next time
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        kind, row = flatten(json.loads(line))
+                    except (ValueError, AttributeError, TypeError) as e:
+                        logger.warning(f"TRAINING: skipping bad line at {path}:{offset} ({e})")
+                        continue
+                    rows = buffers.setdefault((kind, _day(row["created_at" if kind == "signals" else "ts"])), [])
+                    rows.append(row)
+                    added += 1
+                    if len(rows) >= PART_ROWS:
+                        self._flush(buffers)
+            self.manifest["sources"][key] = offset
+        self._flush(buffers)
+        self._save_manifest()
+        return added
+
+    def compact(self, day=None):
+        """Merge each day's parts (of each kind) into one, so incremental ingests don't fragment scans."""
+        groups = {}
+        for part in self.manifest["parts"]:
+            if day is None or part["date"] == day:
+                groups.setdefault((part["kind"], part["date"]), []).append(part)
+        merged = 0
+        for (kind, date), parts in groups.items():
+            if len(parts) < 2:
+                continue
+            readers = [Part(os.path.join(self.directory, part["file"]), kind, part["rows"]) for part in parts]
+            columns = {}
+            for name, kind_ in SCHEMAS[kind].items():
+                pieces = [reader.column(name) for reader in readers]
+                columns[name] = [v for piece in pieces for v in piece] if kind_ == "text" else np.concatenate(pieces)
+            for reader in readers:
+                reader.close()
+            self._add_part(kind, date, columns, sum(part["rows"] for part in parts))
+            old = {part["file"] for part in parts}
+            self.manifest["parts"] = [p for p in self.manifest["parts"] if p["file"] not in old]
+            self._save_manifest()
+            for name in old:
+                os.remove(os.path.join(self.directory, name))
+            merged += len(parts)
+        self._outcomes = None
+        return merged
+
+    def _outcome_table(self):
+        """Latest OUTCOME_UPDATE per signal: outcomes column -> array, sorted by signal_id."""
+        if self._outcomes is None:
+            pieces = {name: [] for name in SCHEMAS["outcomes"]}
+            for part in self.manifest["parts"]:
+                if part["kind"] != "outcomes":
+                    continue
+                reader = Part(os.path.join(self.directory, part["file"]), "outcomes", part["rows"])
+                for name in pieces:
+                    pieces[name].append(reader.column(name))
+                reader.close()
+            if pieces["signal_id"]:
+                table = {name: np.concatenate(p) for name, p in pieces.items()}
+                order = np.lexsort((table["ts"], table["signal_id"])) # By id, then time: the last of each run is the latest
+                ids = table["signal_id"][order]
+                last = order[np.append(ids[1:] != ids[:-1], True)]
+                self._outcomes = {name: column[last] for name, column in table.items()}
+            else:
+                self._outcomes = {name: np.array([], dtype=str if kind in ("dict", "str") else kind)
+                                  for name, kind in SCHEMAS["outcomes"].items()}
+        return self._outcomes
+
+    def _effective_outcome(self, reader, index, names):
+        """OUTCOME_COLUMNS per selected row: the latest update, else what the line recorded."""
+        table = self._outcome_table()
+        result = {}
+        for name in names:
+            field, fallback = OUTCOME_COLUMNS[name]
+            if fallback:
+                result[name] = reader.column(fallback, index)
+            elif SCHEMAS["outcomes"][field] == "dict":
+                result[name] = np.full(len(index), "", dtype=str)
+            else:
+                result[name] = np.full(len(index), np.nan, dtype=SCHEMAS["outcomes"][field])
+        ids = table["signal_id"]
+        if not len(ids):
+            return result
+        signal_ids = reader.column("signal_id", index)
+        pos = np.minimum(np.searchsorted(ids, signal_ids), len(ids) - 1)
+        found = ids[pos] == signal_ids
+        for name in names:
+            result[name] = np.where(found, table[OUTCOME_COLUMNS[name][0]][pos], result[name])
+        return result
+
+    def scan(self, columns=None, since=None, until=None, **filters):
+        """
+        Yield one dict of column -> array (raw_message: list) per part, holding
+        only the rows that match. Besides the signals columns, OUTCOME_COLUMNS
+        can be asked for. Filters take a value or a list of values:
+        channel, symbol, validation_result, outcome. since/until are
+        YYYY-MM-DD trading days, inclusive.
+        """
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s) {sorted(unknown)}; use {FILTERS}")
+        wanted = {name: {v} if isinstance(v, str) else set(v) for name, v in filters.items() if v is not None}
+        columns = list(columns or [c for c in SCHEMAS["signals"] if c != "raw_message"] + ["outcome"])
+        for part in self.manifest["parts"]:
+            if part["kind"] != "signals" or (since and part["date"] < since) or (until and part["date"] > until):
+                continue
+            if any(not wanted[name] & set(part["values"].get(name, ())) for name in wanted if name != "outcome"):
+                continue # No row of this part can match
+            reader = Part(os.path.join(self.directory, part["file"]), "signals", part["rows"])
+            try:
+                mask = np.ones(part["rows"], dtype=bool)
+                for name in wanted:
+                    if name != "outcome":
+                        mask &= reader.codes_matching(name, wanted[name])
+                index = np.flatnonzero(mask)
+                joined = [name for name in OUTCOME_COLUMNS if name in columns or name in wanted]
+                outcomes = self._effective_outcome(reader, index, joined) if joined else {}
+                if "outcome" in wanted:
+                    keep = np.isin(outcomes["outcome"], list(wanted["outcome"]))
+                    index = index[keep]
+                    outcomes = {name: column[keep] for name, column in outcomes.items()}
+                if not len(index):
+                    continue
+                batch = {}
+                for name in columns:
+                    batch[name] = outcomes[name] if name in outcomes else reader.column(name, index)
+                batch["date"] = part["date"]
+                yield batch
+            finally:
+                reader.close()
+
+    def count(self, since=None, until=None, **filters):
+        return sum(len(batch["signal_id"]) for batch in self.scan(["signal_id"], since, until, **filters))
+
+    def stats(self):
+        signals = [p for p in self.manifest["parts"] if p["kind"] == "signals"]
+        size = sum(os.path.getsize(os.path.join(self.directory, p["file"])) for p in self.manifest["parts"])
+        return {
+            "days": len({p["date"] for p in signals}),
+            "parts": len(self.manifest["parts"]),
+            "signals": sum(p["rows"] for p in signals),
+            "outcome_updates": sum(p["rows"] for p in self.manifest["parts"] if p["kind"] == "outcomes"),
+            "bytes": size,
+            "sources": len(self.manifest["sources"]),
+        }
+
+def source_files(directory=TRAINING_DIR):
+    """The daily training JSONL files, oldest first."""
+    names = sorted(n for n in os.listdir(directory)
+                   if n.endswith(".jsonl") and (n.startswith("training_dataset_") or n.startswith("dataset_")))
+    return [os.path.join(directory, n) for n in names]
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    ap = argparse.ArgumentParser(description="Columnar store for the training dataset JSONL")
+    ap.add_argument("--store", default=STORE_DIR)
+    sub = ap.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="append new lines from the training JSONL files")
+    ingest.add_argument("files", nargs="*", help=f"default: every (training_)dataset_*.jsonl in {TRAINING_DIR}")
+    compact = sub.add_parser("compact", help="merge each day's parts")
+    compact.add_argument("--date")
+    scan = sub.add_parser("scan", help="print matching rows as JSON lines")
+    for name in FILTERS:
+        scan.add_argument(f"--{name.replace('_', '-')}", dest=name, action="append")
+    scan.add_argument("--since")
+    scan.add_argument("--until")
+    scan.add_argument("--columns", help="comma-separated, default all but raw_message")
+    scan.add_argument("--count", action="store_true", help="only print the number of matching rows")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    store = TrainingDataset(args.store)
+    if args.command == "ingest":
+        start = time.perf_counter()
+        added = store.ingest(args.files or source_files())
+        logger.info(f"📦 TRAINING: {added} rows ingested in {time.perf_counter() - start:.2f}s | {store.stats()}")
+    elif args.command == "compact":
+        logger.info(f"📦 TRAINING: {store.compact(args.date)} parts merged | {store.stats()}")
+    elif args.command == "scan":
+        filters = {name: getattr(args, name) for name in FILTERS}
+        if args.count:
+            print(store.count(args.since, args.until, **filters))
+            sys.exit(0)
+        columns = args.columns.split(",") if args.columns else None
+        for batch in store.scan(columns, args.since, args.until, **filters):
+            names = [n for n in batch if n != "date"]
+            for i in range(len(batch[names[0]])):
+                print(json.dumps({n: (batch[n][i].item() if isinstance(batch[n], np.ndarray) else batch[n][i])
+                                  for n in names}, ensure_ascii=False))
+    else:
+        print(json.dumps(store.stats(), indent=2))
@@ -3,9 +3,24 @@ const { Router } = require('express');
 const { DAILY_SIGNALS } = require('../store/signals');
 const db = require('../db/client');
 const { v4: uuidv4 } = require('uuid');
+const { EventEmitter } = require('events');
 
 const router = Router();
 
+// Wakes up long-polling /feed requests whenever signals are stored
+const feed = new EventEmitter();
+feed.setMaxListeners(0);
+const FEED_MAX_WAIT_S = 30;
+
+// DAILY_SIGNALS is newest-first. Returns the signals after `since`, oldest-first.
+// No cursor: only the newest (subscribers start from "now").
+// Unknown cursor (aged out of the window): everything we still hold.
+function signalsSince(since) {
+    if (!since) return DAILY_SIGNALS.slice(0, 1);
+    const idx = DAILY_SIGNALS.findIndex(s => s.signal_id === since);
+    return (idx === -1 ? DAILY_SIGNALS.slice() : DAILY_SIGNALS.slice(0, idx)).reverse();
+}
+
 router.get('/today', (req, res) => {
     res.json({
         market_status: 'OPEN',
@@ -35,6 +50,7 @@ router.post('/ingest', async (req, res) => {
             timestamp_ist: new Date().toLocaleTimeString()
         });
         if (DAILY_SIGNALS.length > 50) DAILY_SIGNALS.pop();
+        feed.emit('signal');
 
         // 2. Store in DB (Correct Schema)
         await db.query(
@@ -60,4 +76,119 @@ router.post('/ingest', async (req, res) => {
     }
 });
 
+// GET /feed?since=<signal_id>&wait=<seconds>
+// Long-poll: answers at once if there is anything after the cursor, otherwise
+// holds the request until the next ingest or `wait` seconds (max 30).
+// Reply: { status, cursor, data: [signals oldest-first] }
+router.get('/feed', (req, res) => {
+    const since = req.query.since || null;
+    const wait = Math.min(Number(req.query.wait) || 0, FEED_MAX_WAIT_S) * 1000;
+
+    const reply = () => {
+        const data = signalsSince(since);
+        res.json({
+            status: 'success',
+            cursor: data.length ? data[data.length - 1].signal_id : since,
+            data
+        });
+    };
+
+    if (signalsSince(since).length || !wait) return reply();
+
+    let timer;
+    const onSignal = () => {
+        clearTimeout(timer);
+        reply();
+    };
+    timer = setTimeout(() => {
+        feed.removeListener('signal', onSignal);
+        reply();
+    }, wait);
+    feed.once('signal', onSignal);
+    res.on('close', () => {
+        clearTimeout(timer);
+        feed.removeListener('signal', onSignal);
+    });
+});
+
+// POST /ingest/bulk
+// Body: { signals: [payload, ...] } (max MAX_BULK_SIGNALS)
+// Reply: { status, results: [{ id, status: 'success', signal_id } | { id, status: 'rejected', reason }] }
+// Results are in request order. Valid signals share one multi-row INSERT.
+// Signals tagged metadata.training_only (history backfills) are stored but
+// never published to DAILY_SIGNALS or /feed, so nothing trades them.
+const MAX_BULK_SIGNALS = 100;
+
+router.post('/ingest/bulk', async (req, res) => {
+    const apiKey = req.headers['x-api-key'];
+    const source = req.headers['x-source'];
+
+    if (apiKey !== 'AEGIS_BOT_SECRET_V1' || source !== 'TELEGRAM') {
+        return res.status(403).json({ error: 'UNAUTHORIZED_SOURCE' });
+    }
+
+    const signals = req.body && req.body.signals;
+    if (!Array.isArray(signals) || signals.length > MAX_BULK_SIGNALS) {
+        return res.status(400).json({ status: 'error', reason: `signals must be an array of <= ${MAX_BULK_SIGNALS}` });
+    }
+
+    const results = [];
+    const accepted = [];
+    for (const s of signals) {
+        if (!s || !s.symbol || !s.side || s.entry_price == null || s.stop_loss == null || !Array.isArray(s.targets)) {
+            results.push({ id: s && s.id, status: 'rejected', reason: 'MISSING_FIELDS' });
+            continue;
+        }
+        const sid = uuidv4();
+        accepted.push({ s, sid });
+        results.push({ id: s.id, status: 'success', signal_id: sid });
+    }
+
+    try {
+        if (accepted.length) {
+            const values = [];
+            const rows = accepted.map(({ s, sid }, i) => {
+                values.push(
+                    sid,
+                    s.instrument || 'NFO',
+                    s.symbol,
+                    s.side,
+                    s.entry_price,
+                    s.stop_loss,
+                    s.targets[0] || null,
+                    s.targets[1] || null,
+                    s.targets[2] || null,
+                    s.confidence || 90
+                );
+                const base = i * 10;
+                return `(${Array.from({ length: 10 }, (_, k) => `$${base + k + 1}`).join(', ')})`;
+            });
+            await db.query(
+                `INSERT INTO signals_daily (signal_id, instrument, symbol, transaction_type, entry_price, stop_loss, target_1, target_2, target_3, confidence) VALUES ${rows.join(', ')}`,
+                values
+            );
+
+            const live = accepted.filter(({ s }) => !(s.metadata && s.metadata.training_only));
+            for (const { s, sid } of live) {
+                DAILY_SIGNALS.unshift({
+                    ...s,
+                    signal_id: sid,
+                    confidence_pct: s.confidence || 90,
+                    outcome_status: 'OPEN',
+                    timestamp_ist: new Date().toLocaleTimeString()
+                });
+            }
+            if (live.length) {
+                DAILY_SIGNALS.splice(50);
+                feed.emit('signal');
+            }
+        }
+
+        res.json({ status: 'success', results });
+    } catch (e) {
+        console.error('Bulk Ingest Error:', e);
+        res.status(500).json({ status: 'error', reason: e.message });
+    }
+});
+
 module.exports = router;